@@ -0,0 +1,64 @@
+"""
+Compares submitting experiments one at a time with submitting them through
+the asyncio `Dispatcher`, against a fake backend where each submission
+takes `--latency` seconds and which allows `--quota` submissions per second.
+
+usage:
+
+    python benchmarks/dispatcher.py --experiments 500 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import time
+
+from runtool.datatypes import Algorithms, Datasets
+from runtool.dispatcher import Dispatcher, FakeBackend
+
+
+def timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:<40}{time.perf_counter() - start:>10.3f}s")
+    return result
+
+
+async def sequential(backend, experiments):
+    return [await backend.submit(experiment) for experiment in experiments]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--experiments", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--quota", type=float, default=2000)
+    parser.add_argument("--in-flight", type=int, default=32)
+    args = parser.parse_args()
+
+    experiments = Algorithms(
+        [
+            {"image": "gluonts", "instance": "ml.m5.xlarge", "index": index}
+            for index in range(args.experiments)
+        ]
+    ) * Datasets([{"path": {}}])
+
+    timed(
+        "sequential",
+        lambda: asyncio.run(
+            sequential(FakeBackend(latency=args.latency), experiments)
+        ),
+    )
+    backend = FakeBackend(args.quota, latency=args.latency)
+    timed(
+        f"dispatcher, {args.in_flight} in flight",
+        lambda: Dispatcher(
+            backend,
+            rate=args.quota,
+            max_in_flight=args.in_flight,
+        ).submit_all(experiments),
+    )
+    print(f"throttled submissions: {backend.throttled}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares the memory used by `Experiments` and `CompactExperiments` for the
+grid defined in the large example config of the test suite. The grid is
+made larger by sweeping the number of epochs of each algorithm.
+
+usage:
+
+    python benchmarks/experiment_memory.py --epochs 100
+"""
+
+import argparse
+import copy
+import tracemalloc
+from pathlib import Path
+
+from runtool.datatypes import (
+    Algorithm,
+    Algorithms,
+    CompactExperiments,
+    Experiments,
+)
+from runtool.runtool import load_config
+
+CONFIG = (
+    Path(__file__).parents[1]
+    / "tests"
+    / "test_transformations"
+    / "test_data"
+    / "large_example"
+    / "source.yml"
+)
+
+
+def measure(name: str, fn):
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<40}{size / 2 ** 20:>10.2f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--epochs", type=int, default=100)
+    args = parser.parse_args()
+
+    config = load_config(CONFIG)
+    algorithms = Algorithms(
+        [
+            Algorithm(
+                dict(
+                    algorithm,
+                    hyperparameters=dict(
+                        algorithm["hyperparameters"], epochs=epochs
+                    ),
+                )
+            )
+            for algorithm in config.algorithms[0]
+            for epochs in range(1, args.epochs + 1)
+        ]
+    )
+    product = algorithms * config.datasets[0]
+    print(f"{len(product)} experiments")
+
+    # experiments which share their algorithms and datasets, as created
+    # when multiplying `Algorithms` with `Datasets`
+    measure("Experiments", lambda: Experiments.from_verified(product))
+    measure("CompactExperiments", lambda: CompactExperiments(product))
+
+    # experiments where each algorithm and dataset is a separate copy,
+    # as when the experiments are loaded from a file
+    measure(
+        "Experiments (copies)",
+        lambda: Experiments.from_verified(map(copy.deepcopy, product)),
+    )
+    measure(
+        "CompactExperiments (copies)",
+        lambda: CompactExperiments(map(copy.deepcopy, product)),
+    )
+
+
+if __name__ == "__main__":
+    main()
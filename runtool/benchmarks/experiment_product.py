@@ -0,0 +1,64 @@
+"""
+Benchmarks the creation of `Experiments` by multiplying `Algorithms` with
+`Datasets`.
+
+The typed product uses the fast path of `Experiment.from_nodes`, the
+untyped product creates the same experiments from plain dictionaries which
+need to be verified and where the orientation is found by trial and error.
+
+usage:
+
+    python benchmarks/experiment_product.py --algorithms 1000 --datasets 1000
+"""
+
+import argparse
+import time
+
+from runtool.datatypes import Algorithms, Datasets, Experiment
+
+
+def timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:<40}{time.perf_counter() - start:>10.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--algorithms", type=int, default=1000)
+    parser.add_argument("--datasets", type=int, default=1000)
+    args = parser.parse_args()
+
+    algorithms = Algorithms(
+        [
+            {
+                "image": f"image_{index}",
+                "instance": "ml.m5.xlarge",
+                "hyperparameters": {"epochs": index},
+            }
+            for index in range(args.algorithms)
+        ]
+    )
+    datasets = Datasets(
+        [
+            {"path": {"train": f"s3://bucket/{index}/train.json"}}
+            for index in range(args.datasets)
+        ]
+    )
+    print(f"{args.algorithms} x {args.datasets} experiments")
+
+    timed("algorithms * datasets", lambda: algorithms * datasets)
+    timed("datasets * algorithms", lambda: datasets * algorithms)
+    timed(
+        "from_nodes on untyped dicts",
+        lambda: [
+            Experiment.from_nodes(dict(dataset), dict(algorithm))
+            for algorithm in algorithms
+            for dataset in datasets
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
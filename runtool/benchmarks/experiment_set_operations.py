@@ -0,0 +1,60 @@
+"""
+Measures the time needed for set operations between two grids of
+`IndexedExperiments`, which overlap by half their experiments.
+
+usage:
+
+    python benchmarks/experiment_set_operations.py --size 100000
+"""
+
+import argparse
+import time
+
+from runtool.datatypes import Algorithms, Datasets, IndexedExperiments
+
+
+def timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:<40}{time.perf_counter() - start:>10.3f}s")
+    return result
+
+
+def grid(start: int, stop: int, datasets: Datasets):
+    algorithms = Algorithms(
+        [
+            {
+                "image": "image",
+                "instance": "ml.m5.xlarge",
+                "hyperparameters": {"epochs": epochs},
+            }
+            for epochs in range(start, stop)
+        ]
+    )
+    return algorithms * datasets
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    datasets = Datasets(
+        [{"path": {"train": f"s3://bucket/{index}"}} for index in range(100)]
+    )
+    algorithms = args.size // len(datasets)
+    left = grid(0, algorithms, datasets)
+    right = grid(algorithms // 2, algorithms + algorithms // 2, datasets)
+
+    left = timed("index left", lambda: IndexedExperiments(left))
+    right = timed("index right", lambda: IndexedExperiments(right))
+    timed("union", lambda: left | right)
+    timed("intersection", lambda: left & right)
+    timed("difference", lambda: left - right)
+    timed(
+        "membership of all items", lambda: all(item in left for item in left)
+    )
+
+
+if __name__ == "__main__":
+    main()
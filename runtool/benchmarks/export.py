@@ -0,0 +1,71 @@
+"""
+Measures the time and peak memory used when exporting a lazy grid of
+experiments to JSON Lines and Parquet files.
+
+usage:
+
+    python benchmarks/export.py --algorithms 1000 --datasets 1000
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from runtool.datatypes import Algorithms, Datasets
+
+
+def measure(name: str, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<20}{duration:>10.1f}s{peak / 2 ** 20:>10.2f} MiB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--algorithms", type=int, default=1000)
+    parser.add_argument("--datasets", type=int, default=1000)
+    parser.add_argument("--parquet", action="store_true")
+    args = parser.parse_args()
+
+    algorithms = Algorithms(
+        [
+            {
+                "image": "image",
+                "instance": "ml.m5.xlarge",
+                "hyperparameters": {"epochs": index, "batch_size": 32},
+            }
+            for index in range(args.algorithms)
+        ]
+    )
+    datasets = Datasets(
+        [
+            {"path": {"train": f"s3://bucket/{index}/train.json"}}
+            for index in range(args.datasets)
+        ]
+    )
+    experiments = algorithms * datasets
+    print(f"{len(experiments)} experiments")
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        measure(
+            "JSON Lines",
+            lambda: experiments.to_jsonl(directory / "experiments.jsonl"),
+        )
+        if args.parquet:
+            measure(
+                "Parquet",
+                lambda: experiments.to_parquet(
+                    directory / "experiments.parquet"
+                ),
+            )
+
+
+if __name__ == "__main__":
+    main()
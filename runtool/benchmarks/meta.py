@@ -0,0 +1,77 @@
+"""
+Compares inferring the meta of a dataset by scanning all of its series with
+estimating it from a sample of the series. A dataset of about `--megabytes`
+megabytes of series of random lengths is written to a temporary directory,
+use e.g. `--megabytes 10000` for a large dataset.
+
+usage:
+
+    python benchmarks/meta.py --megabytes 500 --sample 2000 --max-mb 100
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from runtool.datatypes import Dataset
+from runtool.meta import Sampling, infer_meta
+
+
+def timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:<40}{time.perf_counter() - start:>10.3f}s")
+    return result
+
+
+def write_dataset(path: str, megabytes: int):
+    rng = random.Random(0)
+    written = 0
+    with open(path, "w") as file:
+        while written < megabytes * 2**20:
+            length = int(rng.lognormvariate(5, 1)) + 1
+            scale = rng.lognormvariate(0, 2)
+            series = {
+                "start": "2020-01-01 00:00:00",
+                "target": [round(rng.random() * scale, 3)] * length,
+            }
+            written += file.write(json.dumps(series) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=200)
+    parser.add_argument("--sample", type=int, default=1000)
+    parser.add_argument("--max-mb", type=int, default=None)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "train.json")
+        timed("write dataset", lambda: write_dataset(path, args.megabytes))
+        dataset = Dataset({"path": {"train": path}})
+        exact = timed("exact", lambda: infer_meta(dataset))
+        sampling = Sampling(
+            args.sample,
+            max_bytes=args.max_mb and args.max_mb * 2**20,
+        )
+        approximate = timed(
+            "sampled", lambda: infer_meta(dataset, sampling=sampling)
+        )
+        print("exact:      ", exact["num_time_series"], exact["series_length"])
+        print(
+            "approximate:",
+            approximate["num_time_series"],
+            approximate["series_length"],
+        )
+        print("error:      ", approximate["error"])
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
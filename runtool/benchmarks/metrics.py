@@ -0,0 +1,101 @@
+"""
+Compares extracting the metrics of the large example from a training log by
+searching the whole log once per metric with extracting them in a single
+streaming pass using `MetricScanner`. The log is written to a temporary
+file of about `--megabytes` megabytes, use e.g. `--megabytes 4000` for a
+multi-GB log.
+
+usage:
+
+    python benchmarks/metrics.py --megabytes 500
+"""
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from runtool.metrics import MetricScanner
+
+SOURCE = (
+    Path(__file__).parent.parent
+    / "tests"
+    / "test_transformations"
+    / "test_data"
+    / "large_example"
+    / "source.yml"
+)
+
+
+def timed(name: str, fn, megabytes: float):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    print(f"{name:<40}{seconds:>10.3f}s{megabytes / seconds:>10.1f} MB/s")
+    return result
+
+
+def write_log(path: str, megabytes: int, metrics: dict):
+    rng = random.Random(0)
+    names = list(metrics)
+    block = "".join(
+        f"[{index}] INFO:gluonts.trainer:Epoch[{index % 100}] "
+        f"Batch[{index % 50}] avg_epoch_loss={rng.random():.6f}, "
+        f"learning rate={rng.random():.6f}\n"
+        for index in range(10_000)
+    )
+    with open(path, "w") as log:
+        written = 0
+        while written < megabytes * 1_000_000:
+            log.write(block)
+            name = rng.choice(names)
+            log.write(f"gluonts[metric-{name}): {rng.random():.6f}\n")
+            written += len(block)
+        for name in names:
+            log.write(f"gluonts[metric-{name}): {rng.random():.6f}\n")
+
+
+def naive(path: str, metrics: dict) -> dict:
+    with open(path) as log:
+        text = log.read()
+    result = {}
+    for name, regex in metrics.items():
+        values = re.findall(regex, text)
+        if values:
+            result[name] = float(values[-1])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=200)
+    args = parser.parse_args()
+
+    metrics = yaml.safe_load(SOURCE.read_text())["base_algorithm"]["metrics"]
+    descriptor, path = tempfile.mkstemp(suffix=".log")
+    os.close(descriptor)
+    try:
+        write_log(path, args.megabytes, metrics)
+        megabytes = os.path.getsize(path) / 1_000_000
+        print(f"{len(metrics)} metrics, {megabytes:.0f} MB log")
+        expected = timed(
+            "one search per metric", lambda: naive(path, metrics), megabytes
+        )
+        scanner = MetricScanner(metrics)
+        record = timed(
+            "single streaming pass",
+            lambda: scanner.scan_file(path),
+            megabytes,
+        )
+        assert record.values == expected
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
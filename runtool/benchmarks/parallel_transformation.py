@@ -0,0 +1,60 @@
+"""
+Compares transforming the top-level keys of a config serially with
+transforming them in a pool of processes. Each top-level key is an
+algorithm with a grid of hyperparameters inheriting from a shared base.
+
+usage:
+
+    python benchmarks/parallel_transformation.py --keys 8 --size 30
+"""
+
+import argparse
+import copy
+import time
+
+from runtool.transformer import transform_key, transform_parallel
+
+
+def timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:<40}{time.perf_counter() - start:>10.3f}s")
+    return result
+
+
+def config(keys: int, size: int) -> dict:
+    result = {"base": {"image": "gluonts", "instance": "ml.m5.xlarge"}}
+    for index in range(keys):
+        result[f"algorithm_{index}"] = {
+            "$from": "base",
+            "hyperparameters": {
+                "context_length": {"$each": list(range(size))},
+                "prediction_length": {"$each": list(range(size))},
+                "num_layers": {"$each": list(range(size))},
+            },
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=8)
+    parser.add_argument("--size", type=int, default=30)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    data = config(args.keys, args.size)
+    # the product of the top-level keys is generated lazily, thus only the
+    # transformation of the top-level keys themselves is measured
+    timed(
+        "serial",
+        lambda: {key: transform_key(key, copy.deepcopy(data)) for key in data},
+    )
+    timed(
+        f"{args.processes} processes",
+        lambda: transform_parallel(copy.deepcopy(data), args.processes),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measures writing results to a `ResultsStore` in batches and querying the
+best configuration per dataset as well as results by hyperparameter, with
+and without an index on the hyperparameter.
+
+usage:
+
+    python benchmarks/results.py --rows 1000000 --datasets 50
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from runtool.results import ResultsStore
+
+
+def timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:<40}{time.perf_counter() - start:>10.3f}s")
+    return result
+
+
+def experiments(rows: int, datasets: int):
+    rng = random.Random(0)
+    for index in range(rows):
+        experiment = {
+            "algorithm": {
+                "image": "gluonts",
+                "instance": "ml.m5.xlarge",
+                "hyperparameters": {
+                    "index": index,
+                    "epochs": rng.randrange(1, 100),
+                    "learning_rate": rng.choice([1e-2, 1e-3, 1e-4]),
+                },
+            },
+            "dataset": {
+                "path": {"train": f"s3://bucket/{index % datasets}"},
+                "meta": {"freq": "H"},
+            },
+        }
+        yield experiment, {"MASE": rng.random(), "ND": rng.random()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--datasets", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "results.db")
+    with ResultsStore(path, batch_size=args.batch_size) as store:
+        timed(
+            f"write {args.rows} results",
+            lambda: store.add_many(experiments(args.rows, args.datasets)),
+        )
+        timed("best per dataset", lambda: store.best_per_dataset("MASE"))
+        timed("where, no index", lambda: store.where({"epochs": 42}))
+        timed("create index", lambda: store.index_hyperparameters("epochs"))
+        timed("where, index", lambda: store.where({"epochs": 42}))
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
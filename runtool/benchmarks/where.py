@@ -0,0 +1,56 @@
+"""
+Compares expanding a grid and filtering the versions afterwards with
+pruning the grid using a `$where` directive while it is expanded.
+
+usage:
+
+    python benchmarks/where.py --size 40
+"""
+
+import argparse
+import time
+
+from runtool.transformer import apply_transformations
+
+
+def timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{name:<40}{time.perf_counter() - start:>10.3f}s")
+    return result
+
+
+def grid(size: int, where: bool) -> dict:
+    hyperparameters = {
+        "context_length": {"$each": list(range(size))},
+        "prediction_length": {"$each": list(range(size))},
+        "num_layers": {"$each": list(range(size))},
+    }
+    if where:
+        hyperparameters["$where"] = "context_length > 4 * prediction_length"
+    return {"hyperparameters": hyperparameters}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=40)
+    args = parser.parse_args()
+
+    filtered = timed(
+        "expand then filter",
+        lambda: [
+            version
+            for version in apply_transformations(grid(args.size, False))
+            if version["hyperparameters"]["context_length"]
+            > 4 * version["hyperparameters"]["prediction_length"]
+        ],
+    )
+    pruned = timed(
+        "$where", lambda: apply_transformations(grid(args.size, True))
+    )
+    assert filtered == pruned
+    print(f"{len(pruned)} of {args.size ** 3} versions kept")
+
+
+if __name__ == "__main__":
+    main()
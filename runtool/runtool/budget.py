@@ -0,0 +1,296 @@
+import os
+import pickle
+import sys
+import tempfile
+import weakref
+from collections.abc import Mapping
+from typing import IO, Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+from toolz import merge_with
+
+# keys of a node which control how it is expanded rather than being part
+# of the versions of the node
+DIRECTIVES = ("$each", "$zip", "$where")
+
+
+class BudgetExceededError(Exception):
+    """
+    Raised when expanding a config would exceed the limits of its `Budget`.
+    """
+
+
+class Budget:
+    """
+    Limits the number of versions and the estimated number of bytes which
+    `runtool.transformer.apply_transformations` may keep in memory when
+    expanding a config.
+
+    The number of versions is estimated before the config is expanded, see
+    `count_versions`, and the size of the versions is tracked while they
+    are generated, see `sizeof`. Whenever a limit would be exceeded a
+    `BudgetExceededError` is raised, unless `spill` is set in which case
+    the versions are written to a temporary file instead, see
+    `SpilledVersions`.
+
+    >>> budget = Budget(max_versions=2)
+    >>> budget
+    Budget(max_versions=2, max_bytes=None, spill=False)
+    >>> enforce_budget(iter([{"a": 1}, {"a": 2}]), budget, expected=2)
+    [{'a': 1}, {'a': 2}]
+    >>> try:
+    ...     enforce_budget(iter([{"a": 1}, {"a": 2}]), budget, expected=3)
+    ... except BudgetExceededError as error:
+    ...     print(str(error)[:52])
+    Expanding the config would generate up to 3 versions
+
+    Parameters
+    ----------
+    max_versions
+        The maximum number of versions which may be generated.
+    max_bytes
+        The maximum estimated size in bytes of all generated versions.
+    spill
+        Whether to write the versions to a temporary file instead of
+        raising an error when a limit is exceeded.
+    directory
+        The directory where temporary files are created, defaults to
+        the directory given by `tempfile.gettempdir`.
+    """
+
+    def __init__(
+        self,
+        max_versions: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        spill: bool = False,
+        directory: Optional[str] = None,
+    ):
+        self.max_versions = max_versions
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.directory = directory
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(max_versions={self.max_versions},"
+            f" max_bytes={self.max_bytes}, spill={self.spill})"
+        )
+
+
+def count_groups(node: Any) -> Tuple[int, dict]:
+    """
+    Returns the number of versions of `node` which do not belong to any
+    zip group and the lengths of the zip groups that the node contains.
+    """
+    if isinstance(node, list):
+        return combine_counts(node, list(map(count_groups, node)))
+    if isinstance(node, dict):
+        return combine_counts(
+            node,
+            [
+                count_groups(value)
+                for key, value in node.items()
+                if key not in DIRECTIVES
+            ],
+        )
+    return 1, {}
+
+
+def combine_counts(
+    node: Union[dict, list], children: List[Tuple[int, dict]]
+) -> Tuple[int, dict]:
+    """
+    Combines the results of `count_groups` for the children of `node`
+    into the result of `count_groups` for the node itself.
+    """
+    count = 1
+    for child_count, _ in children:
+        count *= child_count
+    groups = merge_with(min, *(child_groups for _, child_groups in children))
+
+    each = node.get("$each") if isinstance(node, dict) else None
+    if isinstance(each, list):
+        if "$zip" in node:
+            groups = merge_with(min, groups, {node["$zip"]: len(each)})
+        else:
+            count *= sum(map(count_versions, each))
+    return count, groups
+
+
+def total_count(count: int, groups: dict) -> int:
+    """
+    Returns the number of versions given the result of `count_groups`.
+    """
+    for length in groups.values():
+        count *= length
+    return count
+
+
+def count_versions(node: Any) -> int:
+    """
+    Estimates the number of versions which expanding `node` would generate
+    without expanding it. The estimate is exact unless the node contains
+    `$where` constraints, which are assumed to keep every version.
+
+    >>> count_versions({"a": {"$each": [1, 2, 3]}, "b": [{"$each": [1, 2]}]})
+    6
+    >>> count_versions(
+    ...     {
+    ...         "a": {"$each": [1, 2, 3], "$zip": "g"},
+    ...         "b": {"$each": [1, 2, 3], "$zip": "g"},
+    ...         "c": {"$each": [{"d": 1}, {"d": {"$each": [2, 3]}}]},
+    ...     }
+    ... )
+    9
+    """
+    return total_count(*count_groups(node))
+
+
+def sizeof(data: Any) -> int:
+    """
+    Estimates the number of bytes used by a JSON-like structure by adding
+    the sizes of all objects in it. Objects which are shared between
+    versions, such as keys, are counted once for each time they appear,
+    thus the estimate is an upper bound.
+
+    >>> sizeof({"a": [1, 2]}) > sizeof({"a": [1]})
+    True
+    """
+    size = sys.getsizeof(data)
+    if isinstance(data, Mapping):
+        for key, value in data.items():
+            size += sizeof(key) + sizeof(value)
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            size += sizeof(item)
+    return size
+
+
+def remove_file(file: IO, path: str):
+    file.close()
+    os.remove(path)
+
+
+class SpilledVersions:
+    """
+    Versions of a config which are stored in a temporary file rather than
+    in memory. The versions are pickled one after the other when they are
+    appended and unpickled one at a time when iterating.
+
+    The temporary file is removed when the object is garbage collected or
+    when `close` is called.
+
+    >>> versions = SpilledVersions()
+    >>> versions.append({"a": 1})
+    >>> versions.append({"a": 2})
+    >>> len(versions), list(versions)
+    (2, [{'a': 1}, {'a': 2}])
+    >>> versions.close()
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        descriptor, self.path = tempfile.mkstemp(
+            suffix=".versions", dir=directory
+        )
+        self._file = os.fdopen(descriptor, "wb")
+        self._length = 0
+        self._finalizer = weakref.finalize(
+            self, remove_file, self._file, self.path
+        )
+
+    def append(self, version: Any):
+        pickle.dump(version, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._length += 1
+
+    def extend(self, versions: Iterable):
+        for version in versions:
+            self.append(version)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self) -> Iterator:
+        self._file.flush()
+        with open(self.path, "rb") as spilled:
+            for _ in range(self._length):
+                yield pickle.load(spilled)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, length={len(self)})"
+
+    def close(self):
+        """
+        Removes the temporary file.
+        """
+        self._finalizer()
+
+
+def spill(
+    versions: Iterator, generated: List, budget: Budget
+) -> SpilledVersions:
+    spilled = SpilledVersions(budget.directory)
+    spilled.extend(generated)
+    generated.clear()
+    spilled.extend(versions)
+    return spilled
+
+
+def enforce_budget(
+    versions: Iterator, budget: Budget, expected: int
+) -> Union[List, SpilledVersions]:
+    """
+    Collects the `versions` into a list while making sure that the limits
+    of the `budget` are not exceeded.
+
+    Parameters
+    ----------
+    versions
+        Iterator over the versions of a config which are generated lazily.
+    budget
+        The limits which the versions have to respect.
+    expected
+        The number of versions which the config is expected to generate,
+        see `count_versions`.
+    Returns
+    -------
+    Union[List, SpilledVersions]
+        A list of the versions, or the versions written to a temporary
+        file if a limit was exceeded and `budget.spill` is set.
+    """
+    if budget.max_versions is not None and expected > budget.max_versions:
+        if budget.spill:
+            return spill(versions, [], budget)
+        raise BudgetExceededError(
+            f"Expanding the config would generate up to {expected} versions,"
+            f" the budget allows {budget.max_versions} versions."
+            " Reduce the size of the config or allow spilling the versions"
+            " to disk."
+        )
+
+    generated, size = [], 0
+    for version in versions:
+        generated.append(version)
+        if budget.max_bytes is not None:
+            size += sizeof(version)
+        if budget.max_bytes is not None and size > budget.max_bytes:
+            message = (
+                f"The versions generated so far use about {size} bytes,"
+                f" the budget allows {budget.max_bytes} bytes."
+            )
+        elif (
+            budget.max_versions is not None
+            and len(generated) > budget.max_versions
+        ):
+            message = (
+                f"More than {budget.max_versions} versions were generated,"
+                f" which is the limit of the budget."
+            )
+        else:
+            continue
+
+        if budget.spill:
+            return spill(versions, generated, budget)
+        raise BudgetExceededError(
+            f"{message} Reduce the size of the config or allow spilling the"
+            " versions to disk."
+        )
+    return generated
@@ -0,0 +1,384 @@
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from hashlib import blake2b, md5
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from runtool.datatypes import Dataset
+
+
+def scheme(uri: str) -> str:
+    """
+    Returns the scheme of a URI, where paths without a scheme are local.
+
+    >>> scheme("s3://bucket/train.json"), scheme("/data/train.json")
+    ('s3', 'file')
+    """
+    return uri.split("://", 1)[0] if "://" in uri else "file"
+
+
+class Fetcher(ABC):
+    """
+    Interface of the storages which a `DatasetCache` fetches data from.
+    """
+
+    def accepts(self, uri: str) -> bool:
+        """
+        Returns whether the data at `uri` can be fetched, e.g. `False` for
+        directories.
+        """
+        return True
+
+    @abstractmethod
+    def version(self, uri: str) -> str:
+        """
+        Returns an identifier of the current content at `uri`, such as an
+        ETag, which is cheap to obtain and changes whenever the content
+        changes.
+        """
+
+    @abstractmethod
+    def read(self, uri: str) -> Iterator[bytes]:
+        """
+        Yields the content at `uri` in chunks.
+        """
+
+
+class LocalFetcher(Fetcher):
+    """
+    Reads files from the local file system, given by their path or a
+    `file://` URI. Their version is their size and modification time.
+    """
+
+    def __init__(self, chunk_size: int = 1 << 20):
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def local_path(uri: str) -> str:
+        return uri[len("file://") :] if uri.startswith("file://") else uri
+
+    def accepts(self, uri: str) -> bool:
+        return os.path.isfile(self.local_path(uri))
+
+    def version(self, uri: str) -> str:
+        stat = os.stat(self.local_path(uri))
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def read(self, uri: str) -> Iterator[bytes]:
+        with open(self.local_path(uri), "rb") as file:
+            yield from iter(lambda: file.read(self.chunk_size), b"")
+
+
+class FakeObjectStore(Fetcher):
+    """
+    Stand-in for a remote object store such as S3, which keeps its objects
+    in memory. Each read takes `latency` seconds, and `reads` counts the
+    reads of each URI. The version of an object is the MD5 digest of its
+    content, like the ETag of an S3 object.
+
+    >>> store = FakeObjectStore({"s3://bucket/train.json": b"{}"})
+    >>> store.version("s3://bucket/train.json")
+    '99914b932bd37a50b983c5e7c90ae93b'
+    >>> b"".join(store.read("s3://bucket/train.json"))
+    b'{}'
+    """
+
+    def __init__(
+        self,
+        objects: Optional[Dict[str, bytes]] = None,
+        latency: float = 0.0,
+        chunk_size: int = 1 << 20,
+    ):
+        self.objects = dict(objects or {})
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.reads = Counter()
+
+    def put(self, uri: str, data: bytes):
+        self.objects[uri] = data
+
+    def accepts(self, uri: str) -> bool:
+        return uri in self.objects
+
+    def version(self, uri: str) -> str:
+        if uri not in self.objects:
+            raise FileNotFoundError(f"No such object: {uri}")
+        return md5(self.objects[uri]).hexdigest()
+
+    def read(self, uri: str) -> Iterator[bytes]:
+        self.reads[uri] += 1
+        time.sleep(self.latency)
+        data = self.objects[uri]
+        for start in range(0, len(data), self.chunk_size):
+            yield data[start : start + self.chunk_size]
+
+
+class DatasetCache:
+    """
+    Keeps local copies of the files of datasets, such that experiments
+    which use the same `Dataset.path` URIs read them from the local disk
+    instead of each fetching them.
+
+    The copies are content addressed: each file is stored once under the
+    hash of its content, and an index maps each URI and the version of
+    its content, see `Fetcher.version`, to the hash. Thus a URI is fetched
+    again when its content changes, and URIs with the same content share a
+    copy. Concurrent requests for the same URI wait for a single fetch.
+
+    When the copies take more than `max_bytes`, the least recently used
+    ones are deleted, except those which are currently opened with `open`.
+    The files are opened as read-only memory maps, such that trials
+    running in parallel share the pages of a file in the page cache.
+
+    The index is kept in `index.json` in `directory`, which allows reusing
+    the copies after a restart. The cache is meant to be used by a single
+    process, while any process can read the files it returns.
+
+    >>> import tempfile
+    >>> store = FakeObjectStore({"s3://bucket/train.json": b'{"target": []}'})
+    >>> cache = DatasetCache(tempfile.mkdtemp(), fetchers={"s3": store})
+    >>> with cache.open("s3://bucket/train.json") as data:
+    ...     data[:10]
+    b'{"target":'
+    >>> path = cache.path("s3://bucket/train.json")
+    >>> store.reads["s3://bucket/train.json"]
+    1
+
+    Parameters
+    ----------
+    directory
+        The directory where the copies and the index are stored.
+    max_bytes
+        The maximum size of the copies, or `None` for no limit.
+    fetchers
+        Fetchers for URIs by their scheme, such as `"s3"`, in addition to
+        a `LocalFetcher` for local paths.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: Optional[int] = None,
+        fetchers: Optional[Dict[str, Fetcher]] = None,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fetchers = {"file": LocalFetcher(), **(fetchers or {})}
+        # the version and content hash of each URI
+        self.uris: Dict[str, Tuple[str, str]] = {}
+        # the size of each copy by its hash, the least recently used first
+        self.blobs: "OrderedDict[str, int]" = OrderedDict()
+        self.size = 0
+        self.pins = Counter()
+        self.hits = self.fetches = 0
+        self._lock = threading.Lock()
+        self._fetching: Dict[Tuple[str, str], Future] = {}
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        if os.path.exists(self.index_path):
+            self.load()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest)
+
+    def load(self):
+        """
+        Reads the index from `directory`, leaving out copies which were
+        deleted.
+        """
+        with open(self.index_path) as file:
+            index = json.load(file)
+        for digest, size in index["blobs"]:
+            if os.path.exists(self.blob_path(digest)):
+                self.blobs[digest] = size
+                self.size += size
+        self.uris = {
+            uri: (version, digest)
+            for uri, version, digest in index["uris"]
+            if digest in self.blobs
+        }
+
+    def save(self):
+        """
+        Writes the index to `directory`, replacing it atomically.
+        """
+        index = {
+            "uris": [
+                [uri, version, digest]
+                for uri, (version, digest) in self.uris.items()
+            ],
+            "blobs": [[digest, size] for digest, size in self.blobs.items()],
+        }
+        descriptor, temporary = tempfile.mkstemp(
+            dir=self.directory, suffix=".tmp"
+        )
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(index, file)
+        os.replace(temporary, self.index_path)
+
+    def fetcher(self, uri: str) -> Fetcher:
+        try:
+            return self.fetchers[scheme(uri)]
+        except KeyError:
+            raise ValueError(f"No fetcher for the scheme of {uri!r}")
+
+    def accepts(self, uri: str) -> bool:
+        """
+        Returns whether `uri` can be cached.
+        """
+        return (
+            isinstance(uri, str)
+            and scheme(uri) in self.fetchers
+            and self.fetcher(uri).accepts(uri)
+        )
+
+    def path(self, uri: str) -> str:
+        """
+        Returns the path of the local copy of the file at `uri`, fetching
+        it unless the cache holds a copy of its current version. The copy
+        may be evicted later on, use `open` to keep it while reading it.
+        """
+        return self.blob_path(self.digest(uri))
+
+    def digest(self, uri: str) -> str:
+        """
+        Returns the content hash of the file at `uri`, fetching it unless
+        the cache holds a copy of its current version.
+        """
+        fetcher = self.fetcher(uri)
+        version = fetcher.version(uri)
+        with self._lock:
+            cached = self.uris.get(uri)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                self.blobs.move_to_end(cached[1])
+                return cached[1]
+            future = self._fetching.get((uri, version))
+            owner = future is None
+            if owner:
+                future = self._fetching[(uri, version)] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            digest = self.fetch(uri, version, fetcher)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(digest)
+            return digest
+        finally:
+            with self._lock:
+                del self._fetching[(uri, version)]
+
+    def fetch(self, uri: str, version: str, fetcher: Fetcher) -> str:
+        """
+        Copies the file at `uri` into the cache and returns its hash.
+        """
+        hasher, size = blake2b(digest_size=16), 0
+        descriptor, temporary = tempfile.mkstemp(
+            dir=self.directory, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                for chunk in fetcher.read(uri):
+                    hasher.update(chunk)
+                    size += file.write(chunk)
+            digest = hasher.hexdigest()
+            with self._lock:
+                # another URI may have the same content; the copy is
+                # replaced holding the lock, such that it is not evicted
+                # between being written and being added to the index
+                os.replace(temporary, self.blob_path(digest))
+                self.fetches += 1
+                if digest not in self.blobs:
+                    self.blobs[digest] = size
+                    self.size += size
+                self.blobs.move_to_end(digest)
+                self.uris[uri] = (version, digest)
+                self.evict(keep=digest)
+                self.save()
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return digest
+
+    def evict(self, keep: Optional[str] = None):
+        """
+        Deletes the least recently used copies which are not opened until
+        the copies take at most `max_bytes`. Must be called holding the
+        lock.
+        """
+        if self.max_bytes is None or self.size <= self.max_bytes:
+            return
+        evicted = set()
+        for digest, size in list(self.blobs.items()):
+            if self.size <= self.max_bytes:
+                break
+            if digest == keep or self.pins[digest]:
+                continue
+            os.remove(self.blob_path(digest))
+            del self.blobs[digest]
+            self.size -= size
+            evicted.add(digest)
+        if evicted:
+            self.uris = {
+                uri: entry
+                for uri, entry in self.uris.items()
+                if entry[1] not in evicted
+            }
+
+    @contextmanager
+    def open(self, uri: str) -> Iterator[Union[mmap.mmap, bytes]]:
+        """
+        Opens the local copy of the file at `uri` as a read-only memory
+        map, which is protected from eviction until it is closed. Empty
+        files, which cannot be mapped, are returned as `b""`.
+        """
+        while True:
+            digest = self.digest(uri)
+            with self._lock:
+                # the copy may have been evicted in the meantime
+                if digest in self.blobs:
+                    self.pins[digest] += 1
+                    break
+        try:
+            with open(self.blob_path(digest), "rb") as file:
+                if not os.fstat(file.fileno()).st_size:
+                    yield b""
+                    return
+                with mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as mapping:
+                    yield mapping
+        finally:
+            with self._lock:
+                self.pins[digest] -= 1
+                if not self.pins[digest]:
+                    del self.pins[digest]
+                size = self.size
+                self.evict()
+                if self.size != size:
+                    self.save()
+
+    def localize(self, dataset: Dataset) -> Dataset:
+        """
+        Returns a copy of `dataset` whose `path` entries refer to local
+        copies, leaving entries which cannot be cached unchanged.
+        """
+        paths = {
+            name: self.path(uri) if self.accepts(uri) else uri
+            for name, uri in dataset["path"].items()
+        }
+        return Dataset({**dataset, "path": paths})
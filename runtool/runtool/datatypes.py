@@ -1,7 +1,26 @@
-from functools import partial
-from typing import Any, List, Optional, Type, Union, Iterable
+import itertools
+from abc import ABC, abstractmethod
+from array import array
+from functools import partial, wraps
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Hashable,
+    Iterable,
+    KeysView,
+    List,
+    Optional,
+    Set,
+    Type,
+    Union,
+)
 from collections import UserDict, UserList
 
+from runtool import export, hashing
+from runtool.utils import equality_key, get_item_from_path
+
 
 class DotDict(dict):
     """
@@ -135,6 +154,21 @@ class ListNode(UserList):
         child_names = ", ".join([str(child) for child in self])
         return f"{type(self).__name__}([{child_names}])"
 
+    @classmethod
+    def from_verified(cls, data: Iterable) -> "ListNode":
+        """
+        Creates a new instance of the class from `data` without verifying it.
+        The items of `data` are stored as they are, thus they should already
+        be of the type which the class expects.
+
+        >>> algorithm = Algorithm({"image": "", "instance": ""})
+        >>> Algorithms.from_verified([algorithm])
+        Algorithms([Algorithm({'image': '', 'instance': ''})])
+        """
+        listnode = cls.__new__(cls)
+        listnode.data = list(data)
+        return listnode
+
     def __add__(self, other: Union["Node", "ListNode"]) -> Any:
         """
         Returns a new `ListNode` (or any subclass) with `other` appended to `self`.
@@ -149,27 +183,33 @@ class ListNode(UserList):
     def __mul__(self, other: Union["Node", "ListNode"]) -> "Experiments":
         """
         Calculates the cartesian product of items in
-        `self` and `other` and returns an `Experiment` object
-        with the results.
+        `self` and `other` and returns an `Experiments` object
+        with the results. The product is lazy, see `ExperimentsProduct`.
         """
         if isinstance(other, ListNode) and not isinstance(
             other, (Experiments, Experiment)
         ):
-            return Experiments(
-                [
-                    Experiment.from_nodes(node_1, node_2)
-                    for node_1 in self
-                    for node_2 in other
-                ]
-            )
+            return ExperimentsProduct.from_factors(self, other)
         elif isinstance(other, Node):
-            return Experiments(
-                [Experiment.from_nodes(item, other) for item in self]
-            )
+            return ExperimentsProduct.from_factors(self, [other])
 
         raise TypeError
 
 
+def invalidates_indexes(method: Callable) -> Callable:
+    """
+    Decorates methods which change `Experiments` objects such that the
+    indexes used by `Experiments.where` are removed when they are called.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.__dict__.pop("_indexes", None)
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class Experiments(ListNode):
     """
     The `Experiments` class contains a set of `Experiment` objects.
@@ -200,7 +240,11 @@ class Experiments(ListNode):
             raise TypeError
 
         super().__init__(
-            item if isinstance(item, Experiment) else Experiment(item)
+            (
+                item
+                if isinstance(item, Experiment)
+                else Experiment.from_verified(item)
+            )
             for item in experiments
         )
 
@@ -213,9 +257,769 @@ class Experiments(ListNode):
         """
         return data and all(map(Experiment.verify, data))
 
+    def to_jsonl(self, file) -> int:
+        """
+        Writes the experiments to `file` in the JSON Lines format,
+        one experiment at a time. See `runtool.export.write_jsonl`.
+        """
+        return export.write_jsonl(self, file)
+
+    def to_parquet(self, path, row_group_size: int = 10_000) -> int:
+        """
+        Writes the experiments to a Parquet file with one column per
+        flattened key. See `runtool.export.write_parquet`.
+        """
+        return export.write_parquet(self, path, row_group_size)
+
+    def compact(self) -> "CompactExperiments":
+        """
+        Returns the experiments as a `CompactExperiments` object.
+        """
+        return CompactExperiments(self)
+
+    def indexed(self, dedup: bool = False) -> "IndexedExperiments":
+        """
+        Returns the experiments as an `IndexedExperiments` object.
+        """
+        return IndexedExperiments(self, dedup)
+
+    def inverted_index(self, path: str) -> Dict[Hashable, Set[int]]:
+        """
+        Returns an index mapping each value found at `path` in the
+        experiments to the positions of the experiments with that value.
+        The values are stored as their `runtool.utils.equality_key`, thus
+        values which compare equal, such as `10` and `10.0`, share an entry.
+
+        The index is built the first time it is requested and kept until
+        the `Experiments` object is changed.
+
+        >>> experiments = Algorithms(
+        ...     [
+        ...         Algorithm({"image": "1", "instance": "a"}),
+        ...         Algorithm({"image": "2", "instance": "b"}),
+        ...         Algorithm({"image": "3", "instance": "a"}),
+        ...     ]
+        ... ) * Dataset({"path": {}})
+        >>> experiments.inverted_index("algorithm.instance")["a"]
+        {0, 2}
+        """
+        indexes = self.__dict__.setdefault("_indexes", {})
+        if path not in indexes:
+            index = {}
+            for position, experiment in enumerate(self):
+                try:
+                    value = get_item_from_path(experiment, path)
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+                index.setdefault(equality_key(value), set()).add(position)
+            indexes[path] = index
+        return indexes[path]
+
+    def where(self, conditions: Dict[str, Any]) -> "Experiments":
+        """
+        Returns the experiments where the value at each path in
+        `conditions` equals the value it is mapped to. The paths are
+        written as for `runtool.utils.get_item_from_path`.
+
+        >>> experiments = Algorithms(
+        ...     [
+        ...         Algorithm({"image": "1", "instance": "a"}),
+        ...         Algorithm({"image": "2", "instance": "b"}),
+        ...     ]
+        ... ) * Datasets([{"path": {}, "meta": {"freq": "H"}}])
+        >>> experiments.where({"algorithm.instance": "b"}) == Experiments(
+        ...     [
+        ...         Experiment.from_nodes(
+        ...             Algorithm({"image": "2", "instance": "b"}),
+        ...             Dataset({"path": {}, "meta": {"freq": "H"}}),
+        ...         )
+        ...     ]
+        ... )
+        True
+        >>> len(
+        ...     experiments.where(
+        ...         {"algorithm.instance": "a", "dataset.meta.freq": "D"}
+        ...     )
+        ... )
+        0
+
+        Each path is looked up in an inverted index, see `inverted_index`.
+        Thus, once the indexes have been built, the time of a query depends
+        on the number of matching experiments rather than the total
+        number of experiments. The indexes are rebuilt when experiments are
+        added or removed, but not when an experiment in the list is changed
+        in place, after which they are stale. Replace the experiment
+        instead, e.g. `experiments[0] = changed`.
+        """
+        if not conditions:
+            return Experiments.from_verified(self)
+
+        matches = sorted(
+            (
+                self.inverted_index(path).get(equality_key(value), set())
+                for path, value in conditions.items()
+            ),
+            key=len,
+        )
+        positions = set(matches[0]).intersection(*matches[1:])
+        return Experiments.from_verified(
+            self[position] for position in sorted(positions)
+        )
+
+    def __eq__(self, other) -> bool:
+        # comparing item by item rather than through `data` avoids
+        # materializing `LazyExperiments`
+        if isinstance(other, (list, UserList)):
+            return len(self) == len(other) and all(
+                this == that for this, that in zip(self, other)
+            )
+        return False
+
+    append = invalidates_indexes(UserList.append)
+    extend = invalidates_indexes(UserList.extend)
+    insert = invalidates_indexes(UserList.insert)
+    pop = invalidates_indexes(UserList.pop)
+    remove = invalidates_indexes(UserList.remove)
+    clear = invalidates_indexes(UserList.clear)
+    sort = invalidates_indexes(UserList.sort)
+    reverse = invalidates_indexes(UserList.reverse)
+    __setitem__ = invalidates_indexes(UserList.__setitem__)
+    __delitem__ = invalidates_indexes(UserList.__delitem__)
+    __iadd__ = invalidates_indexes(UserList.__iadd__)
+    __imul__ = invalidates_indexes(UserList.__imul__)
+
     __mul__ = None  # Experiments cannot be multiplied
 
 
+class LazyExperiments(Experiments, ABC):
+    """
+    Base class for `Experiments` which create their `Experiment` objects
+    when they are accessed instead of storing them.
+
+    Subclasses implement `_length` and `_get`, this class then provides
+    `len`, indexing, slicing, iteration, membership tests and comparisons
+    without creating more than one `Experiment` at a time.
+
+    Any other list operation, such as `append`, converts the object into a
+    list of `Experiment` objects which is stored from then on.
+    """
+
+    def __init__(self):
+        self._data = None
+
+    @property
+    def data(self) -> List["Experiment"]:
+        if self._data is None:
+            self._data = list(self)
+        return self._data
+
+    @data.setter
+    def data(self, value: List["Experiment"]):
+        self._data = value
+
+    @abstractmethod
+    def _length(self) -> int:
+        """
+        Returns the number of experiments.
+        """
+
+    @abstractmethod
+    def _get(self, index: int) -> "Experiment":
+        """
+        Creates the experiment at position `index`, where
+        `0 <= index < len(self)`.
+        """
+
+    def __len__(self) -> int:
+        if self._data is not None:
+            return len(self._data)
+        return self._length()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if self._data is not None:
+                return Experiments.from_verified(self._data[index])
+            return Experiments.from_verified(
+                map(self._get, range(*index.indices(len(self))))
+            )
+
+        if self._data is not None:
+            return self._data[index]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return self._get(index)
+
+    def __iter__(self):
+        if self._data is not None:
+            return iter(self._data)
+        return map(self._get, range(len(self)))
+
+    def __contains__(self, item) -> bool:
+        return any(item == experiment for experiment in self)
+
+    def copy(self) -> Experiments:
+        return Experiments.from_verified(self)
+
+
+class ExperimentsProduct(LazyExperiments):
+    """
+    An `ExperimentsProduct` is the cartesian product of two lists of nodes,
+    where the `Experiment` objects are created when they are accessed.
+    Multiplying `ListNode` and `Node` objects results in an
+    `ExperimentsProduct`. Thus, the memory used by the product is
+    proportional to the number of algorithms plus the number of datasets
+    rather than to the number of experiments.
+
+    >>> algorithms = Algorithms(
+    ...     [
+    ...         Algorithm({"image": "1", "instance": "1"}),
+    ...         Algorithm({"image": "2", "instance": "2"}),
+    ...     ]
+    ... )
+    >>> datasets = Datasets([Dataset({"path": {"1": "1"}})] * 1000)
+    >>> product = algorithms * datasets
+    >>> type(product)
+    <class 'runtool.datatypes.ExperimentsProduct'>
+    >>> len(product)
+    2000
+
+    The experiments are ordered in the same way as when iterating over
+    the first factor in an outer loop and the second factor in an inner loop.
+
+    >>> product[1000] == Experiment.from_nodes(algorithms[1], datasets[0])
+    True
+    >>> product[-1] == Experiment.from_nodes(algorithms[1], datasets[-1])
+    True
+
+    Slicing an `ExperimentsProduct` creates an `Experiments` object
+    containing the experiments within the slice.
+
+    >>> type(product[10:12]), len(product[10:12])
+    (<class 'runtool.datatypes.Experiments'>, 2)
+
+    Adding `ExperimentsProduct` objects with each other or with `Experiment`
+    and `Experiments` objects creates a new `ExperimentsProduct` which
+    concatenates the experiments without creating them.
+
+    >>> len(product + product + product[:3] + product[0])
+    4004
+    """
+
+    def __init__(self, first: Iterable, second: Iterable):
+        super().__init__()
+        # each segment is either a pair of factors or a list of experiments
+        # paired with None
+        self._segments = [(list(first), list(second))]
+
+    @classmethod
+    def from_segments(cls, segments: list) -> "ExperimentsProduct":
+        product = cls.__new__(cls)
+        LazyExperiments.__init__(product)
+        product._segments = segments
+        return product
+
+    @classmethod
+    def verify_factors(cls, first: Iterable, second: Iterable) -> bool:
+        """
+        Returns True if every item in one of the factors is a valid
+        `Algorithm` and every item in the other factor is a valid `Dataset`.
+        In that case, every item of the product is a valid `Experiment`.
+        """
+        return bool(first and second) and (
+            (
+                all(map(Algorithm.verify, first))
+                and all(map(Dataset.verify, second))
+            )
+            or (
+                all(map(Dataset.verify, first))
+                and all(map(Algorithm.verify, second))
+            )
+        )
+
+    @classmethod
+    def from_factors(cls, first: Iterable, second: Iterable) -> Experiments:
+        """
+        Returns the cartesian product of `first` and `second`.
+
+        If the factors can be verified up front, see `verify_factors`,
+        an `ExperimentsProduct` is returned. Otherwise, each pair of nodes
+        is converted into an `Experiment` immediately, which raises a
+        `TypeError` if any pair does not form a valid `Experiment`.
+        """
+        if cls.verify_factors(first, second):
+            return cls(first, second)
+        return Experiments.from_verified(
+            Experiment.from_nodes(node_1, node_2)
+            for node_1 in first
+            for node_2 in second
+        )
+
+    def segments(self) -> list:
+        """
+        Returns the segments which the experiments are generated from.
+        Each segment is either a pair of factors or a list of `Experiment`
+        objects followed by `None`.
+        """
+        if self._data is not None:
+            return [(self._data, None)]
+        return self._segments
+
+    def _segment_length(self, segment: tuple) -> int:
+        first, second = segment
+        return len(first) if second is None else len(first) * len(second)
+
+    def _length(self) -> int:
+        return sum(map(self._segment_length, self._segments))
+
+    def _get(self, index: int) -> "Experiment":
+        for segment in self._segments:
+            length = self._segment_length(segment)
+            if index < length:
+                first, second = segment
+                if second is None:
+                    return first[index]
+                outer, inner = divmod(index, len(second))
+                return Experiment.from_nodes(first[outer], second[inner])
+            index -= length
+        raise IndexError(f"{type(self).__name__} index out of range")
+
+    def __iter__(self):
+        if self._data is not None:
+            return iter(self._data)
+        return itertools.chain.from_iterable(
+            (
+                first
+                if second is None
+                else (
+                    Experiment.from_nodes(node_1, node_2)
+                    for node_1 in first
+                    for node_2 in second
+                )
+            )
+            for first, second in self._segments
+        )
+
+    def _as_segments(self, other) -> list:
+        if isinstance(other, ExperimentsProduct):
+            return other.segments()
+        elif isinstance(other, Experiments):
+            return [(list(other), None)]
+        elif isinstance(other, Experiment):
+            return [([other], None)]
+        raise TypeError
+
+    def __add__(self, other) -> "ExperimentsProduct":
+        return self.from_segments(self.segments() + self._as_segments(other))
+
+    def __radd__(self, other) -> "ExperimentsProduct":
+        return self.from_segments(self._as_segments(other) + self.segments())
+
+
+class NodeTable:
+    """
+    A `NodeTable` stores distinct nodes and identifies them by their index.
+    Nodes which are equal in structure are only stored once.
+
+    >>> table = NodeTable()
+    >>> table.index({"a": 1}), table.index({"a": 2}), table.index({"a": 1})
+    (0, 1, 0)
+    >>> table.values
+    [{'a': 1}, {'a': 2}]
+    """
+
+    __slots__ = ("values", "_by_identity", "_by_digest")
+
+    def __init__(self):
+        self.values = []
+        # only nodes stored in `values` are looked up by identity as these
+        # are kept alive by the table and thus their `id` cannot be reused
+        self._by_identity = {}
+        self._by_digest = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def index(self, node: dict) -> int:
+        """
+        Returns the index of `node` in the table, adding it if needed.
+        """
+        index = self._by_identity.get(id(node))
+        if index is not None:
+            return index
+
+        key = hashing.digest(node)
+        index = self._by_digest.get(key)
+        if index is None:
+            index = self._by_digest[key] = len(self.values)
+            self._by_identity[id(node)] = index
+            self.values.append(node)
+        return index
+
+
+class CompactExperiments(LazyExperiments):
+    """
+    `CompactExperiments` store each `Experiment` as integer indices into
+    tables of distinct algorithms and datasets. The indices are kept in
+    `array.array` columns, thus a large grid of experiments only costs a few
+    bytes per experiment in addition to the distinct algorithms and datasets.
+
+    >>> algorithms = Algorithms(
+    ...     [{"image": str(index), "instance": ""} for index in range(10)]
+    ... )
+    >>> datasets = Datasets(
+    ...     [{"path": {"train": str(index)}} for index in range(100)]
+    ... )
+    >>> experiments = CompactExperiments(algorithms * datasets)
+    >>> len(experiments)
+    1000
+    >>> len(experiments.algorithms), len(experiments.datasets)
+    (10, 100)
+
+    Accessing an item creates an `Experiment` from the tables.
+
+    >>> experiments[101] == Experiment.from_nodes(algorithms[1], datasets[1])
+    True
+
+    Slices of `CompactExperiments` share the tables of the original object.
+
+    >>> experiments[:200].algorithms is experiments.algorithms
+    True
+
+    Experiments are deduplicated by their structure when they are added.
+
+    >>> copied = CompactExperiments(
+    ...     Experiment.from_nodes(dict(algorithms[0]), dict(datasets[0]))
+    ...     for _ in range(10)
+    ... )
+    >>> len(copied), len(copied.algorithms), len(copied.datasets)
+    (10, 1, 1)
+    """
+
+    # typecode of the index columns
+    typecode = "I"
+
+    def __init__(self, experiments: Iterable = ()):
+        super().__init__()
+        self.algorithms = NodeTable()
+        self.datasets = NodeTable()
+        # any items of an experiment other than the algorithm and the dataset
+        self.others = NodeTable()
+        self._columns = tuple(array(self.typecode) for _ in range(3))
+        self.extend(experiments)
+
+    def _tables(self) -> tuple:
+        return self.algorithms, self.datasets, self.others
+
+    def _length(self) -> int:
+        return len(self._columns[0])
+
+    def _get(self, index: int) -> "Experiment":
+        algorithm, dataset, others = (
+            table.values[column[index]]
+            for table, column in zip(self._tables(), self._columns)
+        )
+        return Experiment.from_verified(
+            {"algorithm": algorithm, "dataset": dataset, **others}
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) and self._data is None:
+            compact = type(self).__new__(type(self))
+            LazyExperiments.__init__(compact)
+            compact.algorithms, compact.datasets, compact.others = (
+                self._tables()
+            )
+            compact._columns = tuple(column[index] for column in self._columns)
+            return compact
+        return super().__getitem__(index)
+
+    @invalidates_indexes
+    def append(self, experiment: dict):
+        if not isinstance(experiment, Experiment):
+            if not Experiment.verify(experiment):
+                raise TypeError(
+                    "An Experiment requires a dict containing a valid "
+                    f"Dataset and an Algorithm, got: {experiment}"
+                )
+        if self._data is not None:
+            self._data.append(Experiment.from_verified(experiment))
+            return
+
+        others = {
+            key: value
+            for key, value in experiment.items()
+            if key not in ("algorithm", "dataset")
+        }
+        for table, column, node in zip(
+            self._tables(),
+            self._columns,
+            (experiment["algorithm"], experiment["dataset"], others),
+        ):
+            column.append(table.index(node))
+
+    @invalidates_indexes
+    def extend(self, experiments: Iterable):
+        for experiment in experiments:
+            self.append(experiment)
+
+    def __add__(self, other) -> "CompactExperiments":
+        if isinstance(other, Experiment):
+            other = [other]
+        elif not isinstance(other, Experiments):
+            raise TypeError
+        return type(self)(itertools.chain(self, other))
+
+
+class IndexedExperiments(Experiments):
+    """
+    `IndexedExperiments` keep an index of the canonical hashes of their
+    experiments, see `runtool.hashing`. This makes membership tests and
+    set operations independent of the number of experiments.
+
+    >>> algorithms = Algorithms(
+    ...     [{"image": str(index), "instance": ""} for index in range(3)]
+    ... )
+    >>> dataset = Dataset({"path": {}})
+    >>> experiments = IndexedExperiments(algorithms[:2] * dataset)
+    >>> Experiment.from_nodes(algorithms[1], dataset) in experiments
+    True
+
+    Experiments are compared by their content, thus plain dictionaries with
+    the same content as an experiment are members as well.
+
+    >>> {
+    ...     "dataset": {"path": {}},
+    ...     "algorithm": {"instance": "", "image": "1"},
+    ... } in experiments
+    True
+
+    If `dedup` is set, experiments which are already in the
+    `IndexedExperiments` are ignored when they are added.
+
+    >>> len(IndexedExperiments(experiments + experiments, dedup=True))
+    2
+
+    `IndexedExperiments` support the set operations union, intersection
+    and difference with other `Experiments`. The order of the experiments
+    is kept and the result is an `IndexedExperiments` object.
+
+    >>> others = algorithms[1:] * dataset
+    >>> [item["algorithm"]["image"] for item in experiments | others]
+    ['0', '1', '2']
+    >>> [item["algorithm"]["image"] for item in experiments & others]
+    ['1']
+    >>> [item["algorithm"]["image"] for item in experiments - others]
+    ['0']
+
+    NOTE::
+        Changing an experiment in place after it has been added does not
+        update the index.
+    """
+
+    def __init__(self, experiments: Iterable = (), dedup: bool = False):
+        self.data = []
+        self.dedup = dedup
+        # the key of each experiment in `data`, see `key`
+        self._keys = []
+        # maps each key to the number of experiments with that key
+        self._counts = {}
+        self.extend(experiments)
+
+    @staticmethod
+    def key(experiment: dict) -> bytes:
+        """
+        Returns the key which an experiment is indexed by.
+        """
+        return hashing.digest(experiment)
+
+    @staticmethod
+    def as_experiment(experiment: dict) -> "Experiment":
+        if isinstance(experiment, Experiment):
+            return experiment
+        if not Experiment.verify(experiment):
+            raise TypeError(
+                "An Experiment requires a dict containing a valid "
+                f"Dataset and an Algorithm, got: {experiment}"
+            )
+        return Experiment.from_verified(experiment)
+
+    def _pairs(self) -> Iterable:
+        return zip(self.data, self._keys)
+
+    @staticmethod
+    def _pairs_of(other: Iterable) -> Iterable:
+        if isinstance(other, IndexedExperiments):
+            return other._pairs()
+        if isinstance(other, Experiment):
+            other = [other]
+        return (
+            (experiment, IndexedExperiments.key(experiment))
+            for experiment in map(IndexedExperiments.as_experiment, other)
+        )
+
+    @staticmethod
+    def _keys_of(other: Iterable) -> Collection:
+        if isinstance(other, IndexedExperiments):
+            return other._counts
+        return {key for _, key in IndexedExperiments._pairs_of(other)}
+
+    def _from_pairs(self, pairs: Iterable) -> "IndexedExperiments":
+        result = type(self)(dedup=self.dedup)
+        result._extend_pairs(pairs)
+        return result
+
+    def _extend_pairs(self, pairs: Iterable):
+        for experiment, key in pairs:
+            count = self._counts.get(key, 0)
+            if not (count and self.dedup):
+                self._counts[key] = count + 1
+                self._keys.append(key)
+                self.data.append(experiment)
+
+    def _remove_key(self, key: bytes):
+        count = self._counts[key] - 1
+        if count:
+            self._counts[key] = count
+        else:
+            del self._counts[key]
+
+    def _reindex(self):
+        data = self.data
+        self.data, self._keys, self._counts = [], [], {}
+        self.extend(data)
+
+    def keys(self) -> KeysView:
+        """
+        Returns the distinct keys of the experiments, see `key`.
+        """
+        return self._counts.keys()
+
+    @invalidates_indexes
+    def append(self, experiment: dict):
+        self._extend_pairs(self._pairs_of([experiment]))
+
+    @invalidates_indexes
+    def extend(self, experiments: Iterable):
+        self._extend_pairs(self._pairs_of(experiments))
+
+    @invalidates_indexes
+    def insert(self, index: int, experiment: dict):
+        experiment = self.as_experiment(experiment)
+        key = self.key(experiment)
+        count = self._counts.get(key, 0)
+        if not (count and self.dedup):
+            self._counts[key] = count + 1
+            self._keys.insert(index, key)
+            self.data.insert(index, experiment)
+
+    @invalidates_indexes
+    def pop(self, index: int = -1) -> "Experiment":
+        self._remove_key(self._keys.pop(index))
+        return self.data.pop(index)
+
+    @invalidates_indexes
+    def remove(self, experiment: dict):
+        self.pop(self.data.index(experiment))
+
+    @invalidates_indexes
+    def clear(self):
+        self.data.clear()
+        self._keys.clear()
+        self._counts.clear()
+
+    @invalidates_indexes
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self.data[index] = map(self.as_experiment, value)
+        else:
+            self.data[index] = self.as_experiment(value)
+        self._reindex()
+
+    @invalidates_indexes
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            del self.data[index]
+            self._reindex()
+        else:
+            self.pop(index)
+
+    @invalidates_indexes
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    @invalidates_indexes
+    def sort(self, *args, **kwargs):
+        self.data.sort(*args, **kwargs)
+        self._reindex()
+
+    @invalidates_indexes
+    def reverse(self):
+        self.data.reverse()
+        self._keys.reverse()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._from_pairs(zip(self.data[index], self._keys[index]))
+        return self.data[index]
+
+    def __contains__(self, experiment) -> bool:
+        try:
+            return self.key(experiment) in self._counts
+        except TypeError:
+            return False
+
+    def count(self, experiment) -> int:
+        try:
+            return self._counts.get(self.key(experiment), 0)
+        except TypeError:
+            return 0
+
+    def copy(self) -> "IndexedExperiments":
+        return self._from_pairs(self._pairs())
+
+    def __add__(self, other) -> "IndexedExperiments":
+        if not isinstance(other, (Experiments, Experiment)):
+            raise TypeError
+        result = self.copy()
+        result._extend_pairs(self._pairs_of(other))
+        return result
+
+    def __or__(self, other: Iterable) -> "IndexedExperiments":
+        result = self.copy()
+        keys = set(self._counts)
+        for experiment, key in self._pairs_of(other):
+            if key not in keys:
+                keys.add(key)
+                result._extend_pairs([(experiment, key)])
+        return result
+
+    def __and__(self, other: Iterable) -> "IndexedExperiments":
+        keys = self._keys_of(other)
+        return self._from_pairs(
+            (experiment, key)
+            for experiment, key in self._pairs()
+            if key in keys
+        )
+
+    def __sub__(self, other: Iterable) -> "IndexedExperiments":
+        keys = self._keys_of(other)
+        return self._from_pairs(
+            (experiment, key)
+            for experiment, key in self._pairs()
+            if key not in keys
+        )
+
+    def __mul__(self, other):
+        # like `Experiments`, IndexedExperiments cannot be repeated
+        raise TypeError("IndexedExperiments cannot be multiplied")
+
+    __rmul__ = __imul__ = __mul__
+
+
 class Datasets(ListNode):
     """
     The Datasets class contains a set of `Dataset` objects.
@@ -285,7 +1089,7 @@ class Datasets(ListNode):
     def __init__(self, iterable: Iterable):
         if not self.verify(iterable):
             raise TypeError
-        super().__init__(map(Dataset, iterable))
+        super().__init__(map(Dataset.from_verified, iterable))
 
     @classmethod
     def verify(cls, data: Iterable) -> bool:
@@ -366,7 +1170,7 @@ class Algorithms(ListNode):
         if not self.verify(data):
             raise TypeError
 
-        super().__init__(map(Algorithm, data))
+        super().__init__(map(Algorithm.from_verified, data))
 
     @classmethod
     def verify(cls, data: Iterable) -> bool:
@@ -415,20 +1219,56 @@ class Node(UserDict):
     # This variable determines what datatype __add__ returns
     result_type: Iterable = ListNode
 
+    # The digest of the node is cached here by `runtool.hashing.digest`
+    _digest: Optional[tuple] = None
+
+    def __setitem__(self, key, value):
+        self._digest = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._digest = None
+        super().__delitem__(key)
+
+    def canonical_hash(self) -> str:
+        """
+        Returns a hash of the content of the node which does not depend on
+        the order of its keys, see `runtool.hashing.canonical_hash`.
+
+        >>> Node({"a": 1, "b": 2}).canonical_hash() == (
+        ...     Node({"b": 2, "a": 1}).canonical_hash()
+        ... )
+        True
+        """
+        return hashing.canonical_hash(self)
+
     def __repr__(self) -> str:
         return f"{type(self).__name__}({dict(self)})"
 
+    @classmethod
+    def from_verified(cls, data: dict) -> "Node":
+        """
+        Creates a new instance of the class from `data` without calling
+        `verify`. This should only be used when `data` is already known
+        to have the structure required by the class.
+
+        >>> Algorithm.from_verified({"image": "", "instance": ""})
+        Algorithm({'image': '', 'instance': ''})
+        """
+        node = cls.__new__(cls)
+        node.data = dict(data)
+        return node
+
     def __mul__(self, other) -> "Experiments":
         """
         Calculates the cartesian product combining a `Node` with a `Node` or `ListNode`
         and returns an `Experiments` object containing the result.
+        The product is lazy, see `ExperimentsProduct`.
         """
         if isinstance(other, Node):
-            return Experiments([Experiment.from_nodes(self, other)])
-        if isinstance(other, ListNode):
-            return Experiments(
-                [Experiment.from_nodes(self, item) for item in other]
-            )
+            return ExperimentsProduct.from_factors([self], [other])
+        if isinstance(other, ListNode) and not isinstance(other, Experiments):
+            return ExperimentsProduct.from_factors([self], other)
 
         raise TypeError(f"Unable to multiply {type(self)} with {type(other)}")
 
@@ -641,7 +1481,30 @@ class Experiment(Node):
         Given two dictionaries tries to generate an Experiment object.
         If not exactly one node is a valid Dataset and one exactly node
         is a valid Algorithm this raises a TypeError.
+
+        If the nodes are `Algorithm` and `Dataset` objects, their structure
+        has already been verified. The Experiment is then created directly
+        from the types of the nodes, regardless of their order.
+
+        >>> algorithm = Algorithm({"image": "", "instance": ""})
+        >>> dataset = Dataset({"path": {}})
+        >>> experiment = Experiment.from_nodes(dataset, algorithm)
+        >>> experiment["algorithm"] is algorithm
+        True
+
+        Any other dictionaries are verified before the Experiment is created.
+
+        >>> experiment = Experiment.from_nodes(
+        ...     {"path": {}}, {"image": "", "instance": ""}
+        ... )
+        >>> experiment["dataset"]
+        {'path': {}}
         """
+        if isinstance(node_1, Algorithm) and isinstance(node_2, Dataset):
+            return cls.from_verified({"algorithm": node_1, "dataset": node_2})
+        if isinstance(node_1, Dataset) and isinstance(node_2, Algorithm):
+            return cls.from_verified({"algorithm": node_2, "dataset": node_1})
+
         try:
             return cls({"algorithm": node_1, "dataset": node_2})
         except TypeError:
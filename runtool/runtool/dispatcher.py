@@ -0,0 +1,286 @@
+import asyncio
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+from runtool.datatypes import Experiment
+
+
+class ThrottlingError(Exception):
+    """
+    Raised by a `Backend` when it rejects a submission because a quota was
+    exceeded. `retry_after` is the number of seconds after which the
+    backend expects the submission to succeed, if it is known.
+    """
+
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Backend(ABC):
+    """
+    Interface of the services which training jobs are submitted to by a
+    `Dispatcher`, for example SageMaker. Implementations raise a
+    `ThrottlingError` when a submission is rejected due to a quota, such
+    that it is retried after a while.
+    """
+
+    @abstractmethod
+    async def submit(self, experiment: Experiment) -> str:
+        """
+        Submits a training job for the experiment and returns its id.
+        """
+
+
+class TokenBucket:
+    """
+    Rate limiter which allows `rate` acquisitions per second on average and
+    bursts of up to `capacity` acquisitions. The bucket starts full.
+
+    >>> now = [0.0]
+    >>> bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    >>> bucket.try_acquire(), bucket.try_acquire(), bucket.try_acquire()
+    (0.0, 0.0, 0.5)
+    >>> now[0] = 0.5
+    >>> bucket.try_acquire()
+    0.0
+
+    Parameters
+    ----------
+    rate
+        The number of tokens which are added to the bucket per second.
+    capacity
+        The maximum number of tokens in the bucket, defaults to `rate`
+        but at least one.
+    clock
+        Returns the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError(f"rate needs to be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def try_acquire(self) -> float:
+        """
+        Takes a token if one is available and returns 0, otherwise returns
+        the number of seconds until the next token is available.
+        """
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        """
+        Waits until a token is available and takes it.
+        """
+        delay = self.try_acquire()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.try_acquire()
+
+
+class Submission(NamedTuple):
+    """
+    The outcome of submitting an experiment with a `Dispatcher`. Either
+    `job_id` is set or, if the submission failed, `error` is. `attempts`
+    is the number of times the experiment was submitted.
+    """
+
+    experiment: Experiment
+    job_id: Optional[str]
+    error: Optional[Exception]
+    attempts: int
+
+
+class Dispatcher:
+    """
+    Submits experiments to a `Backend` concurrently using asyncio. The
+    submissions are limited by a `TokenBucket` to `rate` submissions per
+    second, and at most `max_in_flight` submissions are awaited at the same
+    time. Submissions which the backend throttles are retried with
+    exponential backoff and jitter, waiting for `retry_after` instead if
+    the backend provides it.
+
+    >>> backend = FakeBackend()
+    >>> dispatcher = Dispatcher(backend, rate=1000, max_in_flight=4)
+    >>> submissions = dispatcher.submit_all(
+    ...     [{"algorithm": {"name": name}} for name in "abc"]
+    ... )
+    >>> [submission.job_id for submission in submissions]
+    ['job-0', 'job-1', 'job-2']
+
+    Parameters
+    ----------
+    backend
+        The service which the experiments are submitted to.
+    rate
+        The average number of submissions per second.
+    burst
+        The number of submissions which may be made at once before `rate`
+        applies, defaults to `rate`.
+    max_in_flight
+        The maximum number of submissions which are awaited at once.
+    max_attempts
+        The number of times a throttled experiment is submitted before
+        giving up.
+    backoff
+        The delay in seconds before the first retry, which doubles with
+        each further retry.
+    max_backoff
+        The largest delay in seconds between two attempts.
+    seed
+        Seed of the random jitter of the backoff.
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        rate: float,
+        burst: Optional[float] = None,
+        max_in_flight: int = 16,
+        max_attempts: int = 8,
+        backoff: float = 0.1,
+        max_backoff: float = 30.0,
+        seed: Optional[int] = None,
+    ):
+        if max_in_flight < 1 or max_attempts < 1:
+            raise ValueError(
+                "max_in_flight and max_attempts need to be at least 1"
+            )
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.random = random.Random(seed)
+
+    def delay(self, attempt: int, error: ThrottlingError) -> float:
+        """
+        Returns the number of seconds to wait before retrying a submission
+        which was throttled `attempt` times.
+        """
+        if error.retry_after is not None:
+            return error.retry_after
+        ceiling = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return self.random.uniform(0, ceiling)
+
+    async def submit(
+        self, experiment: Experiment, bucket: TokenBucket
+    ) -> Submission:
+        """
+        Submits a single experiment, retrying it while it is throttled.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            await bucket.acquire()
+            try:
+                job_id = await self.backend.submit(experiment)
+            except ThrottlingError as error:
+                if attempt == self.max_attempts:
+                    return Submission(experiment, None, error, attempt)
+                await asyncio.sleep(self.delay(attempt, error))
+            except Exception as error:
+                return Submission(experiment, None, error, attempt)
+            else:
+                return Submission(experiment, job_id, None, attempt)
+
+    async def dispatch(
+        self, experiments: Iterable[Experiment]
+    ) -> List[Submission]:
+        """
+        Submits the experiments and returns a `Submission` for each of
+        them, in the same order as the experiments.
+        """
+        experiments = list(experiments)
+        bucket = TokenBucket(self.rate, self.burst)
+        submissions = [None] * len(experiments)
+        queue = iter(enumerate(experiments))
+
+        # a fixed number of workers bounds the submissions in flight
+        # without creating a task for each experiment up front
+        async def worker():
+            for index, experiment in queue:
+                submissions[index] = await self.submit(experiment, bucket)
+
+        await asyncio.gather(
+            *(
+                worker()
+                for _ in range(min(self.max_in_flight, len(experiments)))
+            )
+        )
+        return submissions
+
+    def submit_all(
+        self, experiments: Iterable[Experiment]
+    ) -> List[Submission]:
+        """
+        Runs `dispatch` in a new event loop, for use outside of asyncio.
+        """
+        return asyncio.run(self.dispatch(experiments))
+
+
+class FakeBackend(Backend):
+    """
+    Stand-in for a remote training service, which accepts up to `quota`
+    submissions per second and throttles any further submissions. Each
+    submission takes `latency` seconds. The submitted experiments are kept
+    in `submitted`, and `throttled` counts the rejected submissions.
+
+    >>> backend = FakeBackend(quota=1, burst=1)
+    >>> asyncio.run(backend.submit({"algorithm": {}}))
+    'job-0'
+    >>> try:
+    ...     asyncio.run(backend.submit({"algorithm": {}}))
+    ... except ThrottlingError as error:
+    ...     print(error)
+    Rate exceeded
+    """
+
+    def __init__(
+        self,
+        quota: float = float("inf"),
+        burst: Optional[float] = None,
+        latency: float = 0.0,
+        retry_after: Optional[float] = None,
+    ):
+        self.bucket = (
+            TokenBucket(quota, burst) if quota != float("inf") else None
+        )
+        self.latency = latency
+        self.retry_after = retry_after
+        self.submitted = []
+        self.throttled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def submit(self, experiment: Experiment) -> str:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.bucket is not None and self.bucket.try_acquire() > 0:
+                self.throttled += 1
+                raise ThrottlingError("Rate exceeded", self.retry_after)
+            self.submitted.append(experiment)
+            return f"job-{len(self.submitted) - 1}"
+        finally:
+            self.in_flight -= 1
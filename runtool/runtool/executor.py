@@ -0,0 +1,311 @@
+import heapq
+import math
+import os
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from runtool.datatypes import Experiment
+from runtool.runners import Runner
+from runtool.utils import get_item_from_path
+
+
+class Run(NamedTuple):
+    """
+    The outcome of running an experiment with an `Executor`. Either `log`
+    is set or, if the runner raised an exception, `error` is. The times
+    are given by `time.monotonic`, where `submitted` is the time the
+    experiment was handed to a thread of the executor.
+    """
+
+    experiment: Experiment
+    log: Optional[str]
+    error: Optional[Exception]
+    submitted: float
+    started: float
+    finished: float
+
+    @property
+    def latency(self) -> float:
+        """
+        The number of seconds the experiment was running.
+        """
+        return self.finished - self.started
+
+    @property
+    def waited(self) -> float:
+        """
+        The number of seconds the experiment waited for a thread after it
+        was submitted.
+        """
+        return self.started - self.submitted
+
+
+class Stats(NamedTuple):
+    """
+    Throughput and latency of the runs of an `Executor`, see `summarize`.
+    """
+
+    runs: int
+    failures: int
+    wall_time: float
+    throughput: float
+    latency_mean: float
+    latency_p50: float
+    latency_p95: float
+    latency_max: float
+    max_in_flight: int
+    per_instance: Dict[str, int]
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """
+    Returns the value below which `fraction` of the sorted values lie.
+
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 0.5)
+    3.0
+    >>> percentile([], 0.5)
+    0.0
+    """
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(
+    runs: List[Run],
+    wall_time: float,
+    max_in_flight: int = 0,
+    instance_path: str = "algorithm.instance",
+) -> Stats:
+    """
+    Computes the throughput, in runs per second, and the latency of `runs`
+    which took `wall_time` seconds in total.
+
+    >>> runs = [
+    ...     Run({"algorithm": {"instance": "a"}}, "", None, 0, 0, 1),
+    ...     Run({"algorithm": {"instance": "b"}}, None, ValueError(), 0, 1, 3),
+    ... ]
+    >>> stats = summarize(runs, wall_time=2.0)
+    >>> stats.throughput, stats.failures, stats.latency_mean
+    (1.0, 1, 1.5)
+    >>> stats.per_instance
+    {'a': 1, 'b': 1}
+    """
+    latencies = sorted(run.latency for run in runs)
+    return Stats(
+        runs=len(runs),
+        failures=sum(run.error is not None for run in runs),
+        wall_time=wall_time,
+        throughput=len(runs) / wall_time if wall_time > 0 else 0.0,
+        latency_mean=sum(latencies) / len(latencies) if latencies else 0.0,
+        latency_p50=percentile(latencies, 0.5),
+        latency_p95=percentile(latencies, 0.95),
+        latency_max=latencies[-1] if latencies else 0.0,
+        max_in_flight=max_in_flight,
+        per_instance=dict(
+            Counter(
+                get_item_from_path(run.experiment, instance_path)
+                for run in runs
+            )
+        ),
+    )
+
+
+def timed_run(runner: Runner, experiment: Experiment, submitted: float) -> Run:
+    started = time.monotonic()
+    try:
+        log, error = runner.run(experiment), None
+    except Exception as exception:
+        log, error = None, exception
+    return Run(experiment, log, error, submitted, started, time.monotonic())
+
+
+class Executor(Runner):
+    """
+    Runs experiments locally through a `runtool.runners.Runner` while
+    bounding how many experiments run at the same time, both in total and
+    per instance type of the algorithms. This allows to, for example, train
+    on a machine with a single GPU while running CPU-only experiments next
+    to it.
+
+    Each experiment is run by `runner.run` in a thread of the executor, thus
+    the runner should release the GIL while waiting, as the
+    `runtool.runners.ProcessPoolRunner` and the
+    `runtool.runners.SubprocessRunner` do. Experiments are started in the
+    order they are given in whenever a slot for their instance type is
+    free; an experiment waiting for a busy instance type does not hold
+    back experiments of other instance types.
+
+    An `Executor` is a `Runner` itself, such that it can be passed to
+    `runtool.scheduler.successive_halving` and the like.
+
+    >>> from runtool.datatypes import Algorithms, Dataset
+    >>> from runtool.runners import LocalRunner
+    >>> experiments = Algorithms(
+    ...     [
+    ...         {"image": str(index), "instance": instance}
+    ...         for index, instance in enumerate(["gpu", "gpu", "cpu"])
+    ...     ]
+    ... ) * Dataset({"path": {}})
+    >>> executor = Executor(
+    ...     LocalRunner(lambda experiment: experiment["algorithm"]["image"]),
+    ...     concurrency=2,
+    ...     slots={"gpu": 1},
+    ... )
+    >>> [run.log for run in executor.execute(experiments)]
+    ['0', '1', '2']
+    >>> executor.stats.runs, executor.stats.per_instance
+    (3, {'gpu': 2, 'cpu': 1})
+
+    Parameters
+    ----------
+    runner
+        Runs a single experiment.
+    concurrency
+        The maximum number of experiments which run at the same time,
+        defaults to the number of CPUs.
+    slots
+        The maximum number of experiments which run at the same time for
+        each instance type. Instance types which are missing are only
+        bounded by `concurrency`.
+    instance_path
+        The path of the instance type in each experiment, see
+        `runtool.utils.get_item_from_path`.
+    """
+
+    def __init__(
+        self,
+        runner: Runner,
+        concurrency: Optional[int] = None,
+        slots: Optional[Dict[str, int]] = None,
+        instance_path: str = "algorithm.instance",
+    ):
+        self.runner = runner
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.slots = dict(slots or {})
+        self.instance_path = instance_path
+        self.stats = None
+        if self.concurrency < 1 or any(
+            limit < 1 for limit in self.slots.values()
+        ):
+            raise ValueError("concurrency and slots need to be at least 1")
+
+    def execute(
+        self,
+        experiments: Iterable[Experiment],
+        on_start: Optional[Callable[[int], None]] = None,
+        on_finish: Optional[Callable[[int, Run], None]] = None,
+        lookahead: Optional[int] = None,
+    ) -> List[Run]:
+        """
+        Runs the experiments and returns a `Run` for each of them, in the
+        same order as the experiments. Exceptions raised by the runner are
+        recorded in the runs rather than raised. Afterwards `stats` holds
+        the `Stats` of the execution.
+
+        `on_start` is called with the index of each experiment when it is
+        started and `on_finish` with its index and `Run` when it finished.
+        Both are called from the thread which called `execute`.
+
+        If `lookahead` is given, at most this many experiments which have
+        not been started yet are read from `experiments`, and the next
+        ones are read as experiments are started. Thus a long iterator of
+        experiments is consumed lazily while all slots are kept busy.
+        Otherwise all experiments are read up front.
+        """
+        # experiments waiting for a slot, queued by instance type; the
+        # heads of the queues are started in the order of their indices
+        queues = defaultdict(deque)
+        # the experiments which were read but not started, by index
+        waiting = {}
+        window = math.inf if lookahead is None else max(lookahead, 1)
+        source = enumerate(experiments)
+
+        runs = []
+        in_use = Counter()
+        running = {}
+        max_in_flight = 0
+        start = time.monotonic()
+
+        def read():
+            # reads experiments until `window` of them are waiting
+            while len(waiting) < window:
+                item = next(source, None)
+                if item is None:
+                    return
+                index, experiment = item
+                instance = get_item_from_path(experiment, self.instance_path)
+                queues[instance].append(index)
+                waiting[index] = experiment
+                runs.append(None)
+
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            read()
+            while queues or running:
+                # starting experiments makes room for reading more of them,
+                # which may in turn be started right away
+                started = True
+                while started and len(running) < self.concurrency:
+                    started = False
+                    heads = [
+                        (queue[0], instance)
+                        for instance, queue in queues.items()
+                        if in_use[instance]
+                        < self.slots.get(instance, math.inf)
+                    ]
+                    heapq.heapify(heads)
+                    while heads and len(running) < self.concurrency:
+                        index, instance = heapq.heappop(heads)
+                        queue = queues[instance]
+                        queue.popleft()
+                        in_use[instance] += 1
+                        future = pool.submit(
+                            timed_run,
+                            self.runner,
+                            waiting.pop(index),
+                            time.monotonic(),
+                        )
+                        running[future] = index, instance
+                        started = True
+                        if on_start is not None:
+                            on_start(index)
+                        if not queue:
+                            del queues[instance]
+                        elif in_use[instance] < self.slots.get(
+                            instance, math.inf
+                        ):
+                            heapq.heappush(heads, (queue[0], instance))
+                    read()
+                max_in_flight = max(max_in_flight, len(running))
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, instance = running.pop(future)
+                    in_use[instance] -= 1
+                    runs[index] = future.result()
+                    if on_finish is not None:
+                        on_finish(index, runs[index])
+
+        self.stats = summarize(
+            runs, time.monotonic() - start, max_in_flight, self.instance_path
+        )
+        return runs
+
+    def run(self, experiment: Experiment) -> str:
+        (result,) = self.execute([experiment])
+        if result.error is not None:
+            raise result.error
+        return result.log
+
+    def run_many(self, experiments: Iterable[Experiment]) -> List[str]:
+        """
+        Runs the experiments concurrently and returns their logs. The log
+        of an experiment whose runner raised an exception is empty, such
+        that none of its metrics are found.
+        """
+        return [
+            "" if run.error is not None else run.log
+            for run in self.execute(experiments)
+        ]
@@ -0,0 +1,182 @@
+import json
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Iterable, Union
+
+from toolz import partition_all
+
+from runtool.recurse_config import Versions
+from runtool.utils import flatten
+
+
+def encode(value: Any) -> Any:
+    """
+    Converts objects which the `json` module cannot serialize, such as
+    `runtool.datatypes.Node` objects, into lists and dictionaries.
+
+    >>> from runtool.datatypes import Algorithm
+    >>> json.dumps(
+    ...     {"algorithm": Algorithm({"image": "", "instance": ""})},
+    ...     default=encode,
+    ... )
+    '{"algorithm": {"image": "", "instance": ""}}'
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    elif isinstance(value, Versions):
+        return list(value)
+    raise TypeError(
+        f"Object of type {type(value).__name__} is not JSON serializable"
+    )
+
+
+@contextmanager
+def open_file(file: Union[str, Path, IO], mode: str):
+    """
+    Opens `file` if it is a path, otherwise the file object is used as is.
+    """
+    if isinstance(file, (str, Path)):
+        with open(file, mode) as opened:
+            yield opened
+    else:
+        yield file
+
+
+def write_jsonl(items: Iterable[dict], file: Union[str, Path, IO]) -> int:
+    """
+    Writes each item as a JSON object on a separate line of `file`.
+    The items are written one at a time, thus lazy collections such as
+    `runtool.datatypes.ExperimentsProduct` are never held in memory.
+
+    >>> import io
+    >>> file = io.StringIO()
+    >>> write_jsonl([{"a": 1}, {"a": {"b": 2}}], file)
+    2
+    >>> print(file.getvalue(), end="")
+    {"a": 1}
+    {"a": {"b": 2}}
+
+    Parameters
+    ----------
+    items
+        The dictionaries which should be written.
+    file
+        A path or a file object opened for writing text.
+    Returns
+    -------
+    int
+        The number of items written.
+    """
+    count = 0
+    with open_file(file, "w") as output:
+        for item in items:
+            output.write(json.dumps(item, default=encode))
+            output.write("\n")
+            count += 1
+    return count
+
+
+def column_type(values: set) -> str:
+    """
+    Returns the name of the type used for a column given the python types
+    of the values in the column. Columns with a single type of scalar values
+    keep their type, integers mixed with floats become floats and
+    anything else is stored as JSON.
+
+    >>> column_type({int}), column_type({int, float}), column_type({str, int})
+    ('int', 'float', 'json')
+    """
+    values = values - {type(None)}
+    if values == {int, float}:
+        return "float"
+    if len(values) == 1:
+        (value,) = values
+        if value in (bool, int, float, str):
+            return value.__name__
+    return "json"
+
+
+def write_parquet(
+    items: Iterable[dict],
+    path: Union[str, Path],
+    row_group_size: int = 10_000,
+) -> int:
+    """
+    Writes the items into a Parquet file where each item is a row.
+    Nested dictionaries are flattened into separate columns such as
+    `algorithm.hyperparameters.epochs`.
+
+    The items are iterated over twice, first to find the columns and their
+    types and thereafter to write the rows in row groups of
+    `row_group_size` items. Thus, only one row group is held in memory
+    at a time.
+
+    NOTE::
+        This requires the optional dependency `pyarrow`.
+
+    Parameters
+    ----------
+    items
+        A collection of dictionaries which can be iterated over twice,
+        such as `runtool.datatypes.Experiments`.
+    path
+        Where the file should be written.
+    row_group_size
+        The number of rows in each row group.
+    Returns
+    -------
+    int
+        The number of items written.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "write_parquet requires pyarrow, "
+            "it can be installed with `pip install pyarrow`"
+        )
+
+    if isinstance(items, Iterator):
+        raise TypeError("write_parquet requires a collection, not an iterator")
+
+    types = {}
+    for item in items:
+        for key, value in flatten(item).items():
+            types.setdefault(key, set()).add(type(value))
+    columns = {key: column_type(values) for key, values in types.items()}
+
+    arrow_types = {
+        "bool": pyarrow.bool_(),
+        "int": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "str": pyarrow.string(),
+        "json": pyarrow.string(),
+    }
+    schema = pyarrow.schema(
+        [(key, arrow_types[type_]) for key, type_ in columns.items()]
+    )
+
+    def cell(value: Any, type_: str) -> Any:
+        if value is None:
+            return None
+        if type_ == "json":
+            return json.dumps(value, default=encode)
+        return value
+
+    count = 0
+    with pyarrow.parquet.ParquetWriter(str(path), schema) as writer:
+        for chunk in partition_all(row_group_size, items):
+            rows = list(map(flatten, chunk))
+            writer.write_table(
+                pyarrow.Table.from_pydict(
+                    {
+                        key: [cell(row.get(key), type_) for row in rows]
+                        for key, type_ in columns.items()
+                    },
+                    schema=schema,
+                )
+            )
+            count += len(rows)
+    return count
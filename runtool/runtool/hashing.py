@@ -0,0 +1,292 @@
+from collections import UserDict, UserList
+from collections.abc import Mapping
+from functools import lru_cache, singledispatch
+from hashlib import blake2b
+from typing import Optional, Tuple
+
+from runtool.recurse_config import Versions
+from runtool.utils import without_keys
+
+# size in bytes of the digests
+DIGEST_SIZE = 16
+
+
+def hash_bytes(data: bytes) -> bytes:
+    return blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+@singledispatch
+def digest(data, memo: Optional[dict] = None) -> bytes:
+    """
+    Calculates a digest of the content of a JSON-like structure.
+
+    The digest of a dictionary or list is calculated from the digests of
+    its children, where the children of a dictionary are sorted by their
+    digests. Thus, the digest does not depend on the insertion order of any
+    dictionaries.
+
+    >>> digest({"a": 1, "b": [1, 2]}) == digest({"b": [1, 2], "a": 1})
+    True
+
+    The type of each value is part of its digest, thus values which
+    python considers equal such as `1`, `1.0` and `True` have different
+    digests.
+
+    >>> len({digest({"a": 1}), digest({"a": 1.0}), digest({"a": True})})
+    3
+
+    `runtool.datatypes.Node` objects cache their digest, see `digest_userdict`.
+
+    Parameters
+    ----------
+    data
+        The structure which should be hashed.
+    memo
+        Digests of containers which have already been hashed, keyed by
+        their `id`. Used to avoid hashing shared subtrees several times.
+    Returns
+    -------
+    bytes
+        The digest of the data.
+    """
+    raise TypeError(f"Unable to hash objects of type {type(data).__name__}")
+
+
+@lru_cache(maxsize=2**16)
+def hash_str(data: str) -> bytes:
+    return hash_bytes(b"s" + data.encode())
+
+
+@digest.register(str)
+def digest_str(data: str, memo: Optional[dict] = None) -> bytes:
+    # strings such as keys are repeated throughout configs, thus
+    # the digests of recently seen strings are cached
+    return hash_str(data)
+
+
+@digest.register(bool)
+def digest_bool(data: bool, memo: Optional[dict] = None) -> bytes:
+    return hash_bytes(b"b1" if data else b"b0")
+
+
+@digest.register(int)
+def digest_int(data: int, memo: Optional[dict] = None) -> bytes:
+    return hash_bytes(b"i" + str(data).encode())
+
+
+@digest.register(float)
+def digest_float(data: float, memo: Optional[dict] = None) -> bytes:
+    return hash_bytes(b"f" + data.hex().encode())
+
+
+@digest.register(type(None))
+def digest_none(data: None, memo: Optional[dict] = None) -> bytes:
+    return hash_bytes(b"n")
+
+
+def memoized(data, memo: Optional[dict], fn) -> bytes:
+    """
+    Returns the digest of `data` from the `memo` if it exists,
+    otherwise calculates it with `fn` and stores it in the `memo`.
+    """
+    if memo is None:
+        memo = {}
+    key = id(data)
+    if key not in memo:
+        memo[key] = fn(data, memo)
+    return memo[key]
+
+
+# the implementations of `digest` for each type which has been hashed,
+# looking these up is faster than dispatching through `digest`
+implementations = {}
+
+
+def digest_child(data, memo: dict) -> bytes:
+    """
+    Calls the implementation of `digest` for the type of `data`.
+    """
+    implementation = implementations.get(type(data))
+    if implementation is None:
+        implementation = implementations[type(data)] = digest.dispatch(
+            type(data)
+        )
+    return implementation(data, memo)
+
+
+def digest_sequence(data, memo: dict) -> bytes:
+    return hash_bytes(
+        b"l" + b"".join(digest_child(item, memo) for item in data)
+    )
+
+
+def digest_items(data: Mapping, memo: dict) -> bytes:
+    if isinstance(data, UserDict):
+        data = data.data
+    return hash_bytes(
+        b"d"
+        + b"".join(
+            sorted(
+                digest_child(key, memo) + digest_child(value, memo)
+                for key, value in data.items()
+            )
+        )
+    )
+
+
+@digest.register(list)
+@digest.register(tuple)
+@digest.register(Versions)
+@digest.register(UserList)
+def digest_list(data, memo: Optional[dict] = None) -> bytes:
+    return memoized(data, memo, digest_sequence)
+
+
+@digest.register(Mapping)
+def digest_mapping(data: Mapping, memo: Optional[dict] = None) -> bytes:
+    return memoized(data, memo, digest_items)
+
+
+@digest.register(UserDict)
+def digest_userdict(data: UserDict, memo: Optional[dict] = None) -> bytes:
+    """
+    Calculates the digest of a `UserDict`. Classes which inherit from
+    `UserDict` and have a `_digest` attribute, such as
+    `runtool.datatypes.Node`, store the digest in it and are responsible
+    for resetting it to None when they are changed.
+
+    The cached digest of a node is reused as long as the nodes among its
+    values still have the digests they had when it was calculated. Thus,
+    changing an `Algorithm` in an `Experiment` invalidates the digest of
+    the `Experiment` as well.
+
+    >>> from runtool.datatypes import Algorithm, Dataset, Experiment
+    >>> experiment = Experiment.from_nodes(
+    ...     Algorithm({"image": "1", "instance": ""}), Dataset({"path": {}})
+    ... )
+    >>> before = digest(experiment)
+    >>> before == digest(experiment)
+    True
+    >>> experiment["algorithm"]["image"] = "2"
+    >>> before == digest(experiment)
+    False
+
+    Nodes share the dictionaries and lists they are created from, and
+    changes to these are not detected. Call `invalidate` on the node after
+    changing them in place.
+
+    >>> experiment["algorithm"]["hyperparameters"] = {"epochs": 1}
+    >>> before = digest(experiment)
+    >>> experiment["algorithm"]["hyperparameters"]["epochs"] = 5
+    >>> before == digest(experiment)
+    True
+    >>> invalidate(experiment["algorithm"])
+    >>> before == digest(experiment)
+    False
+    """
+    if not hasattr(data, "_digest"):
+        return digest_mapping(data, memo)
+
+    value = cached_digest(data)
+    if value is None:
+        value = digest_items(data, {} if memo is None else memo)
+        data._digest = (
+            value,
+            tuple(
+                (child, child._digest[0])
+                for child in data.data.values()
+                if getattr(child, "_digest", None) is not None
+            ),
+        )
+    return value
+
+
+def cached_digest(node: UserDict) -> Optional[bytes]:
+    """
+    Returns the cached digest of `node` if it is still valid, else None.
+    """
+    cache = getattr(node, "_digest", None)
+    if cache is None:
+        return None
+    value, children = cache
+    for child, child_value in children:
+        if cached_digest(child) != child_value:
+            return None
+    return value
+
+
+def invalidate(node: UserDict):
+    """
+    Removes the cached digest of a node, which has to be done after the
+    dictionaries or lists among its values are changed in place. The
+    digests of the nodes containing `node` are invalidated as well.
+    """
+    node._digest = None
+
+
+def canonical_hash(data) -> str:
+    """
+    Returns the digest of `data` as a hexadecimal string, see `digest`.
+
+    >>> canonical_hash({"b": 2, "a": [1, {"c": None}]})
+    '5f449fb23527e3e628f8a2b9b6734198'
+    """
+    return digest(data).hex()
+
+
+# keys of the nodes of an experiment which differ between runs of the same
+# configuration, such as job names containing a unique id
+VOLATILE_KEYS = ("$job_name",)
+
+
+def run_digest(
+    experiment: Mapping,
+    memo: Optional[dict] = None,
+    volatile: Tuple[str, ...] = VOLATILE_KEYS,
+) -> bytes:
+    """
+    Calculates the digest of an experiment without the `volatile` keys of
+    its nodes, such that two runs of the same configuration have the same
+    digest. Nodes without volatile keys keep their cached digests.
+    """
+    if memo is None:
+        memo = {}
+    return digest(
+        {
+            name: (
+                without_keys(node, *volatile)
+                if isinstance(node, Mapping)
+                and any(key in node for key in volatile)
+                else node
+            )
+            for name, node in experiment.items()
+        },
+        memo,
+    )
+
+
+def run_hash(
+    experiment: Mapping, volatile: Tuple[str, ...] = VOLATILE_KEYS
+) -> str:
+    """
+    Returns the digest of an experiment without its `volatile` keys as a
+    hexadecimal string, see `run_digest`. Experiments without volatile keys
+    have the same `run_hash` as `canonical_hash`.
+
+    >>> algorithm = {"image": "1", "instance": "local"}
+    >>> first = {
+    ...     "algorithm": {**algorithm, "$job_name": "job-2f4a"},
+    ...     "dataset": {"path": {}},
+    ... }
+    >>> second = {
+    ...     "algorithm": {**algorithm, "$job_name": "job-91c0"},
+    ...     "dataset": {"path": {}},
+    ... }
+    >>> run_hash(first) == run_hash(second) != canonical_hash(first)
+    True
+    >>> run_hash(
+    ...     {"algorithm": algorithm, "dataset": {"path": {}}}
+    ... ) == run_hash(first)
+    True
+    """
+    return run_digest(experiment, volatile=volatile).hex()
@@ -0,0 +1,276 @@
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Set
+
+from runtool.datatypes import Experiment
+from runtool.hashing import run_hash
+from runtool.metrics import MetricsRecord, lines_end, metric_scanner
+
+
+class LogSource(ABC):
+    """
+    Interface of the logs which a `LogIngestor` reads, such as local files
+    or the log streams of remote training jobs.
+    """
+
+    @abstractmethod
+    def read(self, offset: int) -> bytes:
+        """
+        Returns the bytes of the log which were written after `offset`.
+        """
+
+    def size(self) -> Optional[int]:
+        """
+        Returns the current size of the log in bytes, if it is known. A log
+        which is smaller than the offset it was read up to is assumed to
+        have been truncated or replaced, and is read again from the start.
+        """
+        return None
+
+
+class FileSource(LogSource):
+    """
+    A log file on the local disk, which does not need to exist yet.
+
+    Parameters
+    ----------
+    path
+        The path of the log file.
+    max_bytes
+        The maximum number of bytes which are read at once, such that
+        large logs are ingested over several polls. It needs to be larger
+        than the longest line of the log.
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def read(self, offset: int) -> bytes:
+        try:
+            with open(self.path, "rb") as log:
+                log.seek(offset)
+                return log.read(
+                    -1 if self.max_bytes is None else self.max_bytes
+                )
+        except FileNotFoundError:
+            return b""
+
+    def size(self) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+
+class LogIngestor:
+    """
+    Extracts metrics from the logs of running jobs incrementally. Each log
+    is read from the byte offset up to which it was read by the previous
+    poll, and only the new complete lines are searched for metrics, which
+    are then merged into the `MetricsRecord` of the log. Thus the cost of a
+    poll is proportional to the output written since the previous poll.
+
+    The offsets and records are kept in the file at `path`, such that
+    polling can be resumed after a restart without reading the logs again.
+    The file holds one JSON line per log, and `save` appends a line for
+    each log which was polled since the previous save, such that saving
+    takes time proportional to the logs which changed rather than to all
+    logs. The file is compacted to the last line of each log when it is
+    opened and when it holds more than twice as many lines as there are
+    logs. A line which was only partially written, e.g. due to a crash, is
+    dropped when the file is opened.
+
+    >>> import os, tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> log = os.path.join(directory, "train.log")
+    >>> metrics = {"loss": r"loss: (\\d+\\.\\d+)"}
+    >>> ingestor = LogIngestor(os.path.join(directory, "offsets.jsonl"))
+    >>> with open(log, "w") as file:
+    ...     _ = file.write("epoch 1 loss: 0.9\\nepoch 2 lo")
+    >>> ingestor.poll("job", FileSource(log), metrics)
+    MetricsRecord(values={'loss': 0.9}, counts={'loss': 1})
+    >>> with open(log, "a") as file:
+    ...     _ = file.write("ss: 0.7\\n")
+    >>> ingestor.poll("job", FileSource(log), metrics)
+    MetricsRecord(values={'loss': 0.7}, counts={'loss': 2})
+    >>> ingestor.offsets["job"]
+    36
+    >>> LogIngestor(os.path.join(directory, "offsets.jsonl")).offsets
+    {'job': 36}
+
+    Parameters
+    ----------
+    path
+        The file where the state is persisted, or `None` to keep the state
+        in memory only.
+    autosave
+        Whether to persist the state after each poll, otherwise `save` has
+        to be called.
+    """
+
+    def __init__(self, path: Optional[str] = None, autosave: bool = True):
+        self.path = path
+        self.autosave = autosave
+        self.offsets: Dict[str, int] = {}
+        self.records: Dict[str, MetricsRecord] = {}
+        # the logs which changed since they were last saved
+        self.dirty: Set[str] = set()
+        # the number of lines in the file at `path`
+        self._lines = 0
+        # whether the file at `path` ends with a partially written line
+        self._torn = False
+        if path is not None and os.path.exists(path):
+            self.load()
+            if self._torn or self._lines > len(self.offsets):
+                self.compact()
+
+    def load(self):
+        """
+        Replays the lines of the file at `path`. A last line which was only
+        partially written is ignored.
+        """
+        with open(self.path) as file:
+            lines = file.read().split("\n")
+        # the last element is empty if the file ends with a line break,
+        # otherwise it is a partially written line
+        for line in lines[:-1]:
+            log = json.loads(line)
+            if "offset" in log:
+                self.offsets[log["key"]] = log["offset"]
+                self.records[log["key"]] = MetricsRecord(
+                    log["values"], log["counts"]
+                )
+            else:
+                self.offsets.pop(log["key"], None)
+                self.records.pop(log["key"], None)
+        self._lines = len(lines) - 1
+        self._torn = lines[-1] != ""
+
+    def _line(self, key: str) -> str:
+        if key not in self.offsets:
+            return json.dumps({"key": key}) + "\n"
+        record = self.records[key]
+        return (
+            json.dumps(
+                {
+                    "key": key,
+                    "offset": self.offsets[key],
+                    "values": record.values,
+                    "counts": record.counts,
+                }
+            )
+            + "\n"
+        )
+
+    def save(self):
+        """
+        Appends the offsets and records of the logs which changed since the
+        previous save to `path` and syncs the file to disk.
+        """
+        if self.path is None or not self.dirty:
+            return
+        if self._lines + len(self.dirty) > 2 * len(self.offsets):
+            self.compact()
+            return
+        with open(self.path, "a") as file:
+            file.write("".join(map(self._line, self.dirty)))
+            file.flush()
+            os.fsync(file.fileno())
+        self._lines += len(self.dirty)
+        self.dirty.clear()
+
+    def compact(self):
+        """
+        Rewrites the file at `path` with one line per log. The file is
+        replaced atomically, such that it is never left half written.
+        """
+        if self.path is None:
+            return
+        descriptor, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descriptor, "w") as file:
+                file.write("".join(map(self._line, self.offsets)))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self._lines = len(self.offsets)
+        self._torn = False
+        self.dirty.clear()
+
+    def reset(self, key: str):
+        """
+        Forgets the offset and metrics of a log.
+        """
+        self.offsets.pop(key, None)
+        self.records.pop(key, None)
+        self.dirty.add(key)
+
+    def poll(
+        self,
+        key: str,
+        source: LogSource,
+        metrics: Dict[str, str],
+        final: bool = False,
+    ) -> MetricsRecord:
+        """
+        Reads the new output of the log identified by `key` and returns its
+        updated metrics.
+
+        Parameters
+        ----------
+        key
+            Identifies the log across polls.
+        source
+            The log.
+        metrics
+            The regexes of the metrics, see `runtool.metrics.MetricScanner`.
+        final
+            Whether the log is complete, in which case a last line which
+            does not end with a line break is searched as well.
+        Returns
+        -------
+        MetricsRecord
+            The metrics found in the log so far.
+        """
+        offset = self.offsets.get(key, 0)
+        size = source.size()
+        if size is not None and size < offset:
+            self.reset(key)
+            offset = 0
+
+        data = source.read(offset)
+        end = len(data) if final else lines_end(data)
+        record = self.records.setdefault(key, MetricsRecord({}, {}))
+        if end:
+            metric_scanner(metrics).update(
+                record, data[:end].decode("utf-8", errors="replace")
+            )
+        if end or self.offsets.get(key) != offset:
+            self.offsets[key] = offset + end
+            self.dirty.add(key)
+        if self.autosave:
+            self.save()
+        return record
+
+    def poll_experiment(
+        self, experiment: Experiment, source: LogSource, final: bool = False
+    ) -> MetricsRecord:
+        """
+        Polls the log of an experiment using the `metrics` of its algorithm.
+        The log is identified by the hash of the experiment without its
+        volatile keys, such as the job name, see `runtool.hashing.run_hash`.
+        """
+        return self.poll(
+            run_hash(experiment),
+            source,
+            experiment["algorithm"].get("metrics", {}),
+            final,
+        )
@@ -0,0 +1,270 @@
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+from runtool.datatypes import Experiment, Experiments
+from runtool.executor import Executor, Run
+
+SUBMITTED = "s"
+RUNNING = "r"
+DONE = "d"
+FAILED = "f"
+STATES = (SUBMITTED, RUNNING, DONE, FAILED)
+
+
+class Journal:
+    """
+    Append-only log of the progress of running a grid of experiments, which
+    allows resuming the grid after the process running it died. The
+    experiments are identified by their index in the grid, which is stable
+    as long as the config of the grid does not change, and each line of the
+    journal records the state an experiment entered:
+
+    - `SUBMITTED` when it was handed to the runner,
+    - `RUNNING` when the runner started it,
+    - `DONE` or `FAILED` when it finished.
+
+    Lines are buffered and written together, followed by an `os.fsync`,
+    whenever `batch_size` lines are buffered or `interval` seconds passed
+    since the last write. A crash thus loses at most the last batch, whose
+    experiments are run again.
+
+    When a journal is opened its lines are replayed, which takes time
+    proportional to the size of the journal, and the journal is compacted:
+    the experiments `0, ..., watermark - 1` which are all done are replaced
+    by a single line.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "grid.journal")
+    >>> with Journal(path, length=4) as journal:
+    ...     journal.record(0, DONE)
+    ...     journal.record(1, FAILED)
+    ...     journal.record(2, RUNNING)
+    >>> journal = Journal(path, length=4)
+    >>> list(journal.pending())
+    [1, 2, 3]
+    >>> list(journal.pending(retry_failed=False))
+    [2, 3]
+    >>> journal.close()
+
+    Parameters
+    ----------
+    path
+        The path of the journal file, which is created if it does not exist.
+    length
+        The number of experiments in the grid.
+    fingerprint
+        Identifies the grid, e.g. the hash of its config. Opening a journal
+        with a different length or fingerprint raises a `ValueError`, since
+        the indices would refer to other experiments.
+    batch_size
+        The number of lines which are buffered before they are written.
+    interval
+        The maximum number of seconds lines are buffered for.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        length: int,
+        fingerprint: str = "",
+        batch_size: int = 256,
+        interval: float = 1.0,
+    ):
+        if any(char.isspace() for char in fingerprint):
+            raise ValueError("The fingerprint may not contain whitespace")
+        self.path = path
+        self.length = length
+        self.fingerprint = fingerprint
+        self.batch_size = batch_size
+        self.interval = interval
+        self.states: Dict[int, str] = {}
+        self.watermark = 0
+        self._buffer: List[str] = []
+        self._written = time.monotonic()
+        if os.path.exists(path):
+            self.load()
+        self.compact()
+        self._file = open(path, "a")
+
+    @property
+    def header(self) -> str:
+        return f"grid {self.length} {self.fingerprint}".rstrip()
+
+    def load(self):
+        """
+        Replays the journal at `path`. A last line which was only partially
+        written is ignored.
+        """
+        with open(self.path) as file:
+            lines = file.read().split("\n")
+        if lines[0] != self.header:
+            raise ValueError(
+                f"The journal {self.path} belongs to another grid:"
+                f" {lines[0]!r} instead of {self.header!r}"
+            )
+        # the last element is empty if the journal ends with a line break,
+        # otherwise it is a partially written line
+        for line in lines[1:-1]:
+            state, _, index = line.partition(" ")
+            if state == "w":
+                self.watermark = int(index)
+            else:
+                self.states[int(index)] = state
+
+    def compact(self):
+        """
+        Rewrites the journal with one line per experiment after the
+        watermark, replacing it atomically.
+        """
+        while self.states.get(self.watermark) == DONE:
+            del self.states[self.watermark]
+            self.watermark += 1
+        lines = [self.header, f"w {self.watermark}"]
+        lines.extend(
+            f"{state} {index}" for index, state in sorted(self.states.items())
+        )
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            file.write("\n".join(lines) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    def state(self, index: int) -> Optional[str]:
+        """
+        Returns the last recorded state of an experiment, or `None` if
+        nothing was recorded.
+        """
+        if index < self.watermark:
+            return DONE
+        return self.states.get(index)
+
+    def counts(self) -> Counter:
+        """
+        Returns the number of experiments in each state.
+        """
+        counts = Counter(self.states.values())
+        counts[DONE] += self.watermark
+        return counts
+
+    def record(self, index: int, state: str):
+        """
+        Records that an experiment entered `state`.
+        """
+        if state not in STATES:
+            raise ValueError(f"Unknown state {state!r}")
+        if not 0 <= index < self.length:
+            raise IndexError(f"Index {index} is not part of the grid")
+        self.states[index] = state
+        self._buffer.append(f"{state} {index}\n")
+        if (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._written >= self.interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered lines to the journal and syncs it to disk.
+        """
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._buffer.clear()
+        self._written = time.monotonic()
+
+    def pending(self, retry_failed: bool = True) -> Iterator[int]:
+        """
+        Yields the indices of the experiments which still need to be run,
+        in increasing order. Experiments which were submitted or running
+        when the journal was last written are run again.
+        """
+        finished = (DONE,) if retry_failed else (DONE, FAILED)
+        for index in range(self.watermark, self.length):
+            if self.states.get(index) not in finished:
+                yield index
+
+    def close(self):
+        """
+        Writes the buffered lines and closes the journal.
+        """
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_grid(
+    experiments: Experiments,
+    executor: Executor,
+    path: str,
+    fingerprint: str = "",
+    retry_failed: bool = True,
+    lookahead: int = 1000,
+) -> Dict[int, Run]:
+    """
+    Runs a grid of experiments with `executor` while recording the progress
+    in the `Journal` at `path`. If the journal already exists, only the
+    experiments which are not done are run. Since experiments are accessed
+    by their index, a lazily generated grid such as an
+    `runtool.datatypes.ExperimentsProduct` is not expanded.
+
+    The pending experiments are read by the executor as it starts them,
+    at most `lookahead` experiments ahead, see `Executor.execute`. Thus
+    each free slot is refilled as soon as an experiment finishes, and the
+    grid is not expanded up front.
+
+    >>> import os, tempfile
+    >>> from runtool.datatypes import Algorithms, Datasets
+    >>> from runtool.runners import LocalRunner
+    >>> grid = Algorithms(
+    ...     [{"image": str(index), "instance": "local"} for index in range(3)]
+    ... ) * Datasets([{"path": {}}])
+    >>> path = os.path.join(tempfile.mkdtemp(), "grid.journal")
+    >>> def train(experiment):
+    ...     if experiment["algorithm"]["image"] == "1":
+    ...         raise RuntimeError("the process died")
+    ...     return ""
+    >>> executor = Executor(LocalRunner(train), concurrency=2)
+    >>> sorted(run_grid(grid, executor, path))
+    [0, 1, 2]
+    >>> sorted(run_grid(grid, executor, path))
+    [1]
+
+    Returns
+    -------
+    Dict[int, Run]
+        The runs of this call, keyed by the index of their experiment.
+    """
+    runs = {}
+    with Journal(path, len(experiments), fingerprint) as journal:
+        # the grid index of each experiment passed to the executor
+        indices = []
+
+        def submit() -> Iterator[Experiment]:
+            for index in journal.pending(retry_failed):
+                journal.record(index, SUBMITTED)
+                indices.append(index)
+                yield experiments[index]
+
+        def on_finish(position: int, run: Run):
+            index = indices[position]
+            journal.record(index, DONE if run.error is None else FAILED)
+            runs[index] = run
+
+        executor.execute(
+            submit(),
+            on_start=lambda position: journal.record(
+                indices[position], RUNNING
+            ),
+            on_finish=on_finish,
+            lookahead=lookahead,
+        )
+    return runs
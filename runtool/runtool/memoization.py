@@ -0,0 +1,92 @@
+from typing import Dict, Iterable, Optional, Set
+
+from runtool.datatypes import Experiment, Experiments
+from runtool.hashing import run_hash
+from runtool.results import ResultsStore
+
+
+class RunCache:
+    """
+    Remembers which experiments have already been run, using the results
+    in a `runtool.results.ResultsStore`. Experiments are identified by
+    their `runtool.hashing.run_hash`, which leaves out volatile keys such as
+    job names with unique ids, thus relaunching a config only runs the
+    experiments which are new.
+
+    The hashes of the stored results are loaded into a set once, after
+    which `filter` needs a single hash lookup per experiment.
+
+    >>> from runtool.datatypes import Algorithms, Datasets
+    >>> def experiments(*datasets):
+    ...     return Algorithms(
+    ...         [
+    ...             {"image": "1", "instance": "local", "$job_name": name}
+    ...             for name in ("job-2f4a", "job-91c0")
+    ...         ]
+    ...     ) * Datasets([{"path": {"train": path}} for path in datasets])
+    >>> cache = RunCache(ResultsStore())
+    >>> for experiment in experiments("electricity"):
+    ...     cache.record(experiment, {"MASE": 0.5})
+    >>> new = cache.filter(experiments("electricity", "traffic"))
+    >>> [experiment["dataset"]["path"]["train"] for experiment in new]
+    ['traffic']
+
+    Parameters
+    ----------
+    store
+        The results of the experiments which have been run. The volatile
+        keys of the store are left out when comparing experiments.
+    """
+
+    def __init__(self, store: ResultsStore):
+        self.store = store
+        self._seen: Optional[Set[str]] = None
+
+    @property
+    def seen(self) -> Set[str]:
+        """
+        The run hashes of the experiments which have been run.
+        """
+        if self._seen is None:
+            self._seen = self.store.hashes()
+        return self._seen
+
+    def refresh(self):
+        """
+        Reloads the run hashes from the store, e.g. after other processes
+        added results to it.
+        """
+        self._seen = None
+
+    def key(self, experiment: Experiment) -> str:
+        return run_hash(experiment, self.store.volatile)
+
+    def __contains__(self, experiment: Experiment) -> bool:
+        return self.key(experiment) in self.seen
+
+    def filter(
+        self, experiments: Iterable[Experiment], dedup: bool = True
+    ) -> Experiments:
+        """
+        Returns the experiments which have not been run, in their original
+        order. If `dedup` is set, only the first of several experiments
+        with the same configuration is kept as well.
+        """
+        seen = set(self.seen) if dedup else self.seen
+        remaining = []
+        for experiment in experiments:
+            key = self.key(experiment)
+            if key in seen:
+                continue
+            if dedup:
+                seen.add(key)
+            remaining.append(experiment)
+        return Experiments.from_verified(remaining)
+
+    def record(self, experiment: Experiment, metrics: Dict[str, float]):
+        """
+        Adds the metrics of an experiment which was run to the store and
+        marks it as run.
+        """
+        self.store.add(experiment, metrics)
+        self.seen.add(self.key(experiment))
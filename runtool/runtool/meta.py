@@ -0,0 +1,664 @@
+import json
+import math
+import os
+import random
+from array import array
+from collections import UserList
+from datetime import datetime, timezone
+from functools import reduce
+from hashlib import blake2b
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+from runtool.datatypes import Dataset
+
+# frequencies which are recognized when inferring the frequency of a
+# dataset from the start of its series, from the coarsest to the finest
+FREQUENCIES = (
+    ("W", 7 * 24 * 3600),
+    ("D", 24 * 3600),
+    ("H", 3600),
+    ("min", 60),
+    ("S", 1),
+)
+
+# the quantile of the standard normal distribution for the 95% confidence
+# intervals of approximate statistics
+Z = 1.96
+
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "inferring dataset metadata requires numpy, "
+            "it can be installed with `pip install numpy`"
+        )
+    return numpy
+
+
+def local_path(uri: Any) -> Optional[str]:
+    """
+    Returns the local path of a `Dataset.path` entry, or `None` if it
+    refers to a remote location such as S3.
+
+    >>> local_path("file:///data/train.json"), local_path("s3://bucket/a")
+    ('/data/train.json', None)
+    """
+    if not isinstance(uri, str):
+        return None
+    if uri.startswith("file://"):
+        return uri[len("file://") :]
+    if "://" in uri:
+        return None
+    return uri
+
+
+def data_files(path: str) -> Iterator[str]:
+    """
+    Yields the JSON Lines files of a dataset, which is either a single file
+    or a directory of files as written by GluonTS.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith((".json", ".jsonl")):
+                yield os.path.join(path, name)
+    else:
+        yield path
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Returns the BLAKE2b digest of the content of the files at `path`.
+    """
+    hasher = blake2b(digest_size=16)
+    for name in data_files(path):
+        with open(name, "rb") as file:
+            for chunk in iter(lambda: file.read(chunk_size), b""):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def series_length(target: list) -> int:
+    # multivariate targets are lists of the values of each dimension
+    if target and isinstance(target[0], list):
+        return len(target[0])
+    return len(target)
+
+
+def scan_series(path: str) -> Tuple[array, set]:
+    """
+    Streams the JSON Lines files at `path` and returns the lengths of the
+    series and the distinct values of their `start`.
+    """
+    lengths, starts = array("q"), set()
+    for name in data_files(path):
+        with open(name, "rb") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                series = loads(line)
+                lengths.append(series_length(series["target"]))
+                if "start" in series:
+                    starts.add(series["start"])
+    return lengths, starts
+
+
+def length_statistics(lengths) -> Dict[str, float]:
+    """
+    Returns the minimum, maximum, mean and median of the series lengths.
+
+    >>> length_statistics([3, 1, 2, 10])
+    {'min': 1, 'max': 10, 'mean': 4.0, 'median': 2.5}
+    """
+    np = require_numpy()
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if not len(lengths):
+        return {}
+    return {
+        "min": int(lengths.min()),
+        "max": int(lengths.max()),
+        "mean": float(lengths.mean()),
+        "median": float(np.median(lengths)),
+    }
+
+
+def parse_start(start: Any) -> Optional[datetime]:
+    """
+    Parses the `start` of a series, which is an ISO 8601 timestamp or a
+    monthly period such as `"2020-01"`, the way pandas writes them.
+    Timestamps with a time zone are converted to UTC, such that they can be
+    compared with those without one. Returns `None` if the start cannot be
+    parsed.
+
+    >>> parse_start("2020-01")
+    datetime.datetime(2020, 1, 1, 0, 0)
+    >>> parse_start("2020-01-01T02:00:00+02:00")
+    datetime.datetime(2020, 1, 1, 0, 0)
+    >>> parse_start("2020Q1") is None
+    True
+    """
+    text = str(start).strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        time = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            time = datetime.strptime(text, "%Y-%m")
+        except ValueError:
+            return None
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return time
+
+
+def infer_freq(starts: Iterable[str]) -> Optional[str]:
+    """
+    Infers the frequency of a dataset from the start timestamps of its
+    series, as the coarsest frequency which all differences between the
+    starts are a multiple of. This is a heuristic: an hourly dataset where
+    all series start at midnight is detected as daily. Returns `None` if
+    there are fewer than two distinct starts or if any of them cannot be
+    parsed, see `parse_start`.
+
+    >>> infer_freq(["2020-01-01 00:00:00", "2020-01-03 00:00:00"])
+    'D'
+    >>> infer_freq(["2020-01-01 00:00", "2020-01-01 05:00", "2020-01-02"])
+    'H'
+    >>> infer_freq(["2020-01-01", "2020-03-01", "2021-02-01"])
+    'M'
+    >>> infer_freq(["2020-01", "2020-04"])
+    'M'
+    >>> infer_freq(["2020-01-01"]) is None
+    True
+    """
+    times = set(map(parse_start, starts))
+    if None in times:
+        return None
+    times = sorted(times)
+    if len(times) < 2:
+        return None
+    if all(
+        time.day == 1 and time.time() == datetime.min.time() for time in times
+    ):
+        return "M"
+    step = reduce(
+        math.gcd,
+        (int((time - times[0]).total_seconds()) for time in times[1:]),
+    )
+    for name, seconds in FREQUENCIES:
+        if step % seconds == 0:
+            return name
+    return None
+
+
+def infer_prediction_length(train_lengths, test_lengths) -> Optional[int]:
+    """
+    Infers the prediction length from the lengths of the train and test
+    series. In GluonTS datasets the test set contains each train series
+    extended by the prediction length, possibly in several rolling windows
+    where the `i`-th test series extends train series `i % n`. The
+    prediction length is the smallest positive difference in length.
+
+    >>> infer_prediction_length([10, 20], [17, 27, 24, 34])
+    7
+    """
+    np = require_numpy()
+    train = np.asarray(train_lengths, dtype=np.int64)
+    test = np.asarray(test_lengths, dtype=np.int64)
+    if not len(train) or len(test) % len(train):
+        return None
+    differences = test - np.tile(train, len(test) // len(train))
+    differences = differences[differences > 0]
+    return int(differences.min()) if len(differences) else None
+
+
+def gluonts_metadata(path: str) -> dict:
+    """
+    Returns the content of the `metadata.json` file of a dataset in the
+    GluonTS layout, where `path` is the train or test data, or an empty
+    dictionary if there is none.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if os.path.isdir(path):
+        directory = os.path.abspath(path)
+    parent = os.path.dirname(directory)
+    for candidate in (
+        os.path.join(parent, "metadata.json"),
+        os.path.join(parent, "metadata", "metadata.json"),
+    ):
+        if os.path.isfile(candidate):
+            with open(candidate) as file:
+                return json.load(file)
+    return {}
+
+
+class Sampling(NamedTuple):
+    """
+    Configures the approximate statistics of a dataset, which are estimated
+    from a uniform sample of `size` series instead of all series.
+
+    Streaming the data stops after `max_bytes` bytes or `max_series` series
+    have been read, if these are given. The estimates then only describe the
+    beginning of the data, which is representative of all of it if the
+    order of the series is unrelated to their lengths and values.
+    """
+
+    size: int = 1000
+    max_bytes: Optional[int] = None
+    max_series: Optional[int] = None
+    seed: int = 0
+
+
+class SeriesSample(NamedTuple):
+    """
+    A uniform sample of the series of a dataset, see `sample_series`.
+    `lengths`, `scales` and `starts` describe the sampled series, where the
+    scale of a series is the mean absolute value of its target, and `head`
+    holds the lengths of the first `size` series in their order.
+
+    `seen` is the number of series that were read, `bytes` the number of
+    bytes they take, `line_bytes` the mean and standard deviation of the
+    number of bytes per series and `total_bytes` the size of the data.
+    """
+
+    lengths: List[int]
+    scales: List[float]
+    starts: List[str]
+    head: List[int]
+    seen: int
+    bytes: int
+    line_bytes: Tuple[float, float]
+    total_bytes: int
+
+    @property
+    def complete(self) -> bool:
+        return self.bytes >= self.total_bytes
+
+
+def series_scale(target: list) -> float:
+    np = require_numpy()
+    values = np.abs(np.asarray(target, dtype=np.float64))
+    values = values[np.isfinite(values)]
+    return float(values.mean()) if values.size else math.nan
+
+
+def sample_series(path: str, sampling: Sampling = Sampling()) -> SeriesSample:
+    """
+    Streams the JSON Lines files at `path` and draws a uniform sample of
+    their series using reservoir sampling. Only the lines which enter the
+    sample are parsed, the others are merely counted, and streaming stops
+    early according to `sampling`.
+    """
+    rng = random.Random(sampling.seed)
+    lengths, scales, starts, head = [], [], [], []
+    seen = read = squares = 0
+    total_bytes = sum(os.path.getsize(name) for name in data_files(path))
+
+    def stop() -> bool:
+        return (
+            sampling.max_bytes is not None and read >= sampling.max_bytes
+        ) or (sampling.max_series is not None and seen >= sampling.max_series)
+
+    for name in data_files(path):
+        with open(name, "rb") as file:
+            for line in file:
+                read += len(line)
+                if not line.strip():
+                    continue
+                if seen < sampling.size:
+                    slot = seen
+                    lengths.append(0)
+                    scales.append(0.0)
+                    starts.append("")
+                else:
+                    slot = rng.randrange(seen + 1)
+                seen += 1
+                squares += len(line) ** 2
+                if slot < sampling.size:
+                    series = loads(line)
+                    target = series["target"]
+                    lengths[slot] = series_length(target)
+                    scales[slot] = series_scale(target)
+                    starts[slot] = str(series.get("start", ""))
+                    if len(head) < sampling.size:
+                        head.append(lengths[slot])
+                if stop():
+                    break
+        if stop():
+            break
+
+    mean = read / seen if seen else 0.0
+    variance = max(squares / seen - mean**2, 0.0) if seen else 0.0
+    return SeriesSample(
+        lengths,
+        scales,
+        [start for start in starts if start],
+        head,
+        seen,
+        read,
+        (mean, math.sqrt(variance)),
+        total_bytes,
+    )
+
+
+def estimate_mean(values, population: float) -> Tuple[float, float]:
+    """
+    Returns the mean of a sample and the half-width of its 95% confidence
+    interval, taking into account that the sample is drawn without
+    replacement from `population` values.
+
+    >>> estimate_mean([1, 2, 3, 4], population=4)
+    (2.5, 0.0)
+    """
+    np = require_numpy()
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if not values.size:
+        return math.nan, math.nan
+    if values.size < 2 or values.size >= population:
+        return float(values.mean()), 0.0
+    correction = 1 - values.size / population
+    error = Z * math.sqrt(values.var(ddof=1) / values.size * correction)
+    return float(values.mean()), error
+
+
+def estimate_median(values, population: float) -> Tuple[float, float]:
+    """
+    Returns the median of a sample and the half-width of its distribution
+    free 95% confidence interval, which is bounded by the order statistics
+    around the middle of the sorted sample.
+
+    >>> estimate_median(range(101), population=10**6)
+    (50.0, 10.0)
+    """
+    np = require_numpy()
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    if not values.size:
+        return math.nan, math.nan
+    median = float(np.median(values))
+    if values.size >= population:
+        return median, 0.0
+    # the ranks of the bounds around the middle rank of the sample
+    middle, spread = (values.size - 1) / 2, Z * math.sqrt(values.size) / 2
+    lower = values[max(math.floor(middle - spread), 0)]
+    upper = values[min(math.ceil(middle + spread), values.size - 1)]
+    return median, float(max(upper - median, median - lower))
+
+
+def approximate_statistics(sample: SeriesSample) -> dict:
+    """
+    Estimates the number of series, the distribution of their lengths and
+    the scale of their values from a sample. The half-widths of the 95%
+    confidence intervals of the estimates are returned as `error`, which
+    mirrors the structure of the estimated fields. Estimates which are
+    exact have an error of 0, while the minimum and maximum length are
+    those of the sample and have no error bound.
+
+    If streaming stopped early, the number of series is extrapolated from
+    the number of bytes per series that were read.
+    """
+    if sample.complete or not sample.seen:
+        num_time_series, num_error = sample.seen, 0.0
+    else:
+        mean, deviation = sample.line_bytes
+        num_time_series = sample.total_bytes / mean
+        num_error = Z * num_time_series * deviation / mean
+        num_error /= math.sqrt(sample.seen)
+
+    lengths = length_statistics(sample.lengths)
+    lengths["mean"], mean_error = estimate_mean(
+        sample.lengths, num_time_series
+    )
+    lengths["median"], median_error = estimate_median(
+        sample.lengths, num_time_series
+    )
+    scale, scale_error = estimate_mean(sample.scales, num_time_series)
+    return {
+        "num_time_series": round(num_time_series),
+        "series_length": lengths,
+        "value_scale": {"mean": scale},
+        "error": {
+            "num_time_series": num_error,
+            "series_length": {"mean": mean_error, "median": median_error},
+            "value_scale": {"mean": scale_error},
+        },
+        "sample": {
+            "series": len(sample.lengths),
+            "seen": sample.seen,
+            "bytes": sample.bytes,
+            "complete": sample.complete,
+        },
+    }
+
+
+class MetaCache:
+    """
+    Caches the statistics of dataset files by the hash of their content,
+    such that each file is only parsed once. The hash of a file is in turn
+    memoized by its path, size and modification time, thus unchanged files
+    are not read at all.
+
+    The statistics are stored as JSON files in `directory` if it is given,
+    which allows sharing them between processes.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.statistics: Dict[str, dict] = {}
+        self.hashes: Dict[Tuple, str] = {}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def hash(self, path: str) -> str:
+        key = self.stat_key(path)
+        if key not in self.hashes:
+            self.hashes[key] = file_hash(path)
+        return self.hashes[key]
+
+    def stat_key(self, path: str) -> Tuple:
+        stats = [os.stat(name) for name in data_files(path)]
+        return (
+            os.path.abspath(path),
+            tuple((stat.st_size, stat.st_mtime_ns) for stat in stats),
+        )
+
+    def cached(self, key: str, compute: Callable[[], dict]) -> dict:
+        """
+        Returns the statistics stored under `key`, calling `compute` if
+        there are none.
+        """
+        if key in self.statistics:
+            return self.statistics[key]
+
+        stored = (
+            os.path.join(self.directory, f"{key}.json")
+            if self.directory is not None
+            else None
+        )
+        if stored is not None and os.path.exists(stored):
+            with open(stored) as file:
+                statistics = json.load(file)
+        else:
+            statistics = compute()
+            if stored is not None:
+                temporary = f"{stored}.{os.getpid()}.tmp"
+                with open(temporary, "w") as file:
+                    json.dump(statistics, file)
+                os.replace(temporary, stored)
+        self.statistics[key] = statistics
+        return statistics
+
+    def get(self, path: str) -> dict:
+        """
+        Returns the lengths of the series at `path` and their starts.
+        """
+
+        def compute() -> dict:
+            lengths, starts = scan_series(path)
+            return {
+                "lengths": lengths.tolist(),
+                "starts": sorted(map(str, starts)),
+            }
+
+        return self.cached(self.hash(path), compute)
+
+    def sample(self, path: str, sampling: Sampling) -> SeriesSample:
+        """
+        Returns a sample of the series at `path`, see `sample_series`.
+        Since hashing the content of the files would read all of them, the
+        sample is cached by their path, size and modification time.
+        """
+        key = blake2b(
+            repr((self.stat_key(path), tuple(sampling))).encode(),
+            digest_size=16,
+        ).hexdigest()
+        statistics = self.cached(
+            f"sample-{key}", lambda: sample_series(path, sampling)._asdict()
+        )
+        return SeriesSample(**statistics)
+
+
+def infer_meta(
+    dataset: Dataset,
+    cache: Optional[MetaCache] = None,
+    sampling: Optional[Sampling] = None,
+) -> dict:
+    """
+    Infers the fields `freq`, `num_time_series`, `prediction_length` and
+    `series_length` of the `meta` of a dataset from its local
+    `path.train` and `path.test` files in the GluonTS JSON Lines format.
+    Fields which cannot be inferred are left out, e.g. if the data is
+    stored remotely.
+
+    The `freq` and `prediction_length` are taken from the `metadata.json`
+    of the dataset if it exists, else they are inferred from the data, see
+    `infer_freq` and `infer_prediction_length`.
+
+    If `sampling` is given, the statistics are instead estimated from a
+    sample of the series, see `approximate_statistics`, which bounds the
+    time spent on large datasets. The `value_scale` of the series is then
+    estimated as well, and `error` and `sample` describe the accuracy of
+    the estimates. The prediction length is inferred from the first series
+    of the train and test data.
+
+    NOTE::
+        This requires the optional dependency `numpy`. Lines are parsed
+        with `orjson` if it is installed.
+    """
+    cache = MetaCache() if cache is None else cache
+    paths = dataset.get("path", {})
+    train, test = local_path(paths.get("train")), local_path(paths.get("test"))
+    if train is None or not os.path.exists(train):
+        return {}
+    has_test = test is not None and os.path.exists(test)
+
+    if sampling is None:
+        statistics = cache.get(train)
+        lengths, starts = statistics["lengths"], statistics["starts"]
+        meta = {
+            "num_time_series": len(lengths),
+            "series_length": length_statistics(lengths),
+        }
+        test_lengths = cache.get(test)["lengths"] if has_test else None
+    else:
+        sample = cache.sample(train, sampling)
+        lengths, starts = sample.head, sample.starts
+        meta = approximate_statistics(sample)
+        test_lengths = cache.sample(test, sampling).head if has_test else None
+
+    metadata = gluonts_metadata(train)
+    freq = metadata.get("freq") or infer_freq(starts)
+    if freq is not None:
+        meta["freq"] = freq
+
+    prediction_length = metadata.get("prediction_length")
+    if prediction_length is None and test_lengths is not None:
+        prediction_length = infer_prediction_length(lengths, test_lengths)
+    if prediction_length is not None:
+        meta["prediction_length"] = prediction_length
+    return meta
+
+
+def populate_meta(
+    dataset: Dataset,
+    cache: Optional[MetaCache] = None,
+    sampling: Optional[Sampling] = None,
+):
+    """
+    Adds the inferred fields to the `meta` of a dataset, see `infer_meta`.
+    Fields which are already set in the config are kept.
+
+    >>> import os, tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> for name, length in (("train", 10), ("test", 17)):
+    ...     with open(os.path.join(directory, f"{name}.json"), "w") as file:
+    ...         for start in ("2020-01-01 00:00:00", "2020-01-01 03:00:00"):
+    ...             series = {"start": start, "target": [0.0] * length}
+    ...             _ = file.write(json.dumps(series) + "\\n")
+    >>> dataset = Dataset(
+    ...     {
+    ...         "path": {
+    ...             "train": os.path.join(directory, "train.json"),
+    ...             "test": os.path.join(directory, "test.json"),
+    ...         },
+    ...         "meta": {"freq": "2H"},
+    ...     }
+    ... )
+    >>> populate_meta(dataset)
+    >>> meta = dataset["meta"]
+    >>> meta["freq"], meta["num_time_series"], meta["prediction_length"]
+    ('2H', 2, 7)
+    """
+    inferred = infer_meta(dataset, cache, sampling)
+    meta = dataset.get("meta", {})
+    if any(field not in meta for field in inferred):
+        # the meta is replaced rather than changed in place, such that the
+        # cached digest of the dataset is invalidated
+        dataset["meta"] = {**inferred, **meta}
+
+
+def populate_version_meta(
+    version: dict,
+    cache: MetaCache,
+    populated: set,
+    sampling: Optional[Sampling] = None,
+) -> dict:
+    """
+    Calls `populate_meta` on the datasets among the values of a version of
+    a config, which are single datasets or lists of them such as
+    `runtool.datatypes.Datasets`, skipping datasets whose ids are in
+    `populated`.
+    """
+    for value in version.values():
+        if isinstance(value, Dataset):
+            datasets = [value]
+        elif isinstance(value, (list, UserList)) and all(
+            isinstance(item, Dataset) for item in value
+        ):
+            datasets = value
+        else:
+            continue
+        for dataset in datasets:
+            if id(dataset) not in populated:
+                populated.add(id(dataset))
+                populate_meta(dataset, cache, sampling)
+    return version
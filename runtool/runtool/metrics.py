@@ -0,0 +1,299 @@
+import functools
+import os
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, NamedTuple, Tuple, Union
+
+# characters which have a special meaning at the top level of a regex
+METACHARACTERS = frozenset(".^$*+?{}[]|()\\")
+QUANTIFIERS = frozenset("*+?{")
+
+# the minimal length of the common suffix of the literal prefixes of the
+# metrics, for it to be searched for instead of the prefixes
+MIN_ANCHOR = 2
+
+
+def lines_end(text: Union[str, bytes]) -> int:
+    """
+    Returns the position after the last line break in `text`, or 0 if there
+    is none. Carriage returns count as line breaks, since progress bars
+    such as those of tqdm end their updates with them.
+
+    >>> lines_end("epoch 1\\nepoch 2"), lines_end(b"10%\\r20%\\r3")
+    (8, 8)
+    """
+    if isinstance(text, str):
+        return max(text.rfind("\n"), text.rfind("\r")) + 1
+    return max(text.rfind(b"\n"), text.rfind(b"\r")) + 1
+
+
+class MetricsRecord(NamedTuple):
+    """
+    The metrics extracted from the log of an experiment. `values` holds the
+    last value of each metric which was found and `counts` the number of
+    times each of them was reported.
+    """
+
+    values: Dict[str, float]
+    counts: Dict[str, int]
+
+
+def literal_prefix(pattern: re.Pattern) -> str:
+    """
+    Returns the characters which every match of `pattern` starts with, or
+    an empty string if this is not known, e.g. since the pattern ignores
+    case, starts with a group or contains alternatives.
+
+    >>> literal_prefix(re.compile(r"MASE\\): (\\d+\\.\\d+)"))
+    'MASE): '
+    >>> literal_prefix(re.compile(r"(?i)mase"))
+    ''
+    >>> literal_prefix(re.compile(r"epochs?"))
+    'epoch'
+    """
+    regex = pattern.pattern
+    # any "|" is treated as an alternative, even if it is escaped
+    if (
+        pattern.flags & (re.IGNORECASE | re.LOCALE | re.VERBOSE)
+        or "|" in regex
+    ):
+        return ""
+    prefix, index = [], 0
+    while index < len(regex):
+        char = regex[index]
+        if char == "\\":
+            # escaped letters and digits are classes, anchors or references
+            escaped = regex[index + 1 : index + 2]
+            if not escaped or escaped.isalnum() or escaped == "_":
+                break
+            char, index = escaped, index + 2
+        elif char in METACHARACTERS:
+            break
+        else:
+            index += 1
+        if regex[index : index + 1] in QUANTIFIERS:
+            # the last character may be repeated zero times
+            break
+        prefix.append(char)
+    return "".join(prefix)
+
+
+def trie_regex(words: Iterable[str]) -> str:
+    """
+    Returns a regex which matches any of `words`, with the common prefixes
+    of the words factored out, such that the regex engine can discard most
+    positions after looking at a single character.
+
+    >>> trie_regex(["MASE", "MAPE", "ND"])
+    '(?:MA(?:PE|SE)|ND)'
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alternatives = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1 and "" not in node:
+            return alternatives[0]
+        regex = "(?:" + "|".join(alternatives) + ")"
+        return regex + "?" if "" in node else regex
+
+    return build(trie)
+
+
+class MetricScanner:
+    """
+    Extracts all metrics of an algorithm from a log in a single pass, which
+    is considerably faster than searching the log once per metric.
+
+    The literal prefixes of the regexes of the metrics are combined into one
+    regex, which finds the positions in the log where any metric may be
+    reported. If all prefixes end with the same characters, such as
+    `"): "`, the positions are found by searching for these characters
+    instead. The regexes of the metrics are then only tried at these
+    positions. Regexes without a literal prefix are searched for
+    separately. The results are the same as those of searching the log
+    with each regex using `re.findall`.
+
+    Logs are processed as a stream of chunks, see `scan`, where each chunk
+    is split after its last line break or carriage return, see
+    `lines_end`. Matches are therefore assumed not to span several lines.
+
+    >>> scanner = MetricScanner(
+    ...     {"MASE": r"MASE\\): (\\d+\\.\\d+)", "ND": r"ND\\): (\\d+\\.\\d+)"}
+    ... )
+    >>> scanner.scan(["epoch 1 MASE): 0.9\\nepoch 2 MA", "SE): 0.7\\n"])
+    MetricsRecord(values={'MASE': 0.7}, counts={'MASE': 2})
+
+    Parameters
+    ----------
+    metrics
+        The regexes of the metrics, keyed by their names. The first group
+        of each regex captures the value of the metric.
+    """
+
+    def __init__(self, metrics: Dict[str, str]):
+        self.metrics = dict(metrics)
+        self.patterns = {
+            name: re.compile(regex) for name, regex in self.metrics.items()
+        }
+        self.prefixed, self.unprefixed = [], []
+        for name, pattern in self.patterns.items():
+            prefix = literal_prefix(pattern)
+            if prefix:
+                self.prefixed.append((prefix, name, pattern))
+            else:
+                self.unprefixed.append((name, pattern))
+
+        # if all prefixes end with the same characters, such as "): ", the
+        # candidates are found by searching for these characters, which is
+        # much faster than searching for the prefixes themselves
+        self.anchor = os.path.commonprefix(
+            [prefix[::-1] for prefix, _, _ in self.prefixed]
+        )[::-1]
+        # metrics with a literal prefix, grouped by its first character
+        self.by_first = defaultdict(list)
+        for metric in self.prefixed:
+            self.by_first[metric[0][0]].append(metric)
+        self.candidates = (
+            re.compile(trie_regex(prefix for prefix, _, _ in self.prefixed))
+            if self.prefixed
+            else None
+        )
+
+    def matches(self, text: str) -> Tuple[Dict[str, "re.Match"], Dict]:
+        """
+        Returns the last match of each metric in `text` and the number of
+        matches of each metric.
+        """
+        last, counts = {}, defaultdict(int)
+        # end of the last match of each metric, since the matches of a
+        # metric do not overlap, as for `re.findall`
+        ends = defaultdict(int)
+
+        def try_match(prefix, name, pattern, position):
+            if position < ends[name] or not text.startswith(prefix, position):
+                return
+            match = pattern.match(text, position)
+            if match is not None:
+                last[name] = match
+                counts[name] += 1
+                ends[name] = match.end()
+
+        if len(self.anchor) >= MIN_ANCHOR:
+            find, anchor = text.find, len(self.anchor)
+            position = find(self.anchor)
+            while position >= 0:
+                for prefix, name, pattern in self.prefixed:
+                    start = position + anchor - len(prefix)
+                    if start >= 0:
+                        try_match(prefix, name, pattern, start)
+                position = find(self.anchor, position + 1)
+        elif self.candidates is not None:
+            search, position = self.candidates.search, 0
+            while True:
+                candidate = search(text, position)
+                if candidate is None:
+                    break
+                position = candidate.start()
+                for metric in self.by_first[text[position]]:
+                    try_match(*metric, position)
+                position += 1
+
+        for name, pattern in self.unprefixed:
+            for match in pattern.finditer(text):
+                last[name] = match
+                counts[name] += 1
+        return last, counts
+
+    def update(self, record: MetricsRecord, text: str) -> MetricsRecord:
+        """
+        Updates `record` in place with the metrics found in `text`, which
+        should consist of complete lines, and returns it.
+        """
+        last, counts = self.matches(text)
+        for name in self.metrics:
+            if name not in last:
+                continue
+            match = last[name]
+            record.values[name] = float(
+                match.group(1) if match.re.groups else match.group(0)
+            )
+            record.counts[name] = record.counts.get(name, 0) + counts[name]
+        return record
+
+    def scan(self, chunks: Iterable[str]) -> MetricsRecord:
+        """
+        Extracts the metrics from a log given as an iterable of chunks of
+        text, such as the blocks of a file.
+        """
+        record = MetricsRecord({}, {})
+        rest = ""
+        for chunk in chunks:
+            text = rest + chunk
+            end = lines_end(text)
+            self.update(record, text[:end])
+            rest = text[end:]
+        if rest:
+            self.update(record, rest)
+        return record
+
+    def scan_file(
+        self, path: str, chunk_size: int = 1 << 22, encoding: str = "utf-8"
+    ) -> MetricsRecord:
+        """
+        Extracts the metrics from the log file at `path`, reading it in
+        chunks of `chunk_size` characters.
+        """
+        with open(path, encoding=encoding, errors="replace") as log:
+            return self.scan(iter(lambda: log.read(chunk_size), ""))
+
+
+@functools.lru_cache(maxsize=128)
+def cached_scanner(metrics: Tuple[Tuple[str, str], ...]) -> MetricScanner:
+    return MetricScanner(dict(metrics))
+
+
+def metric_scanner(metrics: Dict[str, str]) -> MetricScanner:
+    """
+    Returns a `MetricScanner` for `metrics`, reusing the scanner of
+    previous calls with the same metrics.
+    """
+    return cached_scanner(tuple(metrics.items()))
+
+
+def parse_metrics(log: str, metrics: Dict[str, str]) -> Dict[str, float]:
+    """
+    Extracts metrics from the log of a training job. `metrics` maps the
+    name of each metric to a regex whose first group captures its value,
+    as in the `metrics` of an `runtool.datatypes.Algorithm`. If a metric
+    is reported several times, the last value is used. Metrics which are
+    not found in the log are left out.
+
+    >>> parse_metrics(
+    ...     "epoch 1 MASE): 0.9\\nepoch 2 MASE): 0.7\\n",
+    ...     {"MASE": r"MASE\\): (\\d+\\.\\d+)", "ND": r"ND\\): (\\d+\\.\\d+)"},
+    ... )
+    {'MASE': 0.7}
+
+    Parameters
+    ----------
+    log
+        The text which the job logged.
+    metrics
+        The regexes of the metrics, keyed by their names.
+    Returns
+    -------
+    Dict[str, float]
+        The value of each metric which was found in the log.
+    """
+    return metric_scanner(metrics).update(MetricsRecord({}, {}), log).values
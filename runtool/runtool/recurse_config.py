@@ -1,6 +1,11 @@
+import ast
+from array import array
 from functools import singledispatch
 import itertools
-from typing import Callable, Any
+import operator
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from runtool.utils import freeze
 
 
 class Versions:
@@ -11,15 +16,58 @@ class Versions:
 
     >>> Versions([1, 2, 3])
     Versions([1, 2, 3])
+
+    Versions created by a `$each` with a `$zip` directive are linked to
+    other versions in the same zip group. `groups` then contains, for each
+    version, a dictionary which maps the names of the zip groups to the
+    position of the version in these groups. When versions are combined
+    by `recursive_apply`, only versions at the same position in each group
+    are combined with each other.
+
+    >>> Versions([1, 2], groups=[{"freq": 0}, {"freq": 1}]).groups
+    [{'freq': 0}, {'freq': 1}]
     """
 
-    def __init__(self, versions: list = None):
+    def __init__(self, versions: list = None, groups: List[dict] = None):
         self.__root__ = versions if versions else []
+        self.groups = groups
+        self._positions = None
+
+    def positions(self, name: str, index: int) -> List[int]:
+        """
+        Returns the positions of the versions which are at position
+        `index` in the zip group `name`.
+
+        >>> versions = Versions(
+        ...     ["a", "b", "c"], groups=[{"g": 0}, {"g": 1}, {"g": 1}]
+        ... )
+        >>> versions.positions("g", 1)
+        [1, 2]
+        """
+        return self._index().get((name, index), [])
+
+    def group_names(self) -> List[str]:
+        """
+        Returns the names of the zip groups which the versions belong to.
+        """
+        self._index()
+        return self._group_names
+
+    def _index(self) -> dict:
+        if self._positions is None:
+            self._positions = {}
+            for position, groups in enumerate(self.groups or []):
+                for key in groups.items():
+                    self._positions.setdefault(key, []).append(position)
+            self._group_names = list(
+                dict.fromkeys(name for name, _ in self._positions)
+            )
+        return self._positions
 
     def __repr__(self):
         if len(self) == 1:
             return repr(self[0])
-        return f"Versions({self.__root__})"
+        return f"{type(self).__name__}({list(self)})"
 
     def __getitem__(self, item):
         return self.__root__[item]
@@ -32,13 +80,351 @@ class Versions:
 
     def __eq__(self, other):
         if isinstance(other, Versions):
-            return self.__root__ == other.__root__
+            return len(self) == len(other) and all(
+                this == that for this, that in zip(self, other)
+            )
         return False
 
     def append(self, data: Any):
         self.__root__.append(data)
 
 
+class ColumnarVersions(Versions):
+    """
+    A `Versions` object which stores each distinct value only once.
+
+    Each version is stored as an index into a table of the distinct values.
+    As long as all versions are equal, only the value and the number of
+    versions are stored. Once a second distinct value is appended, the
+    indices are kept in a compact `array.array`.
+
+    >>> versions = ColumnarVersions([{"a": 1}, {"a": 1}, {"a": 2}])
+    >>> versions
+    ColumnarVersions([{'a': 1}, {'a': 1}, {'a': 2}])
+    >>> versions.distinct
+    [{'a': 1}, {'a': 2}]
+    >>> versions == Versions([{"a": 1}, {"a": 1}, {"a": 2}])
+    True
+
+    A `ColumnarVersions` where all versions are equal only stores one value.
+
+    >>> constant = ColumnarVersions([1, 1, 1])
+    >>> constant.is_constant, len(constant), constant.distinct
+    (True, 3, [1])
+    """
+
+    # typecodes used for the indices, ordered by their capacity
+    _typecodes = (("B", 2**8), ("H", 2**16), ("L", 2**32), ("Q", 2**64))
+
+    def __init__(self, versions: list = None):
+        self.groups = None
+        self.distinct = []
+        self._lookup = {}
+        self._length = 0
+        self._indices = None
+        for version in versions or []:
+            self.append(version)
+
+    @property
+    def is_constant(self) -> bool:
+        """
+        True if all versions share the same value.
+        """
+        return self._indices is None
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[index] for index in range(*item.indices(len(self)))]
+        if self._indices is None:
+            if not -self._length <= item < self._length:
+                raise IndexError("ColumnarVersions index out of range")
+            return self.distinct[0]
+        return self.distinct[self._indices[item]]
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        if self._indices is None:
+            return itertools.repeat(self.distinct[0], self._length)
+        return map(self.distinct.__getitem__, self._indices)
+
+    def append(self, data: Any):
+        key = freeze(data)
+        index = self._lookup.get(key)
+        if index is None:
+            index = self._lookup[key] = len(self.distinct)
+            self.distinct.append(data)
+            self._grow_indices()
+
+        if self._indices is not None:
+            self._indices.append(index)
+        self._length += 1
+
+    def _grow_indices(self):
+        """
+        Makes sure that the index array can store an index for each
+        distinct value, switching to a wider typecode when needed.
+        """
+        if len(self.distinct) < 2:
+            return
+        for typecode, capacity in self._typecodes:
+            if len(self.distinct) <= capacity:
+                break
+        if self._indices is None:
+            self._indices = array(typecode, [0]) * self._length
+        elif self._indices.typecode != typecode:
+            self._indices = array(typecode, self._indices)
+
+
+class Constraint:
+    """
+    A python expression from a `$where` directive which has to evaluate to
+    True for a version of a node to be kept. The expression refers to the
+    values of the other keys in the node by their names.
+
+    >>> constraint = Constraint("a > 2 * b")
+    >>> sorted(constraint.names)
+    ['a', 'b']
+    >>> constraint({"a": 3, "b": 1}), constraint({"a": 2, "b": 1})
+    (True, False)
+    """
+
+    def __init__(self, expression: str):
+        if not isinstance(expression, str):
+            raise TypeError(
+                "$where requires a string or a list of strings, not an"
+                f" object of type {type(expression)}"
+            )
+        tree = ast.parse(expression, mode="eval")
+        self.expression = expression
+        self.names = {
+            node.id for node in ast.walk(tree) if isinstance(node, ast.Name)
+        }
+        self._code = compile(tree, "$where", "eval")
+
+    def __call__(self, values: dict) -> bool:
+        return bool(eval(self._code, {}, values))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.expression!r})"
+
+
+def parse_constraints(where: Any) -> List[Constraint]:
+    """
+    Converts the value of a `$where` directive, either a string or a list
+    of strings, into `Constraint` objects.
+
+    >>> parse_constraints("a > 1")
+    [Constraint('a > 1')]
+    >>> parse_constraints(["a > 1", "a < b"])
+    [Constraint('a > 1'), Constraint('a < b')]
+    """
+    if isinstance(where, list):
+        return [Constraint(expression) for expression in where]
+    return [Constraint(where)]
+
+
+def merge_groups(*groups: dict) -> dict:
+    """
+    Merges the zip groups of versions which are combined with each other.
+
+    >>> merge_groups({"a": 0}, None, {"b": 1})
+    {'a': 0, 'b': 1}
+    """
+    result = {}
+    for group in groups:
+        result.update(group or {})
+    return result
+
+
+def candidates(versions: Versions, groups: dict) -> Iterable[int]:
+    """
+    Returns the positions of the versions which are compatible with
+    the positions already chosen in the zip `groups`.
+    """
+    if versions.groups is None:
+        return range(len(versions))
+
+    linked = [name for name in versions.group_names() if name in groups]
+    if not linked:
+        return range(len(versions))
+
+    first, *others = linked
+    return [
+        position
+        for position in versions.positions(first, groups[first])
+        if all(
+            versions.groups[position].get(name) == groups[name]
+            for name in others
+        )
+    ]
+
+
+def versions_product(
+    versioned: List[Tuple[Any, Versions]],
+    fixed: dict = None,
+    constraints: List[Constraint] = (),
+) -> Iterator[Tuple[Dict, dict]]:
+    """
+    Generates the combinations of the versioned children of a node in
+    the same order as `itertools.product` would, together with the zip
+    groups of each combination.
+
+    The children are bound one key at a time. Each constraint is evaluated
+    as soon as all keys it refers to are bound, thus a partial combination
+    which violates a constraint is discarded before any of its completions
+    are generated.
+
+    >>> for combination, _ in versions_product(
+    ...     versioned=[
+    ...         ("a", Versions([1, 2, 3])),
+    ...         ("b", Versions([1, 2])),
+    ...     ],
+    ...     fixed={"c": 1},
+    ...     constraints=[Constraint("a > c"), Constraint("a > 2 * b")],
+    ... ):
+    ...     print(combination)
+    {'a': 3, 'b': 1}
+
+    Children in the same zip group only take the versions which are at the
+    same position in the group, so a group of linked children contributes
+    a single factor to the size of the product.
+
+    >>> for combination, groups in versions_product(
+    ...     versioned=[
+    ...         ("a", Versions([1, 2], groups=[{"g": 0}, {"g": 1}])),
+    ...         ("b", Versions([3, 4], groups=[{"g": 0}, {"g": 1}])),
+    ...     ],
+    ... ):
+    ...     print(combination, groups)
+    {'a': 1, 'b': 3} {'g': 0}
+    {'a': 2, 'b': 4} {'g': 1}
+
+    Parameters
+    ----------
+    versioned
+        Pairs of keys and the `Versions` of the corresponding children.
+    fixed
+        The children of the node which only have one version.
+    constraints
+        The constraints which the combinations need to satisfy.
+    Returns
+    -------
+    Iterator[Tuple[Dict, dict]]
+        The combinations of the versioned children which satisfy
+        the constraints and the positions in the zip groups which
+        each combination was built from.
+    """
+    # the constraints which can be evaluated after binding each key,
+    # constraints which only refer to fixed keys are checked up front
+    position = {key: index for index, (key, _) in enumerate(versioned)}
+    stages = [[] for _ in versioned]
+    values = dict(fixed or {})
+    for constraint in constraints:
+        bound_at = [
+            position[name] for name in constraint.names if name in position
+        ]
+        if bound_at:
+            stages[max(bound_at)].append(constraint)
+        elif not constraint(values):
+            return
+
+    def bind(index: int, groups: dict) -> Iterator[Tuple[Dict, dict]]:
+        if index == len(versioned):
+            yield {key: values[key] for key, _ in versioned}, groups
+            return
+        key, versions = versioned[index]
+        for candidate in candidates(versions, groups):
+            values[key] = versions[candidate]
+            if all(constraint(values) for constraint in stages[index]):
+                yield from bind(
+                    index + 1,
+                    (
+                        groups
+                        if versions.groups is None
+                        else dict(groups, **versions.groups[candidate])
+                    ),
+                )
+
+    yield from bind(0, {})
+
+
+def unchanged(node: dict, new_node: dict) -> bool:
+    """
+    Returns True if `new_node` has the same children as `node`, where the
+    children are compared by identity.
+    """
+    return len(node) == len(new_node) and all(
+        key in new_node and new_node[key] is value
+        for key, value in node.items()
+    )
+
+
+def apply_to_children(
+    node: dict, fn: Callable
+) -> Tuple[List[Tuple[Any, Versions]], dict]:
+    """
+    Calls `recursive_apply` on the children of a `dict` node. Returns the
+    pairs of keys and children which became `Versions` objects, and a new
+    node with the remaining children.
+    """
+    versioned_children = []
+    new_node = {}
+    for key, value in node.items():
+        child = recursive_apply(value, fn)
+        # If the child is a Versions object, map the key to all its versions,
+        # child = Versions([1,2]),
+        # key = ['a']
+        # ->
+        # (('a':1), ('a':2))
+        if isinstance(child, Versions):
+            versioned_children.append((key, child))
+        else:
+            new_node[key] = child
+    return versioned_children, new_node
+
+
+def combine_children(
+    node: dict, versioned_children: List[Tuple[Any, Versions]], new_node: dict
+) -> Tuple[Iterator[Tuple[Dict, dict]], bool]:
+    """
+    Returns an iterator over the combinations of the versioned children
+    of `node`, see `versions_product`, and whether any of the children
+    belong to a zip group. The constraints of a `$where` in `new_node`
+    are removed from it, except for those that `fn` has to handle.
+    """
+    constraints, deferred = [], []
+    if "$where" in new_node:
+        keys = set(node) - {"$each", "$where"}
+        for constraint in parse_constraints(new_node.pop("$where")):
+            if "$each" in node and not constraint.names <= keys:
+                deferred.append(constraint.expression)
+            else:
+                constraints.append(constraint)
+        if deferred:
+            new_node["$where"] = deferred
+
+    zipped = any(child.groups for _, child in versioned_children)
+    if constraints or zipped:
+        return (
+            versions_product(versioned_children, new_node, constraints),
+            zipped,
+        )
+    return (
+        (
+            (dict(version), None)
+            for version in itertools.product(
+                *(
+                    itertools.product([key], child)
+                    for key, child in versioned_children
+                )
+            )
+        ),
+        zipped,
+    )
+
+
 @singledispatch
 def recursive_apply(node, fn: Callable) -> Any:
     """
@@ -51,6 +437,11 @@ def recursive_apply(node, fn: Callable) -> Any:
     NOTE::
         `runtool.datatypes.Versions` represents different versions of an object.
 
+    NOTE::
+        `recursive_apply` does not change `node`. Nodes which neither `fn`
+        nor the recursion change are shared between `node` and the result
+        instead of being copied, thus `fn` must not change its argument.
+
     In the following examples we will transform a JSON structure using
     the `transform` function defined below.
 
@@ -136,25 +527,42 @@ def recursive_apply_dict(node: dict, fn: Callable) -> Any:
     versions is calculated and a new `runtool.datatypes.Versions` object will be
     returned containing the different versions of this node.
 
+    If the node contains a `$where` directive and its children have several
+    versions, only the combinations of the children which satisfy the
+    constraints in `$where` are generated, see `versions_product`.
+    The constraints are evaluated as soon as the children they refer to
+    have been chosen, such that invalid combinations are pruned early.
+
+    >>> def transform(node):
+    ...     if "version" in node:
+    ...         return Versions(node["version"])
+    ...     return node
+    >>> recursive_apply(
+    ...     {
+    ...         "a": {"version": [1, 2, 3]},
+    ...         "b": {"version": [1, 2]},
+    ...         "$where": "a > b",
+    ...     },
+    ...     fn=transform,
+    ... )
+    Versions([{'a': 2, 'b': 1}, {'a': 3, 'b': 1}, {'a': 3, 'b': 2}])
+
+    Constraints which refer to keys which are not part of the node,
+    such as keys added by a `$each` in the same node, are left in `$where`
+    for `fn` to handle.
     """
 
-    # else merge children of type Versions into a new Versions object
-    expanded_children = []
-    new_node = {}
-    for key, value in node.items():
-        child = recursive_apply(value, fn)
-        # If the child is a Versions object, map the key to all its versions,
-        # child = Versions([1,2]),
-        # key = ['a']
-        # ->
-        # (('a':1), ('a':2))
-        if isinstance(child, Versions):
-            expanded_children.append(itertools.product([key], child))
-        else:
-            new_node[key] = child
-    if expanded_children:
+    versioned_children, new_node = apply_to_children(node, fn)
+    if versioned_children:
+        combinations, zipped = combine_children(
+            node, versioned_children, new_node
+        )
+
         # example:
-        # expanded_children = [(('a':1), ('a':2)), (('b':1), ('b':2))]
+        # versioned_children = [
+        #   ('a', Versions([1, 2])),
+        #   ('b', Versions([1, 2])),
+        # ]
         # new_node = {"c": 3}
         # results in:
         # [
@@ -163,21 +571,28 @@ def recursive_apply_dict(node: dict, fn: Callable) -> Any:
         #   {'a':2, 'b':1, 'c':3},
         #   {'a':3, 'b':2, 'c':3},
         # ]
-        new_node = [
-            fn(
-                dict(version_of_node, **new_node)
-            )  # apply fn to the new version of the node
-            for version_of_node in itertools.product(*expanded_children)
-        ]
+        versions, groups = [], []
+        for version_of_node, groups_of_version in combinations:
+            # apply fn to the new version of the node
+            versions.append(fn(dict(version_of_node, **new_node)))
+            groups.append(groups_of_version)
 
         # if the current node generated Versions object, these
         # need to be flattened as well. For example:
         # new_node = [Versions([1,2]), Versions([3,4])]
         # results in
         # Versions([[1,3], [1,4], [2,3], [2,4]])
-        if all(isinstance(val, Versions) for val in new_node):
-            return Versions(list(*itertools.product(*new_node)))
-        return Versions(new_node)
+        if all(isinstance(val, Versions) for val in versions):
+            groups = [
+                merge_groups(outer, inner.groups[0] if inner.groups else None)
+                for outer, inner in zip(groups, versions)
+            ]
+            zipped = any(groups)
+            versions = list(*itertools.product(*versions))
+        return Versions(versions, groups if zipped else None)
+    if unchanged(node, new_node):
+        # share the node instead of a copy of it
+        return fn(node)
     return fn(new_node)
 
 
@@ -200,21 +615,37 @@ def recursive_apply_list(node: list, fn: Callable) -> Any:
             # child = Versions([1,2])
             # ->
             # expanded_child_version = ((index, 1), (index, 2))
-            expanded_child_version = itertools.product([index], child)
-            versions_in_children.append(expanded_child_version)
+            versions_in_children.append((index, child))
         else:
             child_normal[index] = child
 
     if not versions_in_children:
+        if all(map(operator.is_, child_normal, node)):
+            return node
         return child_normal
 
+    zipped = any(child.groups for _, child in versions_in_children)
+    if zipped:
+        combinations = versions_product(versions_in_children)
+    else:
+        combinations = (
+            (version, None)
+            for version in itertools.product(
+                *(
+                    itertools.product([index], child)
+                    for index, child in versions_in_children
+                )
+            )
+        )
+
     # merge the data from the children which were not Versions objects
     # together with the data from the children which were Versions objects
-    new_versions = []
-    for version in itertools.product(*versions_in_children):
+    new_versions, groups = [], []
+    for version, groups_of_version in combinations:
         new_data = child_normal[:]
-        for index, value in version:
+        for index, value in dict(version).items():
             new_data[index] = value
         new_versions.append(new_data)
+        groups.append(groups_of_version)
 
-    return Versions(new_versions)
+    return Versions(new_versions, groups if zipped else None)
@@ -0,0 +1,308 @@
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from runtool.datatypes import Experiment
+from runtool.export import encode
+from runtool.hashing import VOLATILE_KEYS, digest, hash_str, run_digest
+from runtool.utils import flatten
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    hash TEXT PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    hyperparameters TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    experiment TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    hash TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (hash, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS metrics_by_dataset
+    ON metrics (name, dataset, value);
+"""
+
+
+class Result(NamedTuple):
+    """
+    A row of a `ResultsStore`. `dataset` is the canonical hash of the
+    dataset of the experiment and `meta` its `meta` entry, while
+    `hyperparameters` holds the flattened hyperparameters of the algorithm,
+    see `runtool.utils.flatten`.
+    """
+
+    hash: str
+    dataset: str
+    hyperparameters: Dict[str, Any]
+    meta: Dict[str, Any]
+    metrics: Dict[str, float]
+
+
+def dumps(data: Any) -> str:
+    return json.dumps(data, default=encode, sort_keys=True)
+
+
+def json_path(name: str) -> str:
+    """
+    Returns an SQL string literal of the JSON path of a flattened
+    hyperparameter, for use with `json_extract`.
+
+    >>> json_path("context_length")
+    '\\'$."context_length"\\''
+    """
+    if '"' in name:
+        raise ValueError(f"Invalid hyperparameter name: {name!r}")
+    return "'" + f'$."{name}"'.replace("'", "''") + "'"
+
+
+class ResultsStore:
+    """
+    Stores the metrics of experiments which were run in an SQLite database,
+    keyed by the canonical hash of the experiments without volatile keys
+    such as job names, see `runtool.hashing.run_hash`. The store is
+    append-only: adding an experiment which is already stored has no
+    effect.
+
+    Writes are buffered and inserted `batch_size` rows at a time in a single
+    transaction, call `flush` or use the store as a context manager to write
+    the remaining rows. The metrics are indexed by dataset, which makes
+    `best_per_dataset` fast for millions of rows, and indexes on chosen
+    hyperparameters can be added with `index_hyperparameters` to speed up
+    `where`.
+
+    >>> from runtool.datatypes import Algorithms, Datasets
+    >>> experiments = Algorithms(
+    ...     [
+    ...         {
+    ...             "image": "image",
+    ...             "instance": "local",
+    ...             "hyperparameters": {"epochs": epochs},
+    ...         }
+    ...         for epochs in (1, 10)
+    ...     ]
+    ... ) * Datasets([{"path": {}, "meta": {"freq": "D"}}])
+    >>> with ResultsStore() as store:
+    ...     store.add(experiments[0], {"MASE": 0.9})
+    ...     store.add(experiments[1], {"MASE": 0.7})
+    ...     store.index_hyperparameters("epochs")
+    ...     best = store.best_per_dataset("MASE")
+    ...     matching = store.where({"epochs": 1})
+    >>> [result.hyperparameters for result in best.values()]
+    [{'epochs': 10}]
+    >>> [result.metrics for result in matching]
+    [{'MASE': 0.9}]
+
+    Parameters
+    ----------
+    path
+        The path of the database file, per default the database is kept
+        in memory.
+    batch_size
+        The number of results which are buffered before being written.
+    volatile
+        The keys of the nodes of an experiment which are left out of its
+        hash.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        batch_size: int = 1000,
+        volatile: Tuple[str, ...] = VOLATILE_KEYS,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.volatile = volatile
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._results: List[Tuple] = []
+        self._metrics: List[Tuple] = []
+
+    def add(self, experiment: Experiment, metrics: Dict[str, float]):
+        """
+        Adds the metrics of an experiment which was run.
+        """
+        # the digest of the dataset is calculated along with the digest of
+        # the experiment, and is looked up in the memo
+        memo = {}
+        key = run_digest(experiment, memo, self.volatile).hex()
+        dataset = digest(experiment["dataset"], memo).hex()
+        self._results.append(
+            (
+                key,
+                dataset,
+                dumps(
+                    flatten(experiment["algorithm"].get("hyperparameters", {}))
+                ),
+                dumps(experiment["dataset"].get("meta", {})),
+                dumps(experiment),
+            )
+        )
+        self._metrics.extend(
+            (key, dataset, name, float(value))
+            for name, value in metrics.items()
+        )
+        if len(self._results) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, results: Iterable[Tuple[Experiment, Dict[str, float]]]):
+        """
+        Adds the metrics of several experiments, given as pairs of an
+        experiment and its metrics.
+        """
+        for experiment, metrics in results:
+            self.add(experiment, metrics)
+
+    def flush(self):
+        """
+        Writes the buffered results to the database.
+        """
+        if not self._results:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?)",
+                self._results,
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO metrics VALUES (?, ?, ?, ?)",
+                self._metrics,
+            )
+        self._results.clear()
+        self._metrics.clear()
+
+    def index_hyperparameters(self, *names: str):
+        """
+        Creates indexes on the flattened hyperparameters `names`.
+        """
+        self.flush()
+        with self.connection:
+            for name in names:
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS"
+                    f" hyperparameter_{hash_str(name).hex()[:16]}"
+                    f" ON results (json_extract(hyperparameters,"
+                    f" {json_path(name)}))"
+                )
+
+    def __len__(self) -> int:
+        self.flush()
+        (count,) = self.connection.execute(
+            "SELECT COUNT(*) FROM results"
+        ).fetchone()
+        return count
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Returns whether the experiment with the run hash `key` is stored.
+        """
+        self.flush()
+        return (
+            self.connection.execute(
+                "SELECT 1 FROM results WHERE hash = ?", (key,)
+            ).fetchone()
+            is not None
+        )
+
+    def hashes(self) -> Set[str]:
+        """
+        Returns the run hashes of all stored experiments.
+        """
+        self.flush()
+        return {
+            key
+            for (key,) in self.connection.execute("SELECT hash FROM results")
+        }
+
+    def results(self, keys: Iterable[str]) -> List[Result]:
+        """
+        Returns the stored results of the experiments with the run hashes
+        `keys`, in the same order, leaving out unknown hashes.
+        """
+        self.flush()
+        keys = list(keys)
+        rows, metrics = {}, {key: {} for key in keys}
+        # SQLite limits the number of parameters of a query
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            marks = ", ".join("?" * len(chunk))
+            for key, dataset, hyperparameters, meta in self.connection.execute(
+                "SELECT hash, dataset, hyperparameters, meta FROM results"
+                f" WHERE hash IN ({marks})",
+                chunk,
+            ):
+                rows[key] = (
+                    dataset,
+                    json.loads(hyperparameters),
+                    json.loads(meta),
+                )
+            for key, name, value in self.connection.execute(
+                "SELECT hash, name, value FROM metrics"
+                f" WHERE hash IN ({marks})",
+                chunk,
+            ):
+                metrics[key][name] = value
+        return [
+            Result(key, *rows[key], metrics[key])
+            for key in keys
+            if key in rows
+        ]
+
+    def where(self, conditions: Dict[str, Any]) -> List[Result]:
+        """
+        Returns the results whose flattened hyperparameters have the given
+        scalar values.
+        """
+        self.flush()
+        clauses = " AND ".join(
+            f"json_extract(hyperparameters, {json_path(name)}) = ?"
+            for name in conditions
+        )
+        query = "SELECT hash FROM results"
+        if clauses:
+            query += f" WHERE {clauses}"
+        keys = [
+            key
+            for (key,) in self.connection.execute(
+                query, list(conditions.values())
+            )
+        ]
+        return self.results(keys)
+
+    def best_per_dataset(
+        self, metric: str, minimize: bool = True
+    ) -> Dict[str, Result]:
+        """
+        Returns the result with the best value of `metric` for each dataset,
+        keyed by the canonical hash of the dataset.
+        """
+        self.flush()
+        aggregate = "MIN" if minimize else "MAX"
+        # SQLite takes the bare column hash from the row with the min or
+        # max value, which is found using the metrics_by_dataset index
+        rows = self.connection.execute(
+            f"SELECT dataset, hash, {aggregate}(value) FROM metrics"
+            " WHERE name = ? GROUP BY dataset",
+            (metric,),
+        ).fetchall()
+        results = self.results(key for _, key, _ in rows)
+        return {result.dataset: result for result in results}
+
+    def close(self):
+        """
+        Writes the buffered results and closes the database.
+        """
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,161 @@
+import subprocess
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from runtool.datatypes import Experiment
+
+
+class Runner(ABC):
+    """
+    Interface of the objects which run experiments, for example by starting
+    training jobs. A `Runner` runs an `Experiment` and returns the log of
+    the training job, from which metrics can be extracted using the
+    `metrics` of the algorithm, see `runtool.metrics.parse_metrics`.
+
+    Subclasses implement `run`, and can override `run_many` in order to run
+    several experiments concurrently.
+    """
+
+    @abstractmethod
+    def run(self, experiment: Experiment) -> str:
+        """
+        Runs the experiment and returns the log of the training job.
+        """
+
+    def run_many(self, experiments: Iterable[Experiment]) -> List[str]:
+        """
+        Runs the experiments and returns their logs in the same order.
+        Per default the experiments are run one after the other.
+        """
+        return [self.run(experiment) for experiment in experiments]
+
+
+class LocalRunner(Runner):
+    """
+    Runs experiments in the current process by calling `train` with the
+    experiment, which should return the log of the training. This is
+    mainly useful for testing and for cheap models.
+
+    >>> runner = LocalRunner(
+    ...     lambda experiment: f"MASE): {experiment['algorithm']['image']}"
+    ... )
+    >>> runner.run(
+    ...     Experiment.from_nodes(
+    ...         {"image": "0.5", "instance": "local"}, {"path": {}}
+    ...     )
+    ... )
+    'MASE): 0.5'
+    """
+
+    def __init__(self, train: Callable[[Experiment], str]):
+        self.train = train
+
+    def run(self, experiment: Experiment) -> str:
+        return self.train(experiment)
+
+
+class ProcessPoolRunner(Runner):
+    """
+    Runs experiments by calling `train` in a pool of worker processes, such
+    that several experiments can be trained at the same time. `train` and
+    the experiments need to be picklable, i.e. `train` should be defined at
+    the top level of a module.
+
+    The pool is started when the first experiment is run and is shut down
+    by `close`, or when the runner is used as a context manager.
+
+    Parameters
+    ----------
+    train
+        Function which trains an experiment and returns the log.
+    max_workers
+        The number of worker processes, defaults to the number of CPUs.
+    """
+
+    def __init__(
+        self,
+        train: Callable[[Experiment], str],
+        max_workers: Optional[int] = None,
+    ):
+        self.train = train
+        self.max_workers = max_workers
+        self._pool = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers)
+        return self._pool
+
+    def run(self, experiment: Experiment) -> str:
+        return self.pool.submit(self.train, experiment).result()
+
+    def run_many(self, experiments: Iterable[Experiment]) -> List[str]:
+        return list(self.pool.map(self.train, experiments))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "ProcessPoolRunner":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SubprocessRunner(Runner):
+    """
+    Runs experiments as subprocesses. `command` converts an experiment to
+    the arguments of the process, whose combined stdout and stderr is
+    returned as the log of the experiment.
+
+    >>> import sys
+    >>> runner = SubprocessRunner(
+    ...     lambda experiment: [
+    ...         sys.executable,
+    ...         "-c",
+    ...         f"print('instance: {experiment['algorithm']['instance']}')",
+    ...     ]
+    ... )
+    >>> runner.run(
+    ...     Experiment.from_nodes(
+    ...         {"image": "", "instance": "local"}, {"path": {}}
+    ...     )
+    ... )
+    'instance: local\\n'
+
+    Parameters
+    ----------
+    command
+        Returns the arguments of the process which runs an experiment.
+    timeout
+        The number of seconds after which a process is killed.
+    check
+        Whether to raise a `subprocess.CalledProcessError` if the process
+        exits with a non-zero return code.
+    """
+
+    def __init__(
+        self,
+        command: Callable[[Experiment], Sequence[str]],
+        timeout: Optional[float] = None,
+        check: bool = True,
+    ):
+        self.command = command
+        self.timeout = timeout
+        self.check = check
+
+    def run(self, experiment: Experiment) -> str:
+        completed = subprocess.run(
+            self.command(experiment),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            timeout=self.timeout,
+        )
+        if self.check:
+            completed.check_returncode()
+        return completed.stdout
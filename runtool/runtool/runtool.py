@@ -1,11 +1,13 @@
-from functools import singledispatch
+from functools import partial, singledispatch
 from pathlib import Path
-from typing import Any, Dict, Iterable, Union
+from typing import Any, Dict, Iterable, Optional, Union
 from collections import defaultdict
 
 import yaml
 from toolz import valmap
 
+from runtool import meta
+from runtool.budget import Budget
 from runtool.datatypes import (
     Algorithm,
     Algorithms,
@@ -15,7 +17,7 @@ from runtool.datatypes import (
     Experiment,
     Experiments,
 )
-from runtool.recurse_config import Versions
+from runtool.recurse_config import ColumnarVersions, Versions
 from runtool.transformer import apply_transformations
 from functools import singledispatch
 
@@ -132,15 +134,59 @@ def infer_type_dict(node: dict) -> Union[Algorithm, Dataset, Experiment, dict]:
     """
     for class_ in (Algorithm, Dataset, Experiment):
         if class_.verify(node):
-            return class_(node)
+            return class_.from_verified(node)
     return node
 
 
-def infer_types(data: dict) -> dict:
-    return valmap(infer_type, data)
+def infer_type_cached(node: Any, cache: dict) -> Any:
+    """
+    Calls `infer_type` on the node unless the same node object has already
+    been inferred, in which case the cached result is returned.
+
+    The `cache` maps the `id` of a node to the node itself and its inferred
+    value. The node is kept in the cache so that its `id` cannot be reused
+    by another object while the cache is alive.
+
+    >>> cache = {}
+    >>> algorithm = {"image": "", "instance": ""}
+    >>> first = infer_type_cached(algorithm, cache)
+    >>> first is infer_type_cached(algorithm, cache)
+    True
+    """
+    if not isinstance(node, (dict, list)):
+        return infer_type(node)
+
+    cached = cache.get(id(node))
+    if cached is None:
+        cached = cache[id(node)] = (node, infer_type(node))
+    return cached[1]
 
 
-def generate_versions(data: Iterable[dict]) -> Dict[Any, Versions]:
+def infer_types(data: dict, cache: Optional[dict] = None) -> dict:
+    """
+    Calls `infer_type` on each value in `data`.
+
+    If a `cache` is passed, values which are shared between several calls
+    are only inferred once, see `infer_type_cached`. This is useful when
+    inferring the types of many versions of a config which share subtrees.
+
+    >>> cache = {}
+    >>> dataset = {"path": {}}
+    >>> versions = [
+    ...     infer_types({"ds": dataset, "n": 1}, cache),
+    ...     infer_types({"ds": dataset, "n": 2}, cache),
+    ... ]
+    >>> versions[0]["ds"] is versions[1]["ds"]
+    True
+    """
+    if cache is None:
+        return valmap(infer_type, data)
+    return valmap(partial(infer_type_cached, cache=cache), data)
+
+
+def generate_versions(
+    data: Iterable[dict], columnar: bool = False
+) -> Dict[Any, Versions]:
     """
     Converts an Iterable collection of dictionaries to a single dictionary
     where each value is a `runtool.datatypes.Versions` object.
@@ -162,27 +208,60 @@ def generate_versions(data: Iterable[dict]) -> Dict[Any, Versions]:
     ...     ]
     ... )
     {'a': Versions([1, 2]), 'b': 3}
+
+    If `columnar` is set, the values are stored in
+    `runtool.recurse_config.ColumnarVersions` objects instead. These store
+    each distinct value of a key only once, which keeps the memory usage
+    proportional to the number of distinct values rather than the number
+    of versions.
+
+    >>> columns = generate_versions(
+    ...     [{"a": 1, "b": {"c": 2}}] * 1000 + [{"a": 2, "b": {"c": 2}}],
+    ...     columnar=True,
+    ... )
+    >>> columns["a"].distinct, columns["b"].distinct
+    ([1, 2], [{'c': 2}])
+    >>> columns["b"].is_constant
+    True
     """
 
     # creates a new Versions object for any new keys and appends
     # the value to the created Versions object
-    result = defaultdict(Versions)
+    result = defaultdict(ColumnarVersions if columnar else Versions)
     for dct in data:
         for key, value in dct.items():
             result[key].append(value)
     return dict(result)
 
 
-def load_config(path: Union[str, Path]) -> DotDict:
+def load_config(
+    path: Union[str, Path],
+    columnar: bool = False,
+    budget: Optional[Budget] = None,
+    processes: Optional[int] = None,
+    infer_meta: Union[bool, meta.Sampling] = False,
+) -> DotDict:
     """
     Loads a yaml file from the provided path and calls converts it
     to a dictionary and then calls `transform_config` on the data.
     """
     with open(path) as config_file:
-        return transform_config(yaml.safe_load(config_file))
-
-
-def transform_config(config: dict) -> DotDict:
+        return transform_config(
+            yaml.safe_load(config_file),
+            columnar,
+            budget,
+            processes,
+            infer_meta,
+        )
+
+
+def transform_config(
+    config: dict,
+    columnar: bool = False,
+    budget: Optional[Budget] = None,
+    processes: Optional[int] = None,
+    infer_meta: Union[bool, meta.Sampling] = False,
+) -> DotDict:
     """
     This function applies a series of transformations to a runtool config
     before converting it into a DotDict. The config is transformed through
@@ -233,7 +312,40 @@ def transform_config(config: dict) -> DotDict:
     True
 
     Finally, the dict is converted to a DotDict and returned.
+
+    Setting `columnar` stores the versions as
+    `runtool.recurse_config.ColumnarVersions`, see `generate_versions`.
+
+    The `budget` limits the expansion of the config, see
+    `runtool.transformer.apply_transformations`. If the versions are
+    spilled to disk, they are read back one at a time while the result is
+    built, combining this with `columnar` keeps the result compact.
+    Setting `processes` transforms the top-level keys of the config in a
+    pool of processes.
+
+    Setting `infer_meta` fills in the `meta` of each dataset with local
+    data files, such as its `freq` and `prediction_length`, unless these
+    are given in the config, see `runtool.meta.populate_meta`. Thus
+    `$trial.dataset.meta` expressions can use them. If `infer_meta` is a
+    `runtool.meta.Sampling`, approximate statistics are estimated from a
+    sample of the series instead.
     """
-    return DotDict(
-        generate_versions(map(infer_types, apply_transformations(config)))
+    versions = map(
+        partial(infer_types, cache={}),
+        apply_transformations(config, budget, processes),
     )
+    if infer_meta:
+        versions = map(
+            partial(
+                meta.populate_version_meta,
+                cache=meta.MetaCache(),
+                populated=set(),
+                sampling=(
+                    infer_meta
+                    if isinstance(infer_meta, meta.Sampling)
+                    else None
+                ),
+            ),
+            versions,
+        )
+    return DotDict(generate_versions(versions, columnar))
@@ -0,0 +1,248 @@
+import itertools
+import math
+from typing import Any, Dict, Iterable, List, NamedTuple, Union
+
+from runtool.datatypes import Experiment
+from runtool.metrics import parse_metrics
+from runtool.runners import Runner
+from runtool.utils import replace_item_at_path
+
+Number = Union[int, float]
+
+
+class Trial(NamedTuple):
+    """
+    The result of running an experiment with a certain budget.
+    `experiment` is the experiment with the budget already set.
+    """
+
+    experiment: Experiment
+    budget: Number
+    metrics: Dict[str, float]
+
+
+def score(trial: Trial, metric: str, minimize: bool) -> float:
+    """
+    Returns the value of `metric` of the trial such that lower is better.
+    Trials where the metric is missing, for example because the training
+    failed, get the worst possible score.
+    """
+    value = trial.metrics.get(metric, math.inf if minimize else -math.inf)
+    return value if minimize else -value
+
+
+def run_rung(
+    experiments: List[Experiment],
+    runner: Runner,
+    budget_path: str,
+    budget: Number,
+) -> List[Trial]:
+    """
+    Runs each experiment with the value at `budget_path` set to `budget`.
+    """
+    configured = [
+        replace_item_at_path(experiment, budget_path, budget)
+        for experiment in experiments
+    ]
+    return [
+        Trial(
+            experiment,
+            budget,
+            parse_metrics(log, experiment["algorithm"].get("metrics", {})),
+        )
+        for experiment, log in zip(configured, runner.run_many(configured))
+    ]
+
+
+def successive_halving(
+    experiments: Iterable[Experiment],
+    runner: Runner,
+    budget_path: str,
+    metric: str,
+    min_budget: Number,
+    max_budget: Number,
+    eta: int = 3,
+    minimize: bool = True,
+) -> List[Trial]:
+    """
+    Runs the experiments with successive halving. All experiments are first
+    run with `min_budget`, thereafter only the best `1 / eta` of them are run
+    again with `eta` times the budget. This is repeated until a single
+    experiment remains or `max_budget` is reached.
+
+    The budget is a value in the experiments, given by `budget_path`, such as
+    the number of epochs, `algorithm.hyperparameters.epochs`. The experiments
+    are ranked by `metric`, which is extracted from the log of each run using
+    the `metrics` regexes of the algorithm.
+
+    >>> from runtool.datatypes import Algorithms, Dataset
+    >>> from runtool.runners import LocalRunner
+    >>> experiments = Algorithms(
+    ...     [
+    ...         {
+    ...             "image": "image",
+    ...             "instance": "local",
+    ...             "hyperparameters": {"learning_rate": rate},
+    ...             "metrics": {"loss": r"loss: (\\d+\\.\\d+)"},
+    ...         }
+    ...         for rate in (0.1, 0.01, 0.001)
+    ...     ]
+    ... ) * Dataset({"path": {}})
+    >>> def train(experiment):
+    ...     hyperparameters = experiment["algorithm"]["hyperparameters"]
+    ...     loss = hyperparameters["learning_rate"] / hyperparameters["epochs"]
+    ...     return f"loss: {loss:.6f}"
+    >>> trials = successive_halving(
+    ...     experiments,
+    ...     LocalRunner(train),
+    ...     budget_path="algorithm.hyperparameters.epochs",
+    ...     metric="loss",
+    ...     min_budget=1,
+    ...     max_budget=9,
+    ... )
+    >>> [(trial.budget, trial.metrics["loss"]) for trial in trials]
+    [(1, 0.1), (1, 0.01), (1, 0.001), (3, 0.000333)]
+
+    Parameters
+    ----------
+    experiments
+        The experiments which should be run.
+    runner
+        Runs the experiments, see `runtool.runners.Runner`.
+    budget_path
+        The path of the budget in each experiment, see
+        `runtool.utils.get_item_from_path`.
+    metric
+        The name of the metric which the experiments are ranked by.
+    min_budget
+        The budget of the first round.
+    max_budget
+        The largest budget any experiment is run with.
+    eta
+        The factor by which the budget grows and the number of
+        experiments shrinks each round.
+    minimize
+        Whether lower values of the metric are better.
+    Returns
+    -------
+    List[Trial]
+        All trials which were run, in the order in which they were run.
+    """
+    if eta < 2:
+        raise ValueError(f"eta needs to be at least 2, got {eta}")
+
+    remaining, budget, trials = list(experiments), min_budget, []
+    while remaining:
+        rung = run_rung(remaining, runner, budget_path, budget)
+        trials.extend(rung)
+        if len(rung) == 1 or budget >= max_budget:
+            break
+
+        ranked = sorted(rung, key=lambda trial: score(trial, metric, minimize))
+        promoted = {id(trial) for trial in ranked[: max(1, len(rung) // eta)]}
+        # the experiments keep their order between rounds
+        remaining = [
+            experiment
+            for trial, experiment in zip(rung, remaining)
+            if id(trial) in promoted
+        ]
+        budget = min(budget * eta, max_budget)
+    return trials
+
+
+def hyperband(
+    experiments: Iterable[Experiment],
+    runner: Runner,
+    budget_path: str,
+    metric: str,
+    min_budget: Number,
+    max_budget: Number,
+    eta: int = 3,
+    minimize: bool = True,
+) -> List[Trial]:
+    """
+    Runs the experiments with Hyperband, which runs `successive_halving`
+    in several brackets. The first bracket starts many experiments with
+    `min_budget`, while each following bracket starts fewer experiments
+    with a larger budget, ending with a bracket which runs a few
+    experiments with `max_budget` only. This hedges against metrics which
+    are misleading for small budgets.
+
+    Each bracket takes the next experiments from `experiments`, starting
+    over from the first experiment when all have been used.
+
+    >>> from runtool.datatypes import Algorithms, Dataset
+    >>> from runtool.runners import LocalRunner
+    >>> experiments = Algorithms(
+    ...     [
+    ...         {
+    ...             "image": "image",
+    ...             "instance": "local",
+    ...             "hyperparameters": {"learning_rate": rate / 100},
+    ...             "metrics": {"loss": r"loss: (\\d+\\.\\d+)"},
+    ...         }
+    ...         for rate in range(1, 10)
+    ...     ]
+    ... ) * Dataset({"path": {}})
+    >>> def train(experiment):
+    ...     hyperparameters = experiment["algorithm"]["hyperparameters"]
+    ...     loss = hyperparameters["learning_rate"] / hyperparameters["epochs"]
+    ...     return f"loss: {loss:.6f}"
+    >>> trials = hyperband(
+    ...     experiments,
+    ...     LocalRunner(train),
+    ...     budget_path="algorithm.hyperparameters.epochs",
+    ...     metric="loss",
+    ...     min_budget=1,
+    ...     max_budget=9,
+    ... )
+    >>> [trial.budget for trial in trials]
+    [1, 1, 1, 1, 1, 1, 1, 1, 1, 3, 3, 3, 9, 3, 3, 3, 3, 3, 9, 9, 9, 9]
+
+    The parameters are the same as for `successive_halving`.
+    """
+    if eta < 2:
+        raise ValueError(f"eta needs to be at least 2, got {eta}")
+
+    experiments = list(experiments)
+    if not experiments:
+        return []
+
+    # the number of brackets is the number of times the budget can grow
+    # by a factor eta from min_budget to max_budget
+    s_max = 0
+    while min_budget * eta ** (s_max + 1) <= max_budget:
+        s_max += 1
+
+    source = itertools.cycle(experiments)
+    trials = []
+    for s in range(s_max, -1, -1):
+        count = math.ceil((s_max + 1) / (s + 1) * eta**s)
+        trials.extend(
+            successive_halving(
+                itertools.islice(source, count),
+                runner,
+                budget_path,
+                metric,
+                min_budget=min_budget * eta ** (s_max - s),
+                max_budget=max_budget,
+                eta=eta,
+                minimize=minimize,
+            )
+        )
+    return trials
+
+
+def best_trial(
+    trials: Iterable[Trial], metric: str, minimize: bool = True
+) -> Any:
+    """
+    Returns the trial with the best value of `metric` among the trials
+    with the largest budget.
+    """
+    trials = list(trials)
+    largest = max(trial.budget for trial in trials)
+    return min(
+        (trial for trial in trials if trial.budget == largest),
+        key=lambda trial: score(trial, metric, minimize),
+    )
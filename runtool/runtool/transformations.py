@@ -7,8 +7,16 @@ from typing import Any, Callable, Tuple
 from uuid import uuid4
 
 from runtool.datatypes import DotDict
-from runtool.utils import get_item_from_path, update_nested_dict
-from runtool.recurse_config import recursive_apply, Versions
+from runtool.utils import (
+    get_item_from_path,
+    update_nested_dict,
+    without_keys,
+)
+from runtool.recurse_config import (
+    parse_constraints,
+    recursive_apply,
+    Versions,
+)
 
 
 def apply_from(node: dict, context: dict) -> dict:
@@ -36,7 +44,7 @@ def apply_from(node: dict, context: dict) -> dict:
     if not (isinstance(node, dict) and "$from" in node):
         return node
 
-    source = get_item_from_path(context, node.pop("$from"))
+    source = get_item_from_path(context, node["$from"])
 
     # resolve any $from in the node we inherit from
     # this is to avoid updating the node with a new $from
@@ -46,7 +54,7 @@ def apply_from(node: dict, context: dict) -> dict:
         source, dict
     ), "$from can only be used to inherit from a dict"
 
-    return update_nested_dict(source, node)
+    return update_nested_dict(source, without_keys(node, "$from"))
 
 
 def apply_ref(node: dict, context: dict) -> Any:
@@ -252,8 +260,7 @@ def apply_eval(node: dict, locals: dict) -> Any:
         return apply_eval(evaluate(text, locals), locals)
     except NameError as error:
         if "__trial__" in str(error):
-            node["$eval"] = text
-            return node
+            return {"$eval": text}
         else:
             raise error
 
@@ -354,6 +361,33 @@ def apply_each(node: dict) -> Versions:
     ... )
     Versions([{'a': 1}, {'b': 2, 'c': 3, 'a': 1}])
 
+    Versions which do not satisfy the constraints in `$where` are dropped.
+    The constraints can refer to any key of the generated versions.
+
+    >>> apply_each(
+    ...     {
+    ...         "a": 1,
+    ...         "$each": [{"b": 0}, {"b": 2}, {"b": 3}],
+    ...         "$where": "b > a",
+    ...     }
+    ... )
+    Versions([{'b': 2, 'a': 1}, {'b': 3, 'a': 1}])
+
+    Several `$each` which have the same name in `$zip` are linked with each
+    other, such that they take their values in lockstep instead of
+    being combined with each other. The versions then record their
+    position in the zip group, see `runtool.recurse_config.Versions`.
+
+    >>> versions = apply_each({"$each": [24, 48], "$zip": "frequency"})
+    >>> versions, versions.groups
+    (Versions([24, 48]), [{'frequency': 0}, {'frequency': 1}])
+
+    A node with `$where` but without `$each` is removed if it does not
+    satisfy the constraints, by returning an empty `Versions` object.
+
+    >>> apply_each({"a": 1, "$where": ["a > 0", "a < 1"]})
+    Versions([])
+
     Parameters
     ----------
     node
@@ -364,16 +398,55 @@ def apply_each(node: dict) -> Versions:
     runtool.datatypes.Versions
         The versions object representing the different values of the node.
     """
-    if not (isinstance(node, dict) and "$each" in node):
+    if not isinstance(node, dict):
+        return node
+
+    if "$where" in node:
+        constraints = parse_constraints(node["$where"])
+        versions = apply_each(without_keys(node, "$where"))
+        if not isinstance(versions, Versions):
+            versions = Versions([versions])
+        if not all(isinstance(version, dict) for version in versions):
+            raise TypeError(
+                "$where can only be used on nodes whose versions are"
+                f" dictionaries. The error occured in:\n{node}"
+            )
+        kept = [
+            position
+            for position, version in enumerate(versions)
+            if all(constraint(version) for constraint in constraints)
+        ]
+        return Versions(
+            [versions[position] for position in kept],
+            (
+                None
+                if versions.groups is None
+                else [versions.groups[position] for position in kept]
+            ),
+        )
+
+    if "$each" not in node:
+        if "$zip" in node:
+            raise TypeError(
+                f"$zip can only be used together with $each:\n{node}"
+            )
         return node
 
-    each = node.pop("$each")
+    each = node["$each"]
     if not isinstance(each, list):
         raise TypeError(
             f"$each requires a list, not an object of type {type(each)}"
         )
 
-    # Generate versions of the current node
+    group = node.get("$zip")
+    if group is not None and not isinstance(group, str):
+        raise TypeError(
+            f"$zip requires a string, not an object of type {type(group)}"
+        )
+
+    # Generate versions of the current node, the node itself is not changed
+    # and versions which do not differ from it share its values
+    rest = without_keys(node, "$each", "$zip")
     versions = []
     for item in each:
         if item == "$None":
@@ -381,26 +454,29 @@ def apply_each(node: dict) -> Versions:
             # node = {"a": 1, "$each": ["$None"]}
             # ==>
             # {"a": 1}
-            versions.append(node)
+            versions.append(rest)
         elif isinstance(item, dict):
             # merge node with value in $each
             # node = {"a": 1, "$each": [{"b: 2"}]}
             # ==>
             # {"a": 1, "b": 2}
-            item.update(node)
-            versions.append(item)
+            versions.append({**item, **rest})
         else:
             # any other value overwrites the node if node is
             # otherwise empty.
             # node = {"$each": [2]}
             # ==>
             # 2
-            if node:
-                node["$each"] = each
+            if rest:
                 raise TypeError(
                     "Using $each in a non-empty node is only supported"
                     " when using dictionaries or with the $None operator."
                     f" The error occured in:\n{node}"
                 )
             versions.append(item)
-    return Versions(versions)
+
+    if group is None:
+        return Versions(versions)
+    return Versions(
+        versions, groups=[{group: index} for index in range(len(versions))]
+    )
@@ -1,6 +1,24 @@
+import ast
+import re
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
 
-from runtool.recurse_config import recursive_apply, Versions
+from runtool.budget import (
+    Budget,
+    SpilledVersions,
+    combine_counts,
+    count_groups,
+    count_versions,
+    enforce_budget,
+    total_count,
+)
+from runtool.recurse_config import (
+    Versions,
+    apply_to_children,
+    combine_children,
+    recursive_apply,
+)
 from runtool.transformations import (
     apply_eval,
     apply_from,
@@ -9,8 +27,212 @@ from runtool.transformations import (
     apply_each,
 )
 
+# matches the first key of paths in $eval expressions, i.e. `a` in `$.a.b`,
+# in `$["a"]` or in `$['a.b']`
+EVAL_REFERENCE = re.compile(
+    r"""\$(?:\.(\w+)|\[(?:"([^"]*)"|'([^']*)'|(\d+))\])"""
+)
+# matches any reference to the config in $eval expressions
+EVAL_ROOT = re.compile(r"\$(?!trial\b)")
+# returned by `references` if an expression refers to the config in a way
+# which is not understood, such that it may depend on any key
+ALL_KEYS = object()
+# replaces the references parsed by `EVAL_REFERENCE` before the names in an
+# expression are collected
+REFERENCE_NAME = "__reference__"
+
+
+def references(node: Any) -> Set[Any]:
+    """
+    Returns the top-level keys which `$from`, `$ref` and `$eval` in `node`
+    refer to. Since the top-level keys are available as variables in
+    `$eval` expressions, all names used in an expression are returned as
+    well. If an `$eval` expression refers to the config in a way which
+    cannot be parsed, such as `$[name]`, the result contains `ALL_KEYS`.
+
+    >>> sorted(
+    ...     references(
+    ...         {
+    ...             "$from": "base.nested",
+    ...             "a": [{"$ref": "other"}],
+    ...             "b": {"$eval": "$.c * $['d'] + $['my-key'] + $trial.e"},
+    ...             "c": {"$eval": "f.g * 2"},
+    ...         }
+    ...     )
+    ... )
+    ['base', 'c', 'd', 'f', 'my-key', 'other']
+    >>> ALL_KEYS in references({"$eval": "$[name]"})
+    True
+    """
+    if isinstance(node, list):
+        return set().union(*map(references, node))
+    if not isinstance(node, dict):
+        return set()
+
+    result = set().union(*map(references, node.values()))
+    for directive in ("$from", "$ref"):
+        if isinstance(node.get(directive), str):
+            result.add(node[directive].split(".")[0])
+    if "$eval" in node:
+        text = str(node["$eval"])
+        result.update(
+            next(group for group in match.groups() if group is not None)
+            for match in EVAL_REFERENCE.finditer(text)
+        )
+        text = EVAL_REFERENCE.sub(REFERENCE_NAME, text)
+        text = text.replace("$trial", "__trial__")
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except SyntaxError:
+            tree = None
+        if tree is None or EVAL_ROOT.search(text):
+            result.add(ALL_KEYS)
+        else:
+            result.update(
+                name.id
+                for name in ast.walk(tree)
+                if isinstance(name, ast.Name)
+                and name.id not in (REFERENCE_NAME, "__trial__")
+            )
+    return result
+
+
+def dependency_graph(data: dict) -> Dict[Any, Set]:
+    """
+    Returns the top-level keys of `data` that each top-level key refers to
+    through `$from`, `$ref` or `$eval`. A key with an `$eval` expression
+    whose references cannot be parsed depends on all other keys.
+
+    >>> dependency_graph(
+    ...     {
+    ...         "base": {"a": 1},
+    ...         "algorithm": {"$from": "base"},
+    ...         "dataset": {"b": {"$eval": "$.algorithm.a + 1"}},
+    ...     }
+    ... )
+    {'base': set(), 'algorithm': {'base'}, 'dataset': {'algorithm'}}
+    """
+    graph = {}
+    for key, value in data.items():
+        keys = references(value)
+        graph[key] = set(data) if ALL_KEYS in keys else keys & data.keys()
+    return graph
+
+
+def closure(graph: Dict[Any, Set], key: Any) -> Set:
+    """
+    Returns `key` and all keys which it depends on in the `graph`.
+
+    >>> sorted(closure({"a": {"b"}, "b": {"c"}, "c": set(), "d": set()}, "a"))
+    ['a', 'b', 'c']
+    """
+    result, stack = set(), [key]
+    while stack:
+        current = stack.pop()
+        if current not in result:
+            result.add(current)
+            stack.extend(graph[current])
+    return result
+
+
+def transform_key(key: Any, data: dict) -> Tuple[Any, Tuple[int, dict]]:
+    """
+    Applies `apply_from`, `apply_eval` and `apply_each` to `data[key]`,
+    where `data` contains the top-level keys which `key` depends on. The
+    dependencies are resolved again for each key which depends on them,
+    which repeats work if many keys share expensive dependencies. Returns
+    the transformed value together with the number of versions it was
+    expected to have, see `runtool.budget.count_groups`.
+    """
+    data = recursive_apply(data, partial(apply_from, context=data))
+    data = recursive_apply(data, partial(apply_eval, locals=data))
+    return recursive_apply(data[key], apply_each), count_groups(data[key])
+
 
-def apply_transformations(data: dict) -> list:
+def transform_parallel(
+    data: dict, processes: int
+) -> Tuple[List[Tuple[Any, Versions]], dict, int]:
+    """
+    Transforms each top-level key of `data` in a separate process, see
+    `transform_key`. Each process receives the key together with the
+    keys it depends on, see `dependency_graph`.
+
+    Returns the keys which have several versions, the remaining keys
+    as a new node and the number of versions which the product of the
+    keys is expected to have.
+    """
+    graph = dependency_graph(data)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {}
+        for key in data:
+            dependencies = closure(graph, key)
+            futures[key] = executor.submit(
+                transform_key,
+                key,
+                {
+                    name: value
+                    for name, value in data.items()
+                    if name in dependencies
+                },
+            )
+        results = {key: future.result() for key, future in futures.items()}
+
+    versioned_children, new_node, counts = [], {}, []
+    for key, (child, count) in results.items():
+        if isinstance(child, Versions):
+            versioned_children.append((key, child))
+        else:
+            new_node[key] = child
+        if key not in ("$each", "$zip", "$where"):
+            counts.append(count)
+    expected = total_count(*combine_counts(data, counts))
+    return versioned_children, new_node, expected
+
+
+def iterate_versions(data: dict) -> Iterator[dict]:
+    """
+    Applies `apply_each` and `apply_ref` to `data` and yields the versions
+    of it one at a time. The children of `data` are expanded up front
+    while the product of the children, which is usually what makes a
+    config large, is generated lazily.
+
+    >>> versions = iterate_versions(
+    ...     {"a": {"$each": [1, 2]}, "b": {"$each": [3, 4]}, "c": {"$ref": "a"}}
+    ... )
+    >>> next(versions)
+    {'a': 1, 'b': 3, 'c': 1}
+    >>> len(list(versions))
+    3
+    """
+    yield from iterate_combinations(data, *apply_to_children(data, apply_each))
+
+
+def iterate_combinations(
+    data: dict, versioned_children: List[Tuple[Any, Versions]], new_node: dict
+) -> Iterator[dict]:
+    """
+    Yields the versions of `data` given its children after `apply_each`
+    has been applied to them, see `runtool.recurse_config.combine_children`.
+    """
+    if versioned_children:
+        combinations, _ = combine_children(data, versioned_children, new_node)
+        versions = (
+            apply_each(dict(combination, **new_node))
+            for combination, _ in combinations
+        )
+    else:
+        versions = [apply_each(new_node)]
+
+    for version in versions:
+        for item in version if isinstance(version, Versions) else [version]:
+            yield recursive_apply(item, partial(apply_ref, context=item))
+
+
+def apply_transformations(
+    data: dict,
+    budget: Optional[Budget] = None,
+    processes: Optional[int] = None,
+) -> Union[List, SpilledVersions]:
     """
     Applies a chain of transformations converting nodes in `data` using
 
@@ -33,22 +255,72 @@ def apply_transformations(data: dict) -> list:
     {'a': {'smth': 49, 'msg': 'hi'}, 'base': {'msg': 'hi'}, 'b': ['hi']}
     {'a': {'smth': 2, 'msg': 'hi'}, 'base': {'msg': 'hi'}, 'b': ['hi']}
 
+    The number of versions and their size can be limited with a
+    `runtool.budget.Budget`. The number of versions is checked before
+    `apply_each` expands the config, while the size of the versions is
+    tracked as they are generated, see `iterate_versions`.
+
+    >>> from runtool.budget import Budget, BudgetExceededError
+    >>> config = {"a": {"$each": list(range(1000))}}
+    >>> try:
+    ...     apply_transformations(config, Budget(max_versions=100))
+    ... except BudgetExceededError as error:
+    ...     print("too large")
+    too large
+
+    If the budget allows it, the versions are instead written to a
+    temporary file which is read whenever the versions are iterated over.
+
+    >>> spilled = apply_transformations(
+    ...     config, Budget(max_versions=100, spill=True)
+    ... )
+    >>> spilled  # doctest: +ELLIPSIS
+    SpilledVersions(..., length=1000)
+    >>> sum(version["a"] for version in spilled)
+    499500
+
+    If `processes` is set, the top-level keys of `data` are transformed
+    concurrently in a pool with this many processes, see
+    `transform_parallel`. This gives the same result as transforming
+    them serially.
+
+    >>> config = {
+    ...     "base": {"epochs": {"$each": [1, 2]}},
+    ...     "a": {"$from": "base", "name": "a"},
+    ...     "b": {"$from": "base", "name": {"$eval": "$.a.name * 2"}},
+    ... }
+    >>> apply_transformations(config, processes=2) == apply_transformations(
+    ...     config
+    ... )
+    True
+
     Parameters
     ----------
     data
         The dictionary which should be transformed
+    budget
+        Limits the number of versions and the memory they may use.
+    processes
+        The number of processes which transform the top-level keys, by
+        default all keys are transformed in the current process.
     Returns
     -------
-    list
+    Union[List, runtool.budget.SpilledVersions]
         the transformed `data` where each item is a version of the data.
+        A `runtool.budget.SpilledVersions` object is returned if the
+        versions were written to disk.
     """
-    data = recursive_apply(data, partial(apply_from, context=data))
-    data = recursive_apply(data, partial(apply_eval, locals=data))
-    data = recursive_apply(data, apply_each)
-
-    data = list(data) if isinstance(data, Versions) else [data]
-    data = [
-        recursive_apply(item, partial(apply_ref, context=item))
-        for item in data
-    ]
-    return data
+    if processes is not None:
+        versioned_children, new_node, expected = transform_parallel(
+            data, processes
+        )
+        versions = iterate_combinations(data, versioned_children, new_node)
+    else:
+        data = recursive_apply(data, partial(apply_from, context=data))
+        data = recursive_apply(data, partial(apply_eval, locals=data))
+        expected = count_versions(data)
+        versions = iterate_versions(data)
+
+    if budget is None:
+        return list(versions)
+    return enforce_budget(versions, budget, expected)
@@ -1,4 +1,7 @@
-from typing import Union, Any
+import copy
+from collections import UserList
+from collections.abc import Mapping
+from typing import Any, Hashable, Union
 
 
 def get_item_from_path(data: Union[dict, list], path: str) -> Any:
@@ -27,10 +30,44 @@ def get_item_from_path(data: Union[dict, list], path: str) -> Any:
     return data
 
 
+def replace_item_at_path(
+    data: Union[dict, list], path: str, value: Any
+) -> Any:
+    """
+    Returns a copy of `data` where the item at `path` is replaced with
+    `value`. Only the dictionaries and lists along the path are copied,
+    dictionaries which are missing along the path are created.
+
+    >>> data = {"algorithm": {"hyperparameters": {"epochs": 1}}, "b": [1]}
+    >>> new = replace_item_at_path(data, "algorithm.hyperparameters.epochs", 9)
+    >>> new
+    {'algorithm': {'hyperparameters': {'epochs': 9}}, 'b': [1]}
+    >>> data["algorithm"]["hyperparameters"]["epochs"], new["b"] is data["b"]
+    (1, True)
+
+    The type of the copied dictionaries is kept, thus `runtool.datatypes.Node`
+    objects along the path are copied as `Node` objects.
+    """
+    key, _, rest = path.partition(".")
+    if isinstance(data, list):
+        key = int(key)
+        result = list(data)
+    else:
+        result = copy.copy(data)
+
+    if rest:
+        child = data[key] if isinstance(data, list) else data.get(key, {})
+        value = replace_item_at_path(child, rest, value)
+    result[key] = value
+    return result
+
+
 def update_nested_dict(data: dict, to_update: dict) -> dict:
     """
     Returns an updated version of the `data` dict updated with any changes from the `to_update` dict.
     This behaves differently from the builting`dict.update` method, see the example below.
+    Neither `data` nor `to_update` are changed, dictionaries in `data`
+    which are not updated are shared with the returned dictionary.
 
     Example using `update_nested_dict`:
 
@@ -38,6 +75,8 @@ def update_nested_dict(data: dict, to_update: dict) -> dict:
     >>> to_update = {"root": {"smth": {"hello" : "world"}}}
     >>> update_nested_dict(data, to_update)
     {'root': {'smth': {'hello': 'world'}, 'smth_else': 20}}
+    >>> data
+    {'root': {'smth': 10, 'smth_else': 20}}
 
     Example using the builtin `dict.update`:
     >>> data.update(to_update)
@@ -55,12 +94,118 @@ def update_nested_dict(data: dict, to_update: dict) -> dict:
     dict
         The updated dictionary.
     """
+    result = dict(data) if isinstance(data, dict) else {}
     for key, value in to_update.items():
-        if isinstance(data, dict):
-            if isinstance(value, dict):
-                data[key] = update_nested_dict(data.get(key, {}), value)
-            else:
-                data[key] = to_update[key]
+        if isinstance(value, dict):
+            result[key] = update_nested_dict(result.get(key, {}), value)
         else:
-            data = {key: to_update[key]}
+            result[key] = value
+    return result
+
+
+def without_keys(data: dict, *keys: Hashable) -> dict:
+    """
+    Returns a copy of `data` without the given `keys`.
+
+    >>> without_keys({"$each": [1, 2], "a": 1, "b": 2}, "$each", "b")
+    {'a': 1}
+    """
+    return {key: value for key, value in data.items() if key not in keys}
+
+
+def freeze(data: Any) -> Hashable:
+    """
+    Converts a JSON-like structure into a hashable representation which can
+    be used as a key in a `dict` or `set`. Two structures which compare equal
+    and have the same types are frozen into the same value, independent of
+    the insertion order of any dictionaries.
+
+    >>> freeze({"a": 1, "b": [1, 2]}) == freeze({"b": [1, 2], "a": 1})
+    True
+
+    The type of each value is part of its frozen representation, thus values
+    which python considers equal such as `1` and `True` are kept apart.
+
+    >>> freeze({"a": 1}) == freeze({"a": True})
+    False
+
+    Lists such as `runtool.datatypes.Datasets` are frozen like `list`.
+
+    >>> from collections import UserList
+    >>> freeze(UserList([1, 2])) == freeze(UserList([1, 2]))
+    True
+
+    Parameters
+    ----------
+    data
+        The structure which should be frozen.
+    Returns
+    -------
+    Hashable
+        A hashable value representing `data`.
+    """
+    if isinstance(data, Mapping):
+        return (
+            type(data),
+            frozenset((key, freeze(value)) for key, value in data.items()),
+        )
+    elif isinstance(data, (list, tuple, UserList)):
+        return (type(data), tuple(map(freeze, data)))
+    return (type(data), data)
+
+
+def equality_key(data: Any) -> Hashable:
+    """
+    Converts a JSON-like structure into a hashable value, such that two
+    structures which compare equal with `==` have equal keys. Unlike
+    `freeze`, the types of the values are ignored, thus `10` and `10.0`, or
+    a `dict` and a `runtool.datatypes.Node` with the same content, have
+    the same key.
+
+    >>> equality_key({"a": 10, "b": [1]}) == equality_key(
+    ...     {"b": [1], "a": 10.0}
+    ... )
+    True
+    >>> equality_key(10) == equality_key("10")
+    False
+    """
+    if isinstance(data, Mapping):
+        return (
+            Mapping,
+            frozenset(
+                (key, equality_key(value)) for key, value in data.items()
+            ),
+        )
+    elif isinstance(data, (list, tuple, UserList)):
+        return (list, tuple(map(equality_key, data)))
     return data
+
+
+def flatten(data: Mapping, prefix: str = "") -> dict:
+    """
+    Flattens nested dictionaries into a single dictionary. The keys of the
+    flattened dictionary are the paths to the values in the nested
+    dictionaries, joined by '.' as in `get_item_from_path`.
+
+    >>> flatten({"a": {"b": 1, "c": [1, {"d": 2}]}, "e": 2})
+    {'a.b': 1, 'a.c': [1, {'d': 2}], 'e': 2}
+
+    Parameters
+    ----------
+    data
+        The dictionary which should be flattened.
+    prefix
+        A path which is prepended to each key.
+    Returns
+    -------
+    dict
+        The flattened dictionary.
+    """
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, Mapping):
+            flat.update(flatten(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
@@ -8,5 +8,6 @@ setup(
     description="Gluonts run tool package",
     include_package_data=True,
     install_requires=["PyYAML", "pydantic", "toolz"],
+    extras_require={"parquet": ["pyarrow"], "meta": ["numpy", "orjson"]},
     entry_points={},
 )
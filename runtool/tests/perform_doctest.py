@@ -1,18 +1,46 @@
 from doctest import testmod
 
 from runtool import (
+    budget,
+    datacache,
     datatypes,
+    dispatcher,
+    executor,
+    export,
+    hashing,
+    ingestion,
+    journal,
+    memoization,
+    meta,
+    metrics,
     recurse_config,
+    results,
+    runners,
     runtool,
+    scheduler,
     transformations,
     transformer,
     utils,
 )
 
 for module in (
+    budget,
+    datacache,
     datatypes,
+    dispatcher,
+    executor,
+    export,
+    hashing,
+    ingestion,
+    journal,
+    memoization,
+    meta,
+    metrics,
     recurse_config,
+    results,
+    runners,
     runtool,
+    scheduler,
     transformations,
     transformer,
     utils,
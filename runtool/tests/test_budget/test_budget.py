@@ -0,0 +1,113 @@
+import copy
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+
+from runtool.budget import (
+    Budget,
+    BudgetExceededError,
+    SpilledVersions,
+    count_versions,
+)
+from runtool.runtool import transform_config
+from runtool.transformer import apply_transformations
+
+TEST_DATA = Path(__file__).parents[1] / "test_transformations" / "test_data"
+
+GRID = {
+    "base": {"image": "gluonts", "instance": "ml.m5.xlarge"},
+    "algorithm": {
+        "$from": "base",
+        "hyperparameters": {
+            "epochs": {"$each": [10, 20, 30]},
+            "context_length": {"$each": [12, 24]},
+        },
+    },
+    "dataset": {
+        "path": {"train": {"$each": ["s3://bucket/a", "s3://bucket/b"]}},
+        "meta": {"$ref": "algorithm.hyperparameters"},
+    },
+}
+
+
+def load_source(name):
+    with open(TEST_DATA / name / "source.yml") as source:
+        return yaml.safe_load(source)
+
+
+@pytest.mark.parametrize(
+    "name", ["simple_example", "large_example", "complex_example"]
+)
+def test_count_versions(name):
+    config = load_source(name)
+    assert count_versions(config) == len(
+        apply_transformations(copy.deepcopy(config))
+    )
+
+
+def test_count_versions_zip_and_where():
+    config = {
+        "a": {"$each": [1, 2, 3], "$zip": "g"},
+        "b": {"$each": [4, 5], "$zip": "g"},
+        "c": {"d": {"$each": [1, 2, 3]}, "$where": "d > 1"},
+    }
+    # $where is assumed to keep every version
+    assert count_versions(config) == 6
+    assert len(apply_transformations(config)) == 4
+
+
+def test_max_versions_checked_before_expansion():
+    # expanding this config would generate 10 ** 12 versions
+    config = {str(index): {"$each": list(range(10))} for index in range(12)}
+    with pytest.raises(BudgetExceededError):
+        apply_transformations(config, Budget(max_versions=10**6))
+
+
+def test_max_bytes():
+    config = {"a": {"$each": list(range(1000))}, "b": "x" * 1000}
+    with pytest.raises(BudgetExceededError):
+        apply_transformations(config, Budget(max_bytes=10**5))
+
+    assert len(apply_transformations(config, Budget(max_bytes=10**7))) == (
+        1000
+    )
+
+
+@pytest.mark.parametrize(
+    "budget",
+    [
+        Budget(max_versions=2, spill=True),
+        Budget(max_bytes=1000, spill=True),
+    ],
+)
+def test_spill(budget, tmp_path):
+    budget.directory = tmp_path
+    expected = apply_transformations(copy.deepcopy(GRID))
+
+    spilled = apply_transformations(copy.deepcopy(GRID), budget)
+    assert isinstance(spilled, SpilledVersions)
+    assert len(spilled) == len(expected)
+    assert list(spilled) == expected
+    # the versions can be iterated over several times
+    assert list(spilled) == expected
+
+    assert os.listdir(tmp_path) == [os.path.basename(spilled.path)]
+    spilled.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_within_budget_returns_list():
+    config = load_source("simple_example")
+    assert apply_transformations(
+        copy.deepcopy(config), Budget(max_versions=1000, max_bytes=10**7)
+    ) == apply_transformations(config)
+
+
+def test_transform_config_spill():
+    assert transform_config(
+        copy.deepcopy(GRID),
+        columnar=True,
+        budget=Budget(max_versions=1, spill=True),
+    ) == transform_config(copy.deepcopy(GRID))
@@ -0,0 +1,176 @@
+import os
+import threading
+
+import pytest
+
+from runtool.datacache import DatasetCache, FakeObjectStore, Fetcher
+from runtool.datatypes import Dataset
+
+
+def make_cache(tmp_path, objects=None, **kwargs):
+    store = FakeObjectStore(objects, latency=kwargs.pop("latency", 0.0))
+    cache = DatasetCache(
+        str(tmp_path / "cache"), fetchers={"s3": store}, **kwargs
+    )
+    return cache, store
+
+
+def test_local_file(tmp_path):
+    path = tmp_path / "train.json"
+    path.write_bytes(b"abc")
+    cache, _ = make_cache(tmp_path)
+    local = cache.path(str(path))
+    assert local != str(path)
+    assert open(local, "rb").read() == b"abc"
+    assert cache.path(f"file://{path}") == local
+    assert (cache.hits, cache.fetches) == (0, 2)
+    assert cache.path(str(path)) == local
+    assert cache.hits == 1
+
+    # a changed file is fetched again
+    path.write_bytes(b"abcd")
+    os.utime(path, ns=(0, 0))
+    assert open(cache.path(str(path)), "rb").read() == b"abcd"
+
+
+def test_content_addressed(tmp_path):
+    cache, store = make_cache(
+        tmp_path, {"s3://a/train.json": b"data", "s3://b/train.json": b"data"}
+    )
+    assert cache.path("s3://a/train.json") == cache.path("s3://b/train.json")
+    assert len(cache.blobs) == 1
+    assert cache.size == 4
+
+    store.put("s3://a/train.json", b"other")
+    assert cache.path("s3://a/train.json") != cache.path("s3://b/train.json")
+    assert store.reads["s3://a/train.json"] == 2
+
+
+def test_concurrent_fetches(tmp_path):
+    cache, store = make_cache(
+        tmp_path, {"s3://a/train.json": b"data"}, latency=0.2
+    )
+    paths = []
+    threads = [
+        threading.Thread(
+            target=lambda: paths.append(cache.path("s3://a/train.json"))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.reads["s3://a/train.json"] == 1
+    assert len(set(paths)) == 1 and len(paths) == 8
+
+
+def test_failed_fetch(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        cache.path("s3://a/missing.json")
+    with pytest.raises(ValueError):
+        cache.path("gs://a/train.json")
+    assert not [
+        name for name in os.listdir(cache.directory) if name.endswith(".tmp")
+    ]
+
+
+def test_lru_eviction(tmp_path):
+    objects = {f"s3://a/{index}": bytes([index]) * 100 for index in range(3)}
+    cache, store = make_cache(tmp_path, objects, max_bytes=250)
+    cache.path("s3://a/0")
+    cache.path("s3://a/1")
+    cache.path("s3://a/0")
+    cache.path("s3://a/2")
+    assert cache.size == 200
+    assert set(cache.uris) == {"s3://a/0", "s3://a/2"}
+    assert len(os.listdir(os.path.join(cache.directory, "blobs"))) == 2
+
+    cache.path("s3://a/1")
+    assert set(cache.uris) == {"s3://a/2", "s3://a/1"}
+    assert store.reads["s3://a/1"] == 2
+
+
+def test_eviction_while_fetching(tmp_path, monkeypatch):
+    objects = {"s3://a/train.json": b"data", "s3://b/train.json": b"data"}
+    cache, _ = make_cache(tmp_path, objects)
+    cache.path("s3://a/train.json")
+    cache.max_bytes = 0
+    replace, threads = os.replace, []
+
+    def replace_and_evict(source, target):
+        replace(source, target)
+        if os.path.dirname(target).endswith("blobs"):
+            # another thread evicts the copy right after it was written
+            def evict():
+                with cache._lock:
+                    cache.evict()
+
+            threads.append(threading.Thread(target=evict))
+            threads[-1].start()
+            threads[-1].join(timeout=0.2)
+
+    monkeypatch.setattr(os, "replace", replace_and_evict)
+    cache.path("s3://b/train.json")
+    for thread in threads:
+        thread.join()
+    for digest in cache.blobs:
+        assert os.path.exists(cache.blob_path(digest))
+
+
+def test_open_pins(tmp_path):
+    objects = {f"s3://a/{index}": bytes([index]) * 100 for index in range(3)}
+    cache, _ = make_cache(tmp_path, objects, max_bytes=150)
+    with cache.open("s3://a/0") as data:
+        assert data[:3] == b"\0\0\0"
+        cache.path("s3://a/1")
+        # the opened file is kept although it is least recently used
+        assert set(cache.uris) == {"s3://a/0", "s3://a/1"}
+        assert data[99] == 0
+    assert set(cache.uris) == {"s3://a/1"}
+    assert not cache.pins
+
+
+def test_open_empty(tmp_path):
+    cache, _ = make_cache(tmp_path, {"s3://a/empty": b""})
+    with cache.open("s3://a/empty") as data:
+        assert data == b""
+
+
+def test_persistent_index(tmp_path):
+    cache, store = make_cache(tmp_path, {"s3://a/train.json": b"data"})
+    path = cache.path("s3://a/train.json")
+    reopened = DatasetCache(cache.directory, fetchers={"s3": store})
+    assert reopened.path("s3://a/train.json") == path
+    assert store.reads["s3://a/train.json"] == 1
+
+    os.remove(path)
+    reopened = DatasetCache(cache.directory, fetchers={"s3": store})
+    assert reopened.uris == {}
+
+
+def test_localize(tmp_path):
+    cache, _ = make_cache(tmp_path, {"s3://a/train.json": b"data"})
+    dataset = Dataset(
+        {
+            "path": {"train": "s3://a/train.json", "test": str(tmp_path)},
+            "meta": {"freq": "D"},
+        }
+    )
+    localized = cache.localize(dataset)
+    assert localized["path"] == {
+        "train": cache.path("s3://a/train.json"),
+        "test": str(tmp_path),
+    }
+    assert localized["meta"] == {"freq": "D"}
+    assert dataset["path"]["train"] == "s3://a/train.json"
+
+
+def test_fetcher_requires_version_and_read():
+    class OnlyRead(Fetcher):
+        def read(self, uri):
+            yield b""
+
+    with pytest.raises(TypeError):
+        OnlyRead()
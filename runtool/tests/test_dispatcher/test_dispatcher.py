@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+
+from runtool.datatypes import Algorithms, Datasets
+from runtool.dispatcher import (
+    Backend,
+    Dispatcher,
+    FakeBackend,
+    ThrottlingError,
+    TokenBucket,
+)
+
+EXPERIMENTS = Algorithms(
+    [
+        {
+            "image": "gluonts",
+            "instance": "ml.m5.xlarge",
+            "hyperparameters": {"index": index},
+        }
+        for index in range(40)
+    ]
+) * Datasets([{"path": {"train": "s3://bucket/electricity"}}])
+
+
+def test_submissions_keep_order():
+    backend = FakeBackend(latency=0.001)
+    submissions = Dispatcher(backend, rate=10_000).submit_all(EXPERIMENTS)
+    assert [submission.experiment for submission in submissions] == list(
+        EXPERIMENTS
+    )
+    assert all(submission.error is None for submission in submissions)
+    assert sorted(submission.job_id for submission in submissions) == sorted(
+        f"job-{index}" for index in range(len(EXPERIMENTS))
+    )
+
+
+def test_in_flight_window():
+    backend = FakeBackend(latency=0.005)
+    Dispatcher(backend, rate=10_000, max_in_flight=5).submit_all(EXPERIMENTS)
+    assert backend.max_in_flight == 5
+    assert len(backend.submitted) == len(EXPERIMENTS)
+
+
+def test_rate_limit():
+    backend = FakeBackend()
+    start = time.monotonic()
+    Dispatcher(backend, rate=200, burst=1).submit_all(EXPERIMENTS[:21])
+    # after the first token, each submission waits 1 / rate seconds
+    assert time.monotonic() - start >= 20 / 200 * 0.9
+
+
+def test_backoff_on_throttling():
+    backend = FakeBackend(quota=400, burst=5)
+    dispatcher = Dispatcher(
+        backend, rate=10_000, max_in_flight=8, backoff=0.005, seed=0
+    )
+    submissions = dispatcher.submit_all(EXPERIMENTS)
+    assert backend.throttled > 0
+    assert all(submission.error is None for submission in submissions)
+    assert max(submission.attempts for submission in submissions) > 1
+    assert len(backend.submitted) == len(EXPERIMENTS)
+
+
+def test_retry_after_and_give_up():
+    backend = FakeBackend(quota=0.001, burst=1, retry_after=0.001)
+    submissions = Dispatcher(
+        backend, rate=10_000, max_in_flight=2, max_attempts=3
+    ).submit_all(EXPERIMENTS[:3])
+    assert [submission.job_id for submission in submissions].count(
+        "job-0"
+    ) == 1
+    failed = [s for s in submissions if s.error is not None]
+    assert len(failed) == 2
+    assert all(isinstance(s.error, ThrottlingError) for s in failed)
+    assert all(s.attempts == 3 for s in failed)
+
+
+def test_other_errors_are_not_retried():
+    class BrokenBackend(Backend):
+        def __init__(self):
+            self.calls = 0
+
+        async def submit(self, experiment):
+            self.calls += 1
+            raise ValueError("invalid image")
+
+    backend = BrokenBackend()
+    submissions = Dispatcher(backend, rate=10_000).submit_all(EXPERIMENTS[:4])
+    assert backend.calls == 4
+    assert all(isinstance(s.error, ValueError) for s in submissions)
+
+
+def test_backend_requires_submit():
+    class Incomplete(Backend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_token_bucket():
+    now = [0.0]
+    bucket = TokenBucket(rate=10, capacity=3, clock=lambda: now[0])
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0] * 3
+    assert bucket.try_acquire() == pytest.approx(0.1)
+    now[0] = 10.0
+    # the bucket never holds more than its capacity
+    assert [bucket.try_acquire() for _ in range(4)][-1] > 0
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_dispatch_inside_event_loop():
+    async def main():
+        return await Dispatcher(FakeBackend(), rate=1000).dispatch([])
+
+    assert asyncio.run(main()) == []
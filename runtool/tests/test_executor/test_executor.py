@@ -0,0 +1,225 @@
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from runtool.datatypes import Algorithms, Datasets, Experiment
+from runtool.executor import Executor
+from runtool.runners import (
+    LocalRunner,
+    ProcessPoolRunner,
+    SubprocessRunner,
+)
+from runtool.scheduler import successive_halving
+
+INSTANCES = ["ml.p3.2xlarge", "ml.m5.xlarge", "ml.p3.2xlarge", "ml.c5.large"]
+
+EXPERIMENTS = Algorithms(
+    [
+        {
+            "image": "gluonts",
+            "instance": instance,
+            "hyperparameters": {"index": index, "epochs": 1},
+            "metrics": {"loss": r"loss: (\d+\.\d+)"},
+        }
+        for index, instance in enumerate(INSTANCES * 3)
+    ]
+) * Datasets([{"path": {"train": "s3://bucket/electricity"}}])
+
+
+class ConcurrencyRecorder:
+    """
+    Simulates a training job which takes a short while, recording the
+    largest number of jobs running at the same time per instance type.
+    """
+
+    def __init__(self, duration=0.02):
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.running = Counter()
+        self.peak = Counter()
+        self.total_peak = 0
+
+    def __call__(self, experiment: Experiment) -> str:
+        instance = experiment["algorithm"]["instance"]
+        with self.lock:
+            self.running[instance] += 1
+            self.peak[instance] = max(
+                self.peak[instance], self.running[instance]
+            )
+            self.total_peak = max(self.total_peak, sum(self.running.values()))
+        time.sleep(self.duration)
+        with self.lock:
+            self.running[instance] -= 1
+        index = experiment["algorithm"]["hyperparameters"]["index"]
+        return f"loss: {index / 10:.1f}"
+
+
+def train(experiment: Experiment) -> str:
+    hyperparameters = experiment["algorithm"]["hyperparameters"]
+    return f"loss: {hyperparameters['index'] / hyperparameters['epochs']}"
+
+
+def test_results_keep_order():
+    executor = Executor(LocalRunner(train), concurrency=3)
+    runs = executor.execute(EXPERIMENTS)
+    assert [run.experiment for run in runs] == list(EXPERIMENTS)
+    assert [run.log for run in runs] == [
+        f"loss: {float(index)}" for index in range(len(EXPERIMENTS))
+    ]
+
+
+def test_concurrency_and_slots_are_respected():
+    recorder = ConcurrencyRecorder()
+    executor = Executor(
+        LocalRunner(recorder),
+        concurrency=3,
+        slots={"ml.p3.2xlarge": 1, "ml.m5.xlarge": 2},
+    )
+    executor.execute(EXPERIMENTS)
+    assert recorder.total_peak <= 3
+    assert recorder.peak["ml.p3.2xlarge"] == 1
+    assert recorder.peak["ml.m5.xlarge"] <= 2
+    assert executor.stats.max_in_flight == 3
+
+
+def test_busy_instance_does_not_block_others():
+    recorder = ConcurrencyRecorder()
+    experiments = Algorithms(
+        [
+            {"image": "a", "instance": instance, "hyperparameters": {}}
+            for instance in ["gpu"] * 4 + ["cpu"] * 4
+        ]
+    ) * Datasets([{"path": {}}])
+    for index, experiment in enumerate(experiments):
+        experiment["algorithm"]["hyperparameters"]["index"] = index
+
+    executor = Executor(LocalRunner(recorder), concurrency=4, slots={"gpu": 1})
+    runs = executor.execute(experiments)
+    assert recorder.peak["gpu"] == 1
+    # the cpu experiments run while the gpu experiments wait for the slot
+    assert recorder.peak["cpu"] > 1
+    first_cpu = min(run.started for run in runs[4:])
+    assert first_cpu < runs[1].started
+
+
+def test_lookahead_reads_lazily_and_keeps_slots_busy():
+    done = threading.Event()
+    read = []
+
+    def straggle(experiment):
+        index = experiment["algorithm"]["hyperparameters"]["index"]
+        if index == 0:
+            # finishes only once all other experiments were started
+            assert done.wait(timeout=5)
+        elif index == len(EXPERIMENTS) - 1:
+            done.set()
+        return ""
+
+    def experiments():
+        for experiment in EXPERIMENTS:
+            read.append(len(read))
+            yield experiment
+
+    started = []
+    executor = Executor(LocalRunner(straggle), concurrency=2)
+    runs = executor.execute(
+        experiments(),
+        on_start=lambda index: started.append((index, len(read))),
+        lookahead=1,
+    )
+    assert all(run.error is None for run in runs)
+    assert executor.stats.max_in_flight == 2
+    # at most one experiment is read ahead of the started ones
+    assert all(count <= index + 2 for index, count in started)
+
+
+def test_submitted_when_started_by_the_executor():
+    recorder = ConcurrencyRecorder(duration=0.05)
+    executor = Executor(LocalRunner(recorder), concurrency=1)
+    runs = executor.execute(EXPERIMENTS[:3])
+    # each run is submitted once the previous one finished
+    for previous, run in zip(runs, runs[1:]):
+        assert run.submitted >= previous.finished
+        assert run.waited < 0.05
+
+
+def test_failures_are_recorded():
+    def failing(experiment):
+        if experiment["algorithm"]["instance"] == "ml.c5.large":
+            raise RuntimeError("out of memory")
+        return train(experiment)
+
+    executor = Executor(LocalRunner(failing), concurrency=2)
+    runs = executor.execute(EXPERIMENTS)
+    failed = [run for run in runs if run.error is not None]
+    assert len(failed) == 3
+    assert all(isinstance(run.error, RuntimeError) for run in failed)
+    assert executor.stats.failures == 3
+    assert executor.run_many(EXPERIMENTS)[3] == ""
+
+    with pytest.raises(RuntimeError):
+        executor.run(EXPERIMENTS[3])
+
+
+def test_stats():
+    executor = Executor(LocalRunner(ConcurrencyRecorder()), concurrency=4)
+    executor.execute(EXPERIMENTS)
+    stats = executor.stats
+    assert stats.runs == len(EXPERIMENTS)
+    assert stats.failures == 0
+    assert stats.throughput > 0
+    assert 0 < stats.latency_p50 <= stats.latency_p95 <= stats.latency_max
+    assert stats.per_instance == {
+        "ml.p3.2xlarge": 6,
+        "ml.m5.xlarge": 3,
+        "ml.c5.large": 3,
+    }
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        Executor(LocalRunner(train), slots={"gpu": 0})
+
+
+def test_process_pool_runner():
+    with ProcessPoolRunner(train, max_workers=2) as runner:
+        executor = Executor(runner, concurrency=2)
+        logs = executor.run_many(EXPERIMENTS)
+        assert logs == runner.run_many(EXPERIMENTS)
+    assert logs[5] == "loss: 5.0"
+
+
+def test_subprocess_runner():
+    runner = SubprocessRunner(
+        lambda experiment: [
+            sys.executable,
+            "-c",
+            "import sys; print(sys.argv[1])",
+            experiment["algorithm"]["instance"],
+        ]
+    )
+    assert Executor(runner, concurrency=2).run_many(EXPERIMENTS[:4]) == [
+        instance + "\n" for instance in INSTANCES
+    ]
+
+    failing = SubprocessRunner(
+        lambda experiment: [sys.executable, "-c", "raise SystemExit(1)"]
+    )
+    with pytest.raises(subprocess.CalledProcessError):
+        failing.run(EXPERIMENTS[0])
+
+
+def test_executor_as_scheduler_runner():
+    trials = successive_halving(
+        EXPERIMENTS,
+        Executor(LocalRunner(train), concurrency=4),
+        budget_path="algorithm.hyperparameters.epochs",
+        metric="loss",
+        min_budget=1,
+        max_budget=9,
+    )
+    assert trials[-1].metrics["loss"] == 0.0
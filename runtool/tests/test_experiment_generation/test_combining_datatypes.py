@@ -2,10 +2,13 @@ import pytest
 from runtool.datatypes import (
     Algorithm,
     Algorithms,
+    CompactExperiments,
     Dataset,
     Datasets,
     Experiment,
     Experiments,
+    ExperimentsProduct,
+    LazyExperiments,
 )
 
 ALGORITHM = Algorithm(
@@ -150,3 +153,90 @@ def test_experiments_mul():
             EXPERIMENTS(2),
         ),
     )
+
+
+def test_product_is_lazy():
+    product = ALGORITHMS(1000) * DATASETS(1000)
+    assert isinstance(product, ExperimentsProduct)
+    assert len(product) == 1_000_000
+    assert product._data is None
+    assert product[123_456] == EXPERIMENT
+    assert product[-1] == EXPERIMENT
+    assert product[10:15] == EXPERIMENTS(5)
+    assert product._data is None
+
+
+def test_compare_with_product_is_lazy():
+    product = ALGORITHMS(100) * DATASETS(100)
+    assert Experiments.__eq__(EXPERIMENTS(10_000), product)
+    assert not Experiments.__eq__(EXPERIMENTS(10), product)
+    assert EXPERIMENTS(10_000) == product
+    assert list(EXPERIMENTS(10_000)) == product
+    assert product._data is None
+
+
+def test_lazy_experiments_are_abstract():
+    class Incomplete(LazyExperiments):
+        def _length(self) -> int:
+            return 0
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_product_order():
+    algorithms = Algorithms(
+        [dict(ALGORITHM, image=str(index)) for index in range(3)]
+    )
+    datasets = Datasets(
+        [dict(DATASET, meta={"i": index}) for index in range(2)]
+    )
+    expected = [
+        Experiment.from_nodes(algorithm, dataset)
+        for algorithm in algorithms
+        for dataset in datasets
+    ]
+    assert list(algorithms * datasets) == expected
+    assert [(algorithms * datasets)[index] for index in range(6)] == expected
+
+
+def test_product_plus():
+    product = ALGORITHMS(2) * DATASETS(2)
+    assert isinstance(product + product, ExperimentsProduct)
+    assert product + product == EXPERIMENTS(8)
+    assert product + EXPERIMENT == EXPERIMENTS(5)
+    assert EXPERIMENT + product == EXPERIMENTS(5)
+    assert EXPERIMENTS(2) + product == EXPERIMENTS(6)
+    assert isinstance(EXPERIMENTS(2) + product, ExperimentsProduct)
+
+
+def test_product_materializes_on_mutation():
+    product = ALGORITHMS(2) * DATASET
+    product.append(EXPERIMENT)
+    assert len(product) == 3
+    assert product == EXPERIMENTS(3)
+
+
+def test_compact_experiments():
+    product = ALGORITHMS(10) * DATASETS(10)
+    compact = product.compact()
+    assert isinstance(compact, CompactExperiments)
+    assert compact == product
+    assert len(compact.algorithms) == 1
+    assert len(compact.datasets) == 1
+    assert compact[:3] == EXPERIMENTS(3)
+
+
+def test_compact_experiments_keeps_other_items():
+    experiment = Experiment(dict(EXPERIMENT, name="my_experiment"))
+    compact = CompactExperiments([experiment, EXPERIMENT])
+    assert compact[0]["name"] == "my_experiment"
+    assert compact == Experiments([experiment, EXPERIMENT])
+
+
+def test_compact_experiments_append():
+    compact = CompactExperiments(EXPERIMENTS(1))
+    compact.append(EXPERIMENT)
+    assert compact == EXPERIMENTS(2)
+    with pytest.raises(TypeError):
+        compact.append({"algorithm": ALGORITHM})
@@ -0,0 +1,122 @@
+import pytest
+from runtool.datatypes import (
+    Algorithm,
+    Algorithms,
+    Dataset,
+    Datasets,
+    Experiment,
+    Experiments,
+    IndexedExperiments,
+)
+
+ALGORITHMS = Algorithms(
+    [
+        {
+            "image": "image",
+            "instance": "ml.m5.xlarge",
+            "hyperparameters": {"epochs": epochs},
+        }
+        for epochs in range(4)
+    ]
+)
+
+DATASETS = Datasets([{"path": {"train": str(index)}} for index in range(3)])
+
+
+def epochs(experiments):
+    return [
+        experiment["algorithm"]["hyperparameters"]["epochs"]
+        for experiment in experiments
+    ]
+
+
+def test_membership():
+    experiments = IndexedExperiments(ALGORITHMS[:2] * DATASETS)
+    assert Experiment.from_nodes(ALGORITHMS[1], DATASETS[2]) in experiments
+    assert Experiment.from_nodes(ALGORITHMS[2], DATASETS[2]) not in experiments
+    assert "not an experiment" not in experiments
+    assert 1 not in experiments
+
+
+def test_dedup():
+    experiments = ALGORITHMS * DATASETS
+    assert len(IndexedExperiments(experiments + experiments)) == 24
+    deduplicated = IndexedExperiments(experiments + experiments, dedup=True)
+    assert deduplicated == experiments
+    deduplicated.append(experiments[0])
+    assert len(deduplicated) == 12
+    assert len(deduplicated + experiments) == 12
+
+
+def test_index_follows_mutations():
+    experiments = IndexedExperiments(ALGORITHMS * DATASETS[0])
+    first, second = experiments[0], experiments[1]
+
+    experiments.remove(first)
+    assert first not in experiments
+    experiments.insert(0, first)
+    assert first in experiments and experiments[0] == first
+
+    del experiments[1]
+    assert second not in experiments
+    experiments[0] = second
+    assert second in experiments and first not in experiments
+
+    del experiments[:]
+    assert second not in experiments and len(experiments) == 0
+
+    experiments += ALGORITHMS * DATASETS[0]
+    assert first in experiments and experiments.count(first) == 1
+    assert experiments.pop(0) == first
+    assert experiments.count(first) == 0
+
+    experiments.clear()
+    assert second not in experiments
+
+
+def test_sort_and_reverse_keep_keys():
+    experiments = IndexedExperiments(ALGORITHMS[:3] * DATASETS[:1])
+    experiments.sort(
+        key=lambda item: -item["algorithm"]["hyperparameters"]["epochs"]
+    )
+    assert epochs(experiments) == [2, 1, 0]
+    assert epochs(experiments & ALGORITHMS[2:3] * DATASETS[:1]) == [2]
+    assert epochs(experiments[:1]) == [2]
+    experiments.reverse()
+    assert epochs(experiments - ALGORITHMS[:1] * DATASETS[:1]) == [1, 2]
+    assert epochs(experiments[:1]) == [0]
+
+
+def test_set_operations():
+    left = IndexedExperiments(ALGORITHMS[:3] * DATASETS[0])
+    right = ALGORITHMS[1:] * DATASETS[0]
+    assert epochs(left | right) == [0, 1, 2, 3]
+    assert epochs(left & right) == [1, 2]
+    assert epochs(left - right) == [0]
+    assert epochs(left - IndexedExperiments(right)) == [0]
+    assert isinstance(left | right, IndexedExperiments)
+
+
+def test_rejects_invalid_experiments():
+    with pytest.raises(TypeError):
+        IndexedExperiments([{"algorithm": {}}])
+
+
+def test_cannot_be_multiplied():
+    experiments = IndexedExperiments(ALGORITHMS * DATASETS)
+    for multiply in (
+        lambda: experiments * 2,
+        lambda: 2 * experiments,
+    ):
+        with pytest.raises(TypeError, match="cannot be multiplied"):
+            multiply()
+    with pytest.raises(TypeError, match="cannot be multiplied"):
+        experiments *= 2
+    assert len(experiments) == len(ALGORITHMS * DATASETS)
+
+
+def test_indexed_from_experiments():
+    experiments = Experiments(ALGORITHMS * DATASETS)
+    indexed = experiments.indexed()
+    assert isinstance(indexed, IndexedExperiments)
+    assert indexed == experiments
@@ -1,7 +1,7 @@
 from runtool.datatypes import Dataset, Algorithm, Algorithms, Datasets
 import yaml
 from typing import Union
-from runtool.runtool import infer_type
+from runtool.runtool import infer_type, infer_types
 
 ALGORITHM = {
     "image": "012345678901.dkr.ecr.eu-west-1.amazonaws.com/gluonts/cpu:latest",
@@ -50,3 +50,13 @@ def test_datasets():
         data={"datasets": [DATASET]},
         expected={"datasets": Datasets([Dataset(DATASET)])},
     )
+
+
+def test_infer_types_cached():
+    cache = {}
+    algorithm = dict(ALGORITHM)
+    first = infer_types({"algo": algorithm, "ds": DATASET}, cache)
+    second = infer_types({"algo": algorithm, "ds": {"path": {}}}, cache)
+    assert first["algo"] is second["algo"]
+    assert first["ds"] == Dataset(DATASET)
+    assert second["ds"] == Dataset({"path": {}})
@@ -96,3 +96,35 @@ def test_all_in_one():
             "experiments": Versions([Experiments([EXPERIMENT])]),
         },
     )
+
+
+def test_columnar_versions():
+    source = {
+        "algorithm": dict(
+            ALGORITHM, instance={"$each": ["ml.m5.xlarge", "ml.c5.xlarge"]}
+        ),
+        "dataset": {"$each": [DATASET, DATASET]},
+    }
+    columnar = transform_config(source, columnar=True)
+    assert columnar == transform_config(source)
+    assert len(columnar.algorithm.distinct) == 2
+    assert len(columnar.dataset.distinct) == 1
+    assert columnar.dataset.is_constant
+
+
+def test_columnar_versions_of_lists():
+    source = {
+        "algorithms": [
+            dict(ALGORITHM, instance={"$each": ["ml.m5.xlarge", "local"]})
+        ],
+        "datasets": [DATASET, DATASET],
+        "experiments": [EXPERIMENT],
+    }
+    columnar = transform_config(source, columnar=True)
+    assert columnar == transform_config(source)
+    assert isinstance(columnar.algorithms[0], Algorithms)
+    assert isinstance(columnar.datasets[0], Datasets)
+    assert isinstance(columnar.experiments[0], Experiments)
+    assert len(columnar.algorithms.distinct) == 2
+    assert columnar.datasets.is_constant
+    assert columnar.experiments.is_constant
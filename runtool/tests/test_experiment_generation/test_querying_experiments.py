@@ -0,0 +1,132 @@
+from runtool.datatypes import (
+    Algorithms,
+    Datasets,
+    Experiment,
+    Experiments,
+    IndexedExperiments,
+)
+
+ALGORITHMS = Algorithms(
+    [
+        {
+            "image": image,
+            "instance": instance,
+            "hyperparameters": {"epochs": epochs},
+        }
+        for image in ("deepar", "mqcnn")
+        for instance in ("ml.m5.xlarge", "ml.p3.2xlarge")
+        for epochs in (10, 100)
+    ]
+)
+
+DATASETS = Datasets(
+    [
+        {"name": name, "path": {"train": f"s3://bucket/{name}"}}
+        for name in ("electricity", "traffic", "m4_hourly")
+    ]
+)
+
+EXPERIMENTS = ALGORITHMS * DATASETS
+
+
+def scan(experiments, predicate):
+    return Experiments.from_verified(filter(predicate, experiments))
+
+
+def test_where_single_path():
+    assert EXPERIMENTS.where({"algorithm.instance": "ml.p3.2xlarge"}) == scan(
+        EXPERIMENTS,
+        lambda item: item["algorithm"]["instance"] == "ml.p3.2xlarge",
+    )
+
+
+def test_where_several_paths():
+    result = EXPERIMENTS.where(
+        {
+            "algorithm.image": "mqcnn",
+            "dataset.name": "electricity",
+            "algorithm.hyperparameters.epochs": 100,
+        }
+    )
+    assert len(result) == 2
+    assert result == scan(
+        EXPERIMENTS,
+        lambda item: item["algorithm"]["image"] == "mqcnn"
+        and item["dataset"]["name"] == "electricity"
+        and item["algorithm"]["hyperparameters"]["epochs"] == 100,
+    )
+
+
+def test_where_compares_like_equality():
+    expected = scan(
+        EXPERIMENTS,
+        lambda item: item["algorithm"]["hyperparameters"]["epochs"] == 10,
+    )
+    assert (
+        EXPERIMENTS.where({"algorithm.hyperparameters.epochs": 10.0})
+        == expected
+    )
+    assert (
+        EXPERIMENTS.where({"algorithm.hyperparameters": {"epochs": 10.0}})
+        == expected
+    )
+
+    # a plain dict matches the equal Dataset node
+    dataset = dict(DATASETS[1])
+    assert EXPERIMENTS.where({"dataset": dataset}) == scan(
+        EXPERIMENTS, lambda item: item["dataset"] == dataset
+    )
+    assert len(EXPERIMENTS.where({"dataset": dataset})) == 8
+
+
+def test_where_no_match():
+    assert len(EXPERIMENTS.where({"dataset.name": "solar"})) == 0
+    assert len(EXPERIMENTS.where({"dataset.meta.freq": "H"})) == 0
+    assert (
+        len(EXPERIMENTS.where({"algorithm.hyperparameters.epochs": True})) == 0
+    )
+
+
+def test_where_reuses_indexes():
+    experiments = Experiments.from_verified(EXPERIMENTS)
+    experiments.where({"dataset.name": "traffic"})
+    index = experiments.inverted_index("dataset.name")
+    experiments.where({"dataset.name": "electricity"})
+    assert experiments.inverted_index("dataset.name") is index
+
+
+def test_changes_invalidate_indexes():
+    experiments = Experiments.from_verified(EXPERIMENTS)
+    assert len(experiments.where({"dataset.name": "traffic"})) == 8
+
+    experiments.append(Experiment.from_nodes(ALGORITHMS[0], DATASETS[1]))
+    assert len(experiments.where({"dataset.name": "traffic"})) == 9
+
+    experiments.reverse()
+    assert experiments.where({"dataset.name": "traffic"})[0] == (
+        Experiment.from_nodes(ALGORITHMS[0], DATASETS[1])
+    )
+
+    experiments *= 2
+    assert len(experiments.where({"dataset.name": "traffic"})) == 18
+
+    del experiments[:]
+    assert len(experiments.where({"dataset.name": "traffic"})) == 0
+
+
+def test_where_on_indexed_experiments():
+    experiments = IndexedExperiments(EXPERIMENTS)
+    assert len(experiments.where({"dataset.name": "traffic"})) == 8
+    experiments.pop()
+    assert len(experiments.where({"dataset.name": "m4_hourly"})) == 7
+
+
+def test_indexed_experiments_sort_keeps_keys():
+    experiments = IndexedExperiments(EXPERIMENTS)
+    experiments.sort(key=lambda item: item["dataset"]["name"])
+    assert experiments[:8] == EXPERIMENTS.where(
+        {"dataset.name": "electricity"}
+    )
+    assert (experiments & EXPERIMENTS[:1]) == EXPERIMENTS[:1]
+    experiments.reverse()
+    assert (experiments & EXPERIMENTS[:1]) == EXPERIMENTS[:1]
@@ -0,0 +1,83 @@
+import io
+import json
+
+import pytest
+from runtool.datatypes import Algorithms, Datasets
+from runtool.export import write_jsonl, write_parquet
+
+ALGORITHMS = Algorithms(
+    [
+        {
+            "image": "image",
+            "instance": "ml.m5.xlarge",
+            "hyperparameters": {"epochs": epochs, "learning_rate": 0.1},
+        }
+        for epochs in range(10)
+    ]
+)
+
+DATASETS = Datasets(
+    [
+        {
+            "path": {"train": f"s3://bucket/{index}/train.json"},
+            "meta": {"freq": "H"},
+        }
+        for index in range(5)
+    ]
+)
+
+
+def test_write_jsonl():
+    experiments = ALGORITHMS * DATASETS
+    file = io.StringIO()
+    assert experiments.to_jsonl(file) == 50
+    lines = file.getvalue().splitlines()
+    assert len(lines) == 50
+    assert [json.loads(line) for line in lines] == [
+        {
+            "algorithm": dict(experiment["algorithm"]),
+            "dataset": dict(experiment["dataset"]),
+        }
+        for experiment in experiments
+    ]
+
+
+def test_write_jsonl_to_path(tmp_path):
+    path = tmp_path / "experiments.jsonl"
+    assert write_jsonl([{"a": 1}, {"b": [1, 2]}], path) == 2
+    assert path.read_text() == '{"a": 1}\n{"b": [1, 2]}\n'
+
+
+def test_write_parquet(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "experiments.parquet"
+    experiments = ALGORITHMS * DATASETS
+    assert experiments.to_parquet(path, row_group_size=16) == 50
+
+    file = parquet.ParquetFile(path)
+    assert file.metadata.num_row_groups == 4
+    table = file.read()
+    assert table.num_rows == 50
+    assert table.column("algorithm.hyperparameters.epochs").to_pylist() == [
+        experiment["algorithm"]["hyperparameters"]["epochs"]
+        for experiment in experiments
+    ]
+    assert set(table.column("dataset.meta.freq").to_pylist()) == {"H"}
+
+
+def test_write_parquet_mixed_types(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "mixed.parquet"
+    write_parquet([{"a": 1, "b": 1}, {"a": 1.5, "b": "x"}, {"c": [1]}], path)
+    table = parquet.read_table(path).to_pydict()
+    assert table == {
+        "a": [1.0, 1.5, None],
+        "b": ["1", '"x"', None],
+        "c": [None, None, "[1]"],
+    }
+
+
+def test_write_parquet_requires_collection(tmp_path):
+    pytest.importorskip("pyarrow")
+    with pytest.raises(TypeError):
+        write_parquet(iter([{"a": 1}]), tmp_path / "data.parquet")
@@ -0,0 +1,125 @@
+import pickle
+
+import pytest
+import yaml
+from runtool.datatypes import (
+    Algorithm,
+    Algorithms,
+    Dataset,
+    Datasets,
+    Experiment,
+)
+from runtool.hashing import canonical_hash, digest, invalidate
+
+ALGORITHM = {
+    "image": "012345678901.dkr.ecr.eu-west-1.amazonaws.com/gluonts/cpu:latest",
+    "instance": "ml.m5.xlarge",
+    "hyperparameters": {
+        "prediction_length": 7,
+        "freq": "D",
+    },
+}
+
+DATASET = {
+    "path": {
+        "train": "s3://gluonts-run-tool/gluon_ts_datasets/constant/train/data.json",
+        "test": "s3://gluonts-run-tool/gluon_ts_datasets/constant/test/data.json",
+    }
+}
+
+
+def test_hash_independent_of_order():
+    reordered = {
+        "hyperparameters": {"freq": "D", "prediction_length": 7},
+        "instance": "ml.m5.xlarge",
+        "image": ALGORITHM["image"],
+    }
+    assert canonical_hash(ALGORITHM) == canonical_hash(reordered)
+
+
+def test_hash_depends_on_list_order():
+    assert canonical_hash([1, 2]) != canonical_hash([2, 1])
+
+
+def test_hash_depends_on_types():
+    values = [1, 1.0, True, "1", [1], {"1": 1}, None]
+    assert len(set(map(canonical_hash, values))) == len(values)
+
+
+def test_hash_keys_and_values_are_not_interchangeable():
+    assert canonical_hash({"a": "b"}) != canonical_hash({"b": "a"})
+
+
+def test_nodes_hash_as_their_content():
+    experiment = Experiment.from_nodes(Algorithm(ALGORITHM), Dataset(DATASET))
+    assert experiment.canonical_hash() == canonical_hash(
+        {"algorithm": ALGORITHM, "dataset": DATASET}
+    )
+
+
+def test_node_caches_digest():
+    algorithm = Algorithm(ALGORITHM)
+    value = digest(algorithm)
+    assert algorithm._digest[0] == value
+
+    algorithm._digest = (b"cached", ())
+    assert digest(algorithm) == b"cached"
+
+    invalidate(algorithm)
+    assert digest(algorithm) == value
+
+
+def test_changing_a_node_invalidates_digest():
+    algorithm = Algorithm(ALGORITHM)
+    experiment = Experiment.from_nodes(algorithm, Dataset(DATASET))
+    before = experiment.canonical_hash()
+
+    algorithm["instance"] = "ml.p3.2xlarge"
+    changed = experiment.canonical_hash()
+    assert changed != before
+
+    del algorithm["hyperparameters"]
+    assert experiment.canonical_hash() not in (before, changed)
+
+    algorithm.update(ALGORITHM)
+    assert experiment.canonical_hash() == before
+
+
+def test_invalidate_after_changing_nested_values():
+    hyperparameters = {"epochs": 1, "layers": [{"n": 1}]}
+    algorithm = Algorithm(dict(ALGORITHM, hyperparameters=hyperparameters))
+    # nodes share the values they are created from
+    assert algorithm["hyperparameters"] is hyperparameters
+    experiment = Experiment.from_nodes(algorithm, Dataset(DATASET))
+    before = experiment.canonical_hash()
+
+    hyperparameters["layers"][0]["n"] = 2
+    assert experiment.canonical_hash() == before
+    invalidate(algorithm)
+    assert experiment.canonical_hash() == canonical_hash(
+        {"algorithm": dict(algorithm), "dataset": DATASET}
+    )
+    assert experiment.canonical_hash() != before
+
+
+def test_nodes_keep_plain_values():
+    algorithm = Algorithm(dict(ALGORITHM, hyperparameters={"layers": [1]}))
+    algorithm["tags"] = ["a"]
+    loaded = yaml.safe_load(yaml.safe_dump(dict(algorithm)))
+    assert loaded == dict(algorithm)
+    assert type(algorithm["tags"]) is list
+    assert pickle.loads(pickle.dumps(algorithm)) == algorithm
+
+
+def test_hash_list_nodes():
+    algorithms = Algorithms([ALGORITHM, ALGORITHM])
+    datasets = Datasets([DATASET])
+    assert canonical_hash(algorithms) == canonical_hash([ALGORITHM] * 2)
+    assert canonical_hash(algorithms * datasets) == canonical_hash(
+        [{"algorithm": ALGORITHM, "dataset": DATASET}] * 2
+    )
+
+
+def test_unhashable_type():
+    with pytest.raises(TypeError):
+        canonical_hash({"a": object()})
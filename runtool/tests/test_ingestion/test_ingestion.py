@@ -0,0 +1,232 @@
+import os
+
+import pytest
+
+from runtool.datatypes import Experiment
+from runtool.ingestion import FileSource, LogIngestor, LogSource
+from runtool.metrics import parse_metrics
+
+METRICS = {
+    "loss": r"loss: (\d+\.\d+)",
+    "MASE": r"MASE\): (\d+\.\d+)",
+}
+
+
+class MemorySource(LogSource):
+    """
+    A log kept in memory which records how many bytes were read.
+    """
+
+    def __init__(self):
+        self.data = b""
+        self.read_bytes = 0
+
+    def write(self, text: str):
+        self.data += text.encode()
+
+    def read(self, offset: int) -> bytes:
+        result = self.data[offset:]
+        self.read_bytes += len(result)
+        return result
+
+    def size(self):
+        return len(self.data)
+
+
+def lines(start, stop):
+    return "".join(
+        f"epoch {epoch} loss: {1 / (epoch + 1):.4f}\n"
+        for epoch in range(start, stop)
+    )
+
+
+def test_incremental_matches_full_parse():
+    source, ingestor = MemorySource(), LogIngestor()
+    for start in range(0, 100, 10):
+        source.write(lines(start, start + 10))
+        record = ingestor.poll("job", source, METRICS)
+    source.write("gluonts[metric-MASE): 0.8\n")
+    record = ingestor.poll("job", source, METRICS)
+
+    log = source.data.decode()
+    assert record.values == parse_metrics(log, METRICS)
+    assert record.counts == {"loss": 100, "MASE": 1}
+    # each byte was read once
+    assert source.read_bytes == len(source.data)
+
+
+def test_partial_lines_are_kept_for_next_poll():
+    source, ingestor = MemorySource(), LogIngestor()
+    source.write("epoch 1 loss: 0.5\nepoch 2 loss: 0.2")
+    assert ingestor.poll("job", source, METRICS).values == {"loss": 0.5}
+    source.write("5\n")
+    assert ingestor.poll("job", source, METRICS).values == {"loss": 0.25}
+
+    source.write("epoch 3 loss: 0.1")
+    record = ingestor.poll("job", source, METRICS, final=True)
+    assert record.values == {"loss": 0.1}
+    assert ingestor.offsets["job"] == len(source.data)
+
+
+def test_state_is_persisted(tmp_path):
+    log, state = tmp_path / "train.log", str(tmp_path / "state.json")
+    log.write_text(lines(0, 5))
+    LogIngestor(state).poll("job", FileSource(str(log)), METRICS)
+
+    with open(log, "a") as file:
+        file.write(lines(5, 8))
+    resumed = LogIngestor(state)
+    assert resumed.offsets["job"] == len(lines(0, 5))
+    record = resumed.poll("job", FileSource(str(log)), METRICS)
+    assert record.counts == {"loss": 8}
+    assert record.values == parse_metrics(log.read_text(), METRICS)
+
+
+def test_manual_save(tmp_path):
+    state = tmp_path / "state.json"
+    source = MemorySource()
+    source.write(lines(0, 3))
+    ingestor = LogIngestor(str(state), autosave=False)
+    ingestor.poll("job", source, METRICS)
+    assert not state.exists()
+    ingestor.save()
+    assert LogIngestor(str(state)).records["job"].counts == {"loss": 3}
+
+
+def test_save_appends_changed_logs(tmp_path):
+    state = tmp_path / "state.jsonl"
+    sources = [MemorySource() for _ in range(10)]
+    ingestor = LogIngestor(str(state))
+    for index, source in enumerate(sources):
+        source.write(lines(0, 3))
+        ingestor.poll(f"job-{index}", source, METRICS)
+    written = len(state.read_text().splitlines())
+
+    sources[0].write(lines(3, 5))
+    ingestor.poll("job-0", sources[0], METRICS)
+    # only the line of the polled log was appended
+    assert len(state.read_text().splitlines()) == written + 1
+
+    resumed = LogIngestor(str(state))
+    assert resumed.records["job-0"].counts == {"loss": 5}
+    assert resumed.offsets == ingestor.offsets
+    # the file was compacted to one line per log
+    assert len(state.read_text().splitlines()) == len(sources)
+
+
+def test_partially_written_line_is_ignored(tmp_path):
+    state = tmp_path / "state.jsonl"
+    source = MemorySource()
+    source.write(lines(0, 3))
+    LogIngestor(str(state)).poll("job", source, METRICS)
+    with open(state, "a") as file:
+        file.write('{"key": "job", "off')
+    resumed = LogIngestor(str(state))
+    assert resumed.records["job"].counts == {"loss": 3}
+
+    # the partial line is dropped, such that new lines can be appended
+    source.write(lines(3, 4))
+    resumed.poll("job", source, METRICS)
+    assert LogIngestor(str(state)).records["job"].counts == {"loss": 4}
+
+
+def test_unchanged_logs_are_not_saved(tmp_path, monkeypatch):
+    source = MemorySource()
+    source.write(lines(0, 3))
+    ingestor = LogIngestor(str(tmp_path / "state.jsonl"))
+    ingestor.poll("job", source, METRICS)
+
+    saved = []
+    monkeypatch.setattr(os, "fsync", saved.append)
+    ingestor.poll("job", source, METRICS)
+    source.write("epoch 3 lo")
+    ingestor.poll("job", source, METRICS)
+    assert not ingestor.dirty and saved == []
+    source.write("ss: 0.1\n")
+    ingestor.poll("job", source, METRICS)
+    assert len(saved) == 1
+
+
+def test_failed_compaction_removes_temporary_file(tmp_path, monkeypatch):
+    source = MemorySource()
+    source.write(lines(0, 3))
+    ingestor = LogIngestor(str(tmp_path / "state.jsonl"), autosave=False)
+    ingestor.poll("job", source, METRICS)
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        ingestor.compact()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_log_source_requires_read():
+    class Incomplete(LogSource):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_carriage_returns_end_lines():
+    source, ingestor = MemorySource(), LogIngestor()
+    source.write("10%|loss: 0.5\r20%|loss: 0.4\r30%|lo")
+    assert ingestor.poll("job", source, METRICS).values == {"loss": 0.4}
+    assert ingestor.offsets["job"] == len("10%|loss: 0.5\r20%|loss: 0.4\r")
+    source.write("ss: 0.3\r")
+    assert ingestor.poll("job", source, METRICS).counts == {"loss": 3}
+
+
+def test_truncated_log_is_read_again(tmp_path):
+    log = tmp_path / "train.log"
+    log.write_text(lines(0, 10))
+    ingestor = LogIngestor()
+    ingestor.poll("job", FileSource(str(log)), METRICS)
+
+    log.write_text(lines(20, 22))
+    record = ingestor.poll("job", FileSource(str(log)), METRICS)
+    assert record.counts == {"loss": 2}
+    assert record.values == parse_metrics(lines(20, 22), METRICS)
+
+
+def test_missing_file_and_max_bytes(tmp_path):
+    log = tmp_path / "train.log"
+    source = FileSource(str(log), max_bytes=64)
+    ingestor = LogIngestor()
+    assert ingestor.poll("job", source, METRICS).values == {}
+
+    log.write_text(lines(0, 20))
+    polls = 0
+    while ingestor.offsets["job"] < len(lines(0, 20)):
+        record = ingestor.poll("job", source, METRICS)
+        polls += 1
+    assert polls > 1
+    assert record.counts == {"loss": 20}
+
+
+def test_poll_experiment():
+    experiment = Experiment.from_nodes(
+        {"image": "a", "instance": "local", "metrics": METRICS},
+        {"path": {}},
+    )
+    source, ingestor = MemorySource(), LogIngestor()
+    source.write(lines(0, 4))
+    record = ingestor.poll_experiment(experiment, source)
+    assert record.counts == {"loss": 4}
+    assert len(ingestor.offsets) == 1
+
+    # another run of the same configuration continues the same log
+    rerun = Experiment.from_nodes(
+        {
+            "image": "a",
+            "instance": "local",
+            "metrics": METRICS,
+            "$job_name": "job-91c0",
+        },
+        {"path": {}},
+    )
+    source.write(lines(4, 6))
+    assert ingestor.poll_experiment(rerun, source).counts == {"loss": 6}
+    assert len(ingestor.offsets) == 1
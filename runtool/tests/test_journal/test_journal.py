@@ -0,0 +1,174 @@
+import os
+import threading
+
+import pytest
+
+from runtool.datatypes import Algorithms, Datasets
+from runtool.executor import Executor
+from runtool.journal import DONE, FAILED, RUNNING, SUBMITTED, Journal, run_grid
+from runtool.runners import LocalRunner
+
+GRID = Algorithms(
+    [
+        {
+            "image": "gluonts",
+            "instance": "ml.m5.xlarge",
+            "hyperparameters": {"index": index},
+        }
+        for index in range(25)
+    ]
+) * Datasets([{"path": {"train": f"s3://bucket/{name}"}} for name in "ab"])
+
+
+class Crash(BaseException):
+    """
+    Stands in for the process running the grid being killed.
+    """
+
+
+class Trainer:
+    def __init__(self, crash_after=None, fail=()):
+        self.crash_after = crash_after
+        self.fail = fail
+        self.runs = []
+
+    def __call__(self, experiment):
+        index = experiment["algorithm"]["hyperparameters"]["index"]
+        if self.crash_after is not None and len(self.runs) >= self.crash_after:
+            raise Crash
+        self.runs.append((index, experiment["dataset"]["path"]["train"]))
+        if index in self.fail:
+            raise RuntimeError("training failed")
+        return ""
+
+
+def test_resume_after_crash(tmp_path):
+    path = str(tmp_path / "grid.journal")
+    first = Trainer(crash_after=20)
+    with pytest.raises(Crash):
+        run_grid(GRID, Executor(LocalRunner(first), concurrency=1), path)
+
+    second = Trainer()
+    runs = run_grid(GRID, Executor(LocalRunner(second), concurrency=3), path)
+    # nothing which was completed is run again
+    assert not set(first.runs) & set(second.runs)
+    assert len(first.runs) + len(second.runs) == len(GRID)
+    assert len(runs) == len(GRID) - 20
+
+    with Journal(path, len(GRID)) as journal:
+        assert journal.counts() == {DONE: len(GRID)}
+        assert list(journal.pending()) == []
+
+
+def test_failed_experiments(tmp_path):
+    path = str(tmp_path / "grid.journal")
+    trainer = Trainer(fail=(3,))
+    run_grid(GRID, Executor(LocalRunner(trainer), concurrency=2), path)
+    with Journal(path, len(GRID)) as journal:
+        assert journal.counts() == {DONE: len(GRID) - 2, FAILED: 2}
+
+    # failed experiments are only retried if asked to
+    executor = Executor(LocalRunner(Trainer()))
+    assert run_grid(GRID, executor, path, retry_failed=False) == {}
+    retried = run_grid(GRID, executor, path)
+    assert sorted(retried) == [6, 7]
+
+
+def test_lookahead(tmp_path):
+    path = str(tmp_path / "grid.journal")
+    trainer = Trainer()
+    runs = run_grid(
+        GRID,
+        Executor(LocalRunner(trainer), concurrency=2),
+        path,
+        lookahead=7,
+    )
+    assert sorted(runs) == list(range(len(GRID)))
+    assert len(trainer.runs) == len(GRID)
+
+
+def test_straggler_does_not_block_grid(tmp_path):
+    done = threading.Event()
+
+    def train(experiment):
+        index = experiment["algorithm"]["hyperparameters"]["index"]
+        path = experiment["dataset"]["path"]["train"]
+        if (index, path) == (0, "s3://bucket/a"):
+            # finishes only once the last experiment was started
+            if not done.wait(timeout=5):
+                raise RuntimeError("the grid waited for the straggler")
+        elif (index, path) == (24, "s3://bucket/b"):
+            done.set()
+        return ""
+
+    path = str(tmp_path / "grid.journal")
+    executor = Executor(LocalRunner(train), concurrency=2)
+    runs = run_grid(GRID, executor, path, lookahead=2)
+    assert all(run.error is None for run in runs.values())
+    assert len(runs) == len(GRID)
+
+
+def test_states_and_partial_lines(tmp_path):
+    path = str(tmp_path / "grid.journal")
+    with Journal(path, length=5) as journal:
+        for state, index in [
+            (SUBMITTED, 0),
+            (RUNNING, 0),
+            (DONE, 0),
+            (SUBMITTED, 1),
+            (RUNNING, 1),
+            (FAILED, 2),
+            (DONE, 3),
+        ]:
+            journal.record(index, state)
+    with open(path, "a") as file:
+        file.write("d 4")  # the process died while writing
+
+    with Journal(path, length=5) as journal:
+        assert [journal.state(index) for index in range(5)] == [
+            DONE,
+            RUNNING,
+            FAILED,
+            DONE,
+            None,
+        ]
+        assert list(journal.pending()) == [1, 2, 4]
+
+
+def test_compaction(tmp_path):
+    path = str(tmp_path / "grid.journal")
+    with Journal(path, length=100) as journal:
+        for index in range(100):
+            journal.record(index, SUBMITTED)
+            journal.record(index, DONE)
+    with Journal(path, length=100) as journal:
+        assert journal.watermark == 100
+    with open(path) as file:
+        assert file.read() == "grid 100\nw 100\n"
+
+
+def test_batched_fsync(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+    path = str(tmp_path / "grid.journal")
+    journal = Journal(path, length=10, batch_size=4, interval=3600)
+    synced.clear()
+    for index in range(10):
+        journal.record(index, DONE)
+    assert len(synced) == 2
+    journal.close()
+    assert len(synced) == 3
+
+
+def test_other_grid(tmp_path):
+    path = str(tmp_path / "grid.journal")
+    Journal(path, length=10, fingerprint="abc").close()
+    with pytest.raises(ValueError):
+        Journal(path, length=11, fingerprint="abc")
+    with pytest.raises(ValueError):
+        Journal(path, length=10, fingerprint="abd")
+    with Journal(path, length=10, fingerprint="abc") as journal:
+        with pytest.raises(IndexError):
+            journal.record(10, DONE)
+        with pytest.raises(ValueError):
+            journal.record(0, "x")
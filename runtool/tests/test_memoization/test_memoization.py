@@ -0,0 +1,88 @@
+from uuid import uuid4
+
+from runtool.datatypes import Algorithms, Datasets
+from runtool.hashing import canonical_hash, run_hash
+from runtool.memoization import RunCache
+from runtool.results import ResultsStore
+
+ALGORITHMS = [
+    {
+        "image": "gluonts",
+        "instance": "ml.m5.xlarge",
+        "hyperparameters": {"epochs": epochs},
+    }
+    for epochs in (10, 100)
+]
+DATASETS = [
+    {"path": {"train": f"s3://bucket/{name}"}, "meta": {"freq": "H"}}
+    for name in ("electricity", "traffic", "exchange_rate")
+]
+
+
+def launch(datasets):
+    """
+    Generates the experiments of a launch, where each job name contains a
+    unique id as when it is resolved for a run.
+    """
+    return Algorithms(
+        [
+            {**algorithm, "$job_name": f"job--{uuid4().hex[:8]}"}
+            for algorithm in ALGORITHMS
+        ]
+    ) * Datasets(datasets)
+
+
+def test_job_names_are_ignored():
+    first, second = launch(DATASETS[:1]), launch(DATASETS[:1])
+    assert canonical_hash(first[0]) != canonical_hash(second[0])
+    assert run_hash(first[0]) == run_hash(second[0])
+    assert run_hash(first[0]) != run_hash(first[1])
+
+
+def test_relaunch_after_adding_dataset(tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path) as store:
+        cache = RunCache(store)
+        first = launch(DATASETS[:2])
+        assert len(cache.filter(first)) == len(first)
+        for experiment in first:
+            cache.record(experiment, {"MASE": 1.0})
+
+    with ResultsStore(path) as store:
+        remaining = RunCache(store).filter(launch(DATASETS))
+    assert len(remaining) == len(ALGORITHMS)
+    assert {
+        experiment["dataset"]["path"]["train"] for experiment in remaining
+    } == {"s3://bucket/exchange_rate"}
+
+
+def test_duplicates_within_launch():
+    cache = RunCache(ResultsStore())
+    experiments = launch(DATASETS[:1]) + launch(DATASETS[:1])
+    assert len(cache.filter(experiments)) == len(ALGORITHMS)
+    assert len(cache.filter(experiments, dedup=False)) == len(experiments)
+    # filtering does not mark the experiments as run
+    assert experiments[0] not in cache
+
+
+def test_refresh():
+    store = ResultsStore()
+    cache = RunCache(store)
+    experiments = launch(DATASETS[:1])
+    assert len(cache.filter(experiments)) == len(experiments)
+    # another writer adds results to the store
+    store.add(experiments[0], {"MASE": 1.0})
+    assert experiments[0] not in cache
+    cache.refresh()
+    assert experiments[0] in cache
+    assert len(cache.filter(experiments)) == len(experiments) - 1
+
+
+def test_custom_volatile_keys():
+    cache = RunCache(ResultsStore(volatile=("$job_name", "instance")))
+    experiments = launch(DATASETS[:1])
+    cache.record(experiments[0], {"MASE": 1.0})
+    moved = Algorithms(
+        [{**ALGORITHMS[0], "instance": "ml.c5.large"}]
+    ) * Datasets(DATASETS[:1])
+    assert moved[0] in cache
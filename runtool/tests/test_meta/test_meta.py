@@ -0,0 +1,295 @@
+import json
+import os
+
+import pytest
+from toolz.dicttoolz import valmap
+
+from runtool import meta
+from runtool.datatypes import Dataset, Datasets
+from runtool.meta import (
+    MetaCache,
+    Sampling,
+    infer_meta,
+    infer_prediction_length,
+    populate_meta,
+    sample_series,
+)
+from runtool.runtool import transform_config
+from runtool.transformations import apply_trial
+
+
+def write_dataset(
+    directory, lengths, prediction_length, windows=1, metadata=None
+):
+    """
+    Writes a dataset in the GluonTS layout with train/data.json and
+    test/data.json, and optionally metadata.json.
+    """
+    starts = [f"2021-03-0{index % 9 + 1} 00:00:00" for index in range(7)]
+    for name in ("train", "test"):
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+    with open(os.path.join(directory, "train", "data.json"), "w") as file:
+        for index, length in enumerate(lengths):
+            series = {"start": starts[index % 7], "target": [1.0] * length}
+            file.write(json.dumps(series) + "\n")
+    with open(os.path.join(directory, "test", "data.json"), "w") as file:
+        for window in range(1, windows + 1):
+            for index, length in enumerate(lengths):
+                extended = length + window * prediction_length
+                series = {
+                    "start": starts[index % 7],
+                    "target": [1.0] * extended,
+                }
+                file.write(json.dumps(series) + "\n")
+    if metadata is not None:
+        with open(os.path.join(directory, "metadata.json"), "w") as file:
+            json.dump(metadata, file)
+    return {
+        "train": os.path.join(directory, "train", "data.json"),
+        "test": os.path.join(directory, "test"),
+    }
+
+
+def test_infer_meta(tmp_path):
+    paths = write_dataset(str(tmp_path), [10, 30, 20, 40], 5, windows=3)
+    inferred = infer_meta(Dataset({"path": paths}))
+    assert inferred == {
+        "num_time_series": 4,
+        "series_length": {"min": 10, "max": 40, "mean": 25.0, "median": 25.0},
+        "freq": "D",
+        "prediction_length": 5,
+    }
+
+
+def test_gluonts_metadata(tmp_path):
+    paths = write_dataset(
+        str(tmp_path),
+        [10, 20],
+        5,
+        metadata={"freq": "H", "prediction_length": 48},
+    )
+    inferred = infer_meta(Dataset({"path": paths}))
+    assert inferred["freq"] == "H"
+    assert inferred["prediction_length"] == 48
+
+
+def test_remote_and_missing_paths(tmp_path):
+    assert infer_meta(Dataset({"path": {"train": "s3://bucket/a"}})) == {}
+    missing = str(tmp_path / "missing.json")
+    assert infer_meta(Dataset({"path": {"train": missing}})) == {}
+
+
+def test_multivariate(tmp_path):
+    path = tmp_path / "train.json"
+    path.write_text(
+        json.dumps({"start": "2020-01-01", "target": [[1, 2, 3], [4, 5, 6]]})
+        + "\n"
+    )
+    inferred = infer_meta(Dataset({"path": {"train": str(path)}}))
+    assert inferred["series_length"]["max"] == 3
+
+
+def test_cache_by_file_hash(tmp_path, monkeypatch):
+    first = write_dataset(str(tmp_path / "first"), [10, 20], 5)
+    second = write_dataset(str(tmp_path / "second"), [10, 20], 5)
+    scanned = []
+    scan_series = meta.scan_series
+    monkeypatch.setattr(
+        meta,
+        "scan_series",
+        lambda path: scanned.append(path) or scan_series(path),
+    )
+
+    cache = MetaCache(str(tmp_path / "cache"))
+    infer_meta(Dataset({"path": first}), cache)
+    # the files of the second dataset have the same content
+    infer_meta(Dataset({"path": second}), cache)
+    assert len(scanned) == 2
+
+    # the statistics are read from the cache directory by new caches
+    infer_meta(Dataset({"path": first}), MetaCache(str(tmp_path / "cache")))
+    assert len(scanned) == 2
+
+    with open(first["train"], "a") as file:
+        file.write(json.dumps({"start": "2021-03-01", "target": [1]}) + "\n")
+    assert infer_meta(Dataset({"path": first}), cache)["num_time_series"] == 3
+    assert len(scanned) == 3
+
+
+def test_populate_keeps_config_values(tmp_path):
+    paths = write_dataset(str(tmp_path), [10, 20], 5)
+    dataset = Dataset({"path": paths, "meta": {"prediction_length": 7}})
+    digest = dataset.canonical_hash()
+    populate_meta(dataset)
+    assert dataset["meta"]["prediction_length"] == 7
+    assert dataset["meta"]["num_time_series"] == 2
+    assert dataset.canonical_hash() != digest
+
+
+def test_transform_config(tmp_path):
+    paths = write_dataset(str(tmp_path), [10, 20], 12)
+    config = {
+        "algorithm": {
+            "image": "gluonts",
+            "instance": "local",
+            "hyperparameters": {
+                "prediction_length": {
+                    "$eval": "$trial.dataset.meta.prediction_length"
+                },
+                "freq": {"$eval": "$trial.dataset.meta.freq"},
+            },
+        },
+        "dataset": {"path": paths},
+    }
+    transformed = transform_config(config, infer_meta=True)
+    (experiment,) = (
+        transformed.algorithm.__root__[0] * transformed.dataset.__root__[0]
+    )
+    assert experiment["dataset"]["meta"]["prediction_length"] == 12
+    # `$trial` expressions are resolved against the experiment when it is
+    # dispatched
+    hyperparameters = valmap(
+        lambda node: apply_trial(node, {"__trial__": experiment}),
+        experiment["algorithm"]["hyperparameters"],
+    )
+    assert hyperparameters == {"prediction_length": 12, "freq": "D"}
+    assert "meta" not in transform_config(config).dataset.__root__[0]
+
+
+def test_prediction_length_mismatch():
+    assert infer_prediction_length([10, 20], [15]) is None
+    assert infer_prediction_length([10, 20], [10, 20]) is None
+    assert meta.infer_freq(["not a date", "2020-01-01"]) is None
+
+
+def test_infer_freq_of_periods_and_time_zones():
+    assert meta.infer_freq(["2020-01", "2020-02", "2021-06"]) == "M"
+    assert meta.infer_freq(["2020Q1", "2020Q2"]) is None
+    # naive starts are compared with tz-aware starts in UTC
+    starts = ["2020-01-01 00:00:00", "2020-01-01T05:00:00+02:00"]
+    assert meta.infer_freq(starts) == "H"
+    assert meta.infer_freq(["2020-01-01T00:00:00Z", "2020-01-03"]) == "D"
+
+
+def test_infer_meta_with_monthly_starts(tmp_path):
+    path = tmp_path / "train.json"
+    with open(path, "w") as file:
+        for start in ("2020-01", "2020-03"):
+            series = {"start": start, "target": [1.0] * 5}
+            file.write(json.dumps(series) + "\n")
+    assert infer_meta(Dataset({"path": {"train": str(path)}}))["freq"] == "M"
+
+    with open(path, "a") as file:
+        file.write(json.dumps({"start": "2020W1", "target": [1.0]}) + "\n")
+    inferred = infer_meta(Dataset({"path": {"train": str(path)}}))
+    assert inferred["num_time_series"] == 3
+    assert "freq" not in inferred
+
+
+def test_transform_config_list_of_datasets(tmp_path):
+    first = {"path": write_dataset(str(tmp_path / "first"), [10, 20], 12)}
+    second = {"path": write_dataset(str(tmp_path / "second"), [10], 5)}
+    transformed = transform_config(
+        {"single": first, "many": [first, second]}, infer_meta=True
+    )
+    (single,), (many,) = transformed.single.__root__, transformed.many.__root__
+    assert single["meta"]["prediction_length"] == 12
+    assert isinstance(many, Datasets)
+    lengths = [dataset["meta"]["prediction_length"] for dataset in many]
+    assert lengths == [12, 5]
+
+
+def test_sample_series(tmp_path):
+    lengths = [index % 50 + 1 for index in range(1000)]
+    paths = write_dataset(str(tmp_path), lengths, 5)
+    sample = sample_series(paths["train"], Sampling(size=100))
+    assert len(sample.lengths) == 100
+    assert sample.head == lengths[:100]
+    assert sample.seen == 1000
+    assert sample.complete
+    assert set(sample.lengths) <= set(lengths)
+    # the sample is reproducible
+    assert sample_series(paths["train"], Sampling(size=100)) == sample
+
+
+def test_sample_series_stops_early(tmp_path):
+    paths = write_dataset(str(tmp_path), [10] * 1000, 5)
+    sample = sample_series(paths["train"], Sampling(size=10, max_series=100))
+    assert sample.seen == 100
+    assert not sample.complete
+
+    sample = sample_series(paths["train"], Sampling(size=10, max_bytes=1000))
+    assert 1000 <= sample.bytes < 1000 + sample.line_bytes[0] + 1
+    assert sample.total_bytes == os.path.getsize(paths["train"])
+
+
+def test_approximate_meta(tmp_path):
+    lengths = [index % 50 + 1 for index in range(2000)]
+    paths = write_dataset(str(tmp_path), lengths, 5)
+    dataset = Dataset({"path": paths})
+    inferred = infer_meta(dataset, sampling=Sampling(size=200, max_series=500))
+    errors = inferred["error"]
+    assert abs(inferred["num_time_series"] - 2000) <= errors["num_time_series"]
+    assert (
+        abs(inferred["series_length"]["mean"] - 25.5)
+        <= errors["series_length"]["mean"]
+    )
+    assert inferred["value_scale"] == {"mean": 1.0}
+    assert inferred["freq"] == "D"
+    assert inferred["prediction_length"] == 5
+    assert inferred["sample"] == {
+        "series": 200,
+        "seen": 500,
+        "bytes": inferred["sample"]["bytes"],
+        "complete": False,
+    }
+
+
+def test_approximate_meta_complete_is_exact(tmp_path):
+    paths = write_dataset(str(tmp_path), [10, 30, 20, 40], 5)
+    dataset = Dataset({"path": paths})
+    inferred = infer_meta(dataset, sampling=Sampling(size=10))
+    exact = infer_meta(dataset)
+    assert inferred["num_time_series"] == exact["num_time_series"]
+    assert inferred["series_length"] == exact["series_length"]
+    assert inferred["error"] == {
+        "num_time_series": 0.0,
+        "series_length": {"mean": 0.0, "median": 0.0},
+        "value_scale": {"mean": 0.0},
+    }
+
+
+def test_sample_cache(tmp_path, monkeypatch):
+    paths = write_dataset(str(tmp_path / "data"), [10, 20], 5)
+    sampled = []
+    original = meta.sample_series
+    monkeypatch.setattr(
+        meta,
+        "sample_series",
+        lambda path, sampling: sampled.append(path)
+        or original(path, sampling),
+    )
+    dataset = Dataset({"path": paths})
+    cache = MetaCache(str(tmp_path / "cache"))
+    first = infer_meta(dataset, cache, Sampling(size=10))
+    assert len(sampled) == 2
+    assert infer_meta(dataset, cache, Sampling(size=10)) == first
+    assert (
+        infer_meta(
+            dataset, MetaCache(str(tmp_path / "cache")), Sampling(size=10)
+        )
+        == first
+    )
+    assert len(sampled) == 2
+    infer_meta(dataset, cache, Sampling(size=10, seed=1))
+    assert len(sampled) == 4
+
+
+def test_transform_config_sampling(tmp_path):
+    paths = write_dataset(str(tmp_path), [10, 20], 12)
+    transformed = transform_config(
+        {"dataset": {"path": paths}}, infer_meta=Sampling(size=10)
+    )
+    inferred = transformed.dataset.__root__[0]["meta"]
+    assert inferred["prediction_length"] == 12
+    assert inferred["sample"]["complete"]
@@ -0,0 +1,144 @@
+import random
+import re
+from pathlib import Path
+
+import yaml
+
+from runtool.metrics import MetricScanner, literal_prefix, parse_metrics
+
+SOURCE = (
+    Path(__file__).parent.parent
+    / "test_transformations"
+    / "test_data"
+    / "large_example"
+    / "source.yml"
+)
+METRICS = yaml.safe_load(SOURCE.read_text())["base_algorithm"]["metrics"]
+
+
+def naive(log, metrics):
+    result = {}
+    for name, regex in metrics.items():
+        values = re.findall(regex, log)
+        if values:
+            result[name] = float(values[-1])
+    return result
+
+
+def generate_log(seed=0, lines=2000):
+    rng = random.Random(seed)
+    names = list(METRICS)
+    result = []
+    for index in range(lines):
+        if rng.random() < 0.1:
+            name = rng.choice(names)
+            result.append(f"gluonts[metric-{name}): {rng.random():.4f}\n")
+        else:
+            result.append(
+                f"INFO Epoch[{index}] avg_epoch_loss={rng.random():.4f}\n"
+            )
+    return "".join(result)
+
+
+def test_same_as_searching_each_metric():
+    # the prefixes of the metrics share no common suffix with the loss
+    with_loss = {**METRICS, "loss": r"avg_epoch_loss=(\d+\.\d+)"}
+    for seed in range(5):
+        log = generate_log(seed)
+        assert parse_metrics(log, METRICS) == naive(log, METRICS)
+        assert parse_metrics(log, with_loss) == naive(log, with_loss)
+
+
+def test_overlapping_metrics():
+    # MAPE): is part of sMAPE): and RMSE): of NRMSE):
+    log = "sMAPE): 0.3\nMAPE): 0.2\nsMAPE): 0.1\nNRMSE): 0.5\n"
+    assert parse_metrics(log, METRICS) == naive(log, METRICS)
+    assert parse_metrics(log, METRICS)["MAPE"] == 0.1
+
+
+def test_chunks():
+    log = generate_log(seed=1)
+    scanner = MetricScanner(METRICS)
+    for size in (1, 7, 100, 4096):
+        chunks = [log[i : i + size] for i in range(0, len(log), size)]
+        record = scanner.scan(chunks)
+        assert record.values == naive(log, METRICS)
+        assert record.counts == {
+            name: len(re.findall(regex, log))
+            for name, regex in METRICS.items()
+            if re.findall(regex, log)
+        }
+
+
+def test_regexes_without_prefix():
+    metrics = {
+        "loss": r"(?:train|val)_loss=(\d+\.\d+)",
+        "epoch": r"\bepoch (\d+)",
+        "MASE": r"MASE\): (\d+\.\d+)",
+        "lr": r"(?i)LEARNING_RATE=(\d+\.\d+)",
+    }
+    log = (
+        "epoch 1 train_loss=0.5 learning_rate=0.1\n"
+        "epoch 2 val_loss=0.25 MASE): 1.5\n"
+    )
+    assert parse_metrics(log, metrics) == {
+        "loss": 0.25,
+        "epoch": 2.0,
+        "MASE": 1.5,
+        "lr": 0.1,
+    }
+
+
+def test_literal_prefix():
+    cases = {
+        r"MASE\): (\d+\.\d+)": "MASE): ",
+        r"loss\[train\]=(\S+)": "loss[train]=",
+        r"epochs?: (\d+)": "epoch",
+        r"ab{2}": "a",
+        r"a\nb": "a",
+        r"^abc": "",
+        r"\d+": "",
+        r"MASE|ND": "",
+        r"(?x) M A S E": "",
+    }
+    for regex, prefix in cases.items():
+        assert literal_prefix(re.compile(regex)) == prefix
+
+    # every match of the metrics starts with their prefix
+    log = generate_log()
+    for regex in METRICS.values():
+        pattern = re.compile(regex)
+        prefix = literal_prefix(pattern)
+        for match in pattern.finditer(log):
+            assert match.group().startswith(prefix)
+
+
+def test_carriage_returns_end_lines():
+    # a progress bar which only writes carriage returns
+    updates = [f"{index}%|loss: 0.{index:03d}\r" for index in range(1000)]
+    scanner = MetricScanner({"loss": r"loss: (\d+\.\d+)"})
+    scanned, update = [], scanner.update
+
+    def recording_update(record, text):
+        scanned.append(text)
+        return update(record, text)
+
+    scanner.update = recording_update
+    record = scanner.scan(updates)
+    assert record.values == parse_metrics("".join(updates), scanner.metrics)
+    assert record.counts == {"loss": 1000}
+    # the text is not held back until the end of the log
+    assert max(map(len, scanned)) <= max(map(len, updates))
+
+
+def test_scan_file(tmp_path):
+    log = generate_log(seed=2)
+    path = tmp_path / "train.log"
+    path.write_text(log)
+    record = MetricScanner(METRICS).scan_file(str(path), chunk_size=333)
+    assert record.values == naive(log, METRICS)
+
+
+def test_empty_log():
+    record = MetricScanner(METRICS).scan([])
+    assert record.values == {} and record.counts == {}
@@ -0,0 +1,162 @@
+import sqlite3
+
+import pytest
+
+from runtool.datatypes import Algorithms, Datasets
+from runtool.hashing import canonical_hash
+from runtool.results import ResultsStore
+
+DATASETS = Datasets(
+    [
+        {"path": {"train": f"s3://bucket/{name}"}, "meta": {"freq": freq}}
+        for name, freq in [("electricity", "H"), ("traffic", "D")]
+    ]
+)
+
+EXPERIMENTS = (
+    Algorithms(
+        [
+            {
+                "image": "gluonts",
+                "instance": "ml.m5.xlarge",
+                "hyperparameters": {
+                    "epochs": epochs,
+                    "model": {"num_layers": layers},
+                },
+            }
+            for epochs in (1, 5, 10)
+            for layers in (2, 4)
+        ]
+    )
+    * DATASETS
+)
+
+
+def mase(experiment):
+    hyperparameters = experiment["algorithm"]["hyperparameters"]
+    offset = (
+        0.0 if "electricity" in experiment["dataset"]["path"]["train"] else 1.0
+    )
+    return (
+        offset
+        + 1 / hyperparameters["epochs"]
+        + hyperparameters["model"]["num_layers"] / 100
+    )
+
+
+def fill(store):
+    store.add_many(
+        (experiment, {"MASE": mase(experiment), "ND": 0.5})
+        for experiment in EXPERIMENTS
+    )
+
+
+def test_batched_writes(tmp_path):
+    path = str(tmp_path / "results.db")
+    store = ResultsStore(path, batch_size=5)
+    fill(store)
+    # only full batches have been written so far
+    (written,) = (
+        sqlite3.connect(path)
+        .execute("SELECT COUNT(*) FROM results")
+        .fetchone()
+    )
+    assert written == 10
+    store.close()
+    with ResultsStore(path) as reopened:
+        assert len(reopened) == len(EXPERIMENTS)
+        assert reopened.hashes() == {
+            canonical_hash(experiment) for experiment in EXPERIMENTS
+        }
+
+
+def test_append_only():
+    with ResultsStore() as store:
+        store.add(EXPERIMENTS[0], {"MASE": 1.0})
+        store.add(EXPERIMENTS[0], {"MASE": 2.0})
+        (result,) = store.results([canonical_hash(EXPERIMENTS[0])])
+        assert result.metrics == {"MASE": 1.0}
+        assert len(store) == 1
+
+
+def test_result_contents():
+    with ResultsStore() as store:
+        fill(store)
+        experiment = EXPERIMENTS[3]
+        key = canonical_hash(experiment)
+        assert key in store
+        (result,) = store.results([key, "unknown"])
+        assert result.hash == key
+        assert result.dataset == canonical_hash(experiment["dataset"])
+        assert result.hyperparameters == {
+            "epochs": experiment["algorithm"]["hyperparameters"]["epochs"],
+            "model.num_layers": experiment["algorithm"]["hyperparameters"][
+                "model"
+            ]["num_layers"],
+        }
+        assert result.meta == dict(experiment["dataset"]["meta"])
+        assert result.metrics == {"MASE": mase(experiment), "ND": 0.5}
+
+
+def test_best_per_dataset():
+    with ResultsStore() as store:
+        fill(store)
+        best = store.best_per_dataset("MASE")
+        worst = store.best_per_dataset("MASE", minimize=False)
+
+    assert set(best) == {canonical_hash(dataset) for dataset in DATASETS}
+    for dataset in DATASETS:
+        key = canonical_hash(dataset)
+        assert best[key].hyperparameters == {
+            "epochs": 10,
+            "model.num_layers": 2,
+        }
+        assert worst[key].hyperparameters == {
+            "epochs": 1,
+            "model.num_layers": 4,
+        }
+        assert best[key].metrics["MASE"] == pytest.approx(
+            min(
+                mase(experiment)
+                for experiment in EXPERIMENTS
+                if experiment["dataset"] == dataset
+            )
+        )
+
+
+def test_where_with_indexes():
+    with ResultsStore() as store:
+        fill(store)
+        unindexed = store.where({"epochs": 5, "model.num_layers": 4})
+        store.index_hyperparameters("epochs", "model.num_layers")
+        indexed = store.where({"epochs": 5, "model.num_layers": 4})
+        plan = store.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT hash FROM results WHERE"
+            " json_extract(hyperparameters, '$.\"epochs\"') = 5"
+        ).fetchall()
+        everything = store.where({})
+
+    assert unindexed == indexed
+    assert len(indexed) == len(DATASETS)
+    assert "USING INDEX" in plan[0][-1]
+    assert len(everything) == len(EXPERIMENTS)
+
+
+def test_many_keys():
+    experiments = Algorithms(
+        [
+            {"image": "a", "instance": "b", "hyperparameters": {"i": index}}
+            for index in range(1200)
+        ]
+    ) * Datasets([{"path": {}}])
+    with ResultsStore() as store:
+        store.add_many(
+            (experiment, {"loss": 1.0}) for experiment in experiments
+        )
+        keys = [canonical_hash(experiment) for experiment in experiments]
+        assert [result.hash for result in store.results(keys)] == keys
+
+
+def test_invalid_hyperparameter_name():
+    with ResultsStore() as store, pytest.raises(ValueError):
+        store.where({'a"b': 1})
@@ -0,0 +1,150 @@
+import pytest
+
+from runtool.datatypes import Algorithms, Datasets, Experiment
+from runtool.runners import LocalRunner, Runner
+from runtool.scheduler import best_trial, hyperband, successive_halving
+
+METRICS = {
+    "MASE": r"MASE\): (\d+\.\d+)",
+    "MAPE": r"MAPE\): (\d+\.\d+)",
+}
+
+EXPERIMENTS = Algorithms(
+    [
+        {
+            "image": "gluonts",
+            "instance": "ml.m5.xlarge",
+            "hyperparameters": {"quality": quality, "epochs": 1},
+            "metrics": METRICS,
+        }
+        for quality in range(1, 28)
+    ]
+) * Datasets([{"path": {"train": "s3://bucket/electricity"}}])
+
+BUDGET_PATH = "algorithm.hyperparameters.epochs"
+
+
+class RecordingTrainer:
+    """
+    Simulates a training job where the error decreases with the quality
+    and the number of epochs, while recording each run.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __call__(self, experiment: Experiment) -> str:
+        hyperparameters = experiment["algorithm"]["hyperparameters"]
+        self.runs.append(
+            (hyperparameters["quality"], hyperparameters["epochs"])
+        )
+        error = 1 / (hyperparameters["quality"] * hyperparameters["epochs"])
+        return f"epoch {hyperparameters['epochs']}\nMASE): {error:.8f}\n"
+
+
+def test_successive_halving():
+    trainer = RecordingTrainer()
+    trials = successive_halving(
+        EXPERIMENTS,
+        LocalRunner(trainer),
+        BUDGET_PATH,
+        metric="MASE",
+        min_budget=1,
+        max_budget=27,
+    )
+    # 27 experiments with 1 epoch, 9 with 3, 3 with 9, 1 with 27
+    assert [trial.budget for trial in trials] == (
+        [1] * 27 + [3] * 9 + [9] * 3 + [27]
+    )
+    assert {quality for quality, epochs in trainer.runs if epochs == 3} == (
+        set(range(19, 28))
+    )
+    best = best_trial(trials, "MASE")
+    assert best.experiment["algorithm"]["hyperparameters"] == {
+        "quality": 27,
+        "epochs": 27,
+    }
+    assert best.metrics["MASE"] == pytest.approx(1 / 27**2, rel=1e-5)
+    # the original experiments are not changed
+    assert all(
+        experiment["algorithm"]["hyperparameters"]["epochs"] == 1
+        for experiment in EXPERIMENTS
+    )
+
+
+def test_successive_halving_maximize():
+    trials = successive_halving(
+        EXPERIMENTS,
+        LocalRunner(RecordingTrainer()),
+        BUDGET_PATH,
+        metric="MASE",
+        min_budget=1,
+        max_budget=27,
+        minimize=False,
+    )
+    best = best_trial(trials, "MASE", minimize=False)
+    assert best.experiment["algorithm"]["hyperparameters"]["quality"] == 1
+
+
+def test_missing_metric_is_worst():
+    def train(experiment):
+        quality = experiment["algorithm"]["hyperparameters"]["quality"]
+        # the best experiments fail without reporting any metrics
+        if quality > 20:
+            return "Traceback (most recent call last):"
+        return f"MASE): {1 / quality:.8f}"
+
+    trials = successive_halving(
+        EXPERIMENTS,
+        LocalRunner(train),
+        BUDGET_PATH,
+        metric="MASE",
+        min_budget=1,
+        max_budget=3,
+    )
+    promoted = [trial for trial in trials if trial.budget == 3]
+    assert [
+        trial.experiment["algorithm"]["hyperparameters"]["quality"]
+        for trial in promoted
+    ] == list(range(12, 21))
+
+
+def test_hyperband():
+    trainer = RecordingTrainer()
+    trials = hyperband(
+        EXPERIMENTS,
+        LocalRunner(trainer),
+        BUDGET_PATH,
+        metric="MASE",
+        min_budget=1,
+        max_budget=9,
+    )
+    # brackets starting with 9 experiments at budget 1, 5 at budget 3 and
+    # 3 at budget 9
+    assert [trial.budget for trial in trials] == (
+        [1] * 9 + [3] * 3 + [9] + [3] * 5 + [9] + [9] * 3
+    )
+    assert len(trainer.runs) == len(trials)
+    best = best_trial(trials, "MASE")
+    assert best.budget == 9
+
+
+def test_invalid_eta():
+    with pytest.raises(ValueError):
+        successive_halving(
+            EXPERIMENTS,
+            LocalRunner(RecordingTrainer()),
+            BUDGET_PATH,
+            metric="MASE",
+            min_budget=1,
+            max_budget=9,
+            eta=1,
+        )
+
+
+def test_runner_requires_run():
+    class Incomplete(Runner):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
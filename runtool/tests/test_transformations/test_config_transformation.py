@@ -1,3 +1,5 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
@@ -456,6 +458,218 @@ def test_each_in_list():
     )
 
 
+def test_where():
+    assert_config_equal(
+        source="""
+        hyperparameters:
+            context_length:
+                $each: [12, 24, 48]
+            prediction_length:
+                $each: [6, 12]
+            epochs: 10
+            $where: context_length > 2 * prediction_length
+        """,
+        expected="""
+        - hyperparameters:
+            context_length: 24
+            prediction_length: 6
+            epochs: 10
+        - hyperparameters:
+            context_length: 48
+            prediction_length: 6
+            epochs: 10
+        - hyperparameters:
+            context_length: 48
+            prediction_length: 12
+            epochs: 10
+        """,
+    )
+
+
+def test_where_multiple():
+    assert_config_equal(
+        source="""
+        a:
+            b:
+                $each: [1, 2, 3]
+            c:
+                $each: [1, 2, 3]
+            $where:
+                - b != c
+                - c > 1
+        """,
+        expected="""
+        - a: {b: 1, c: 2}
+        - a: {b: 1, c: 3}
+        - a: {b: 2, c: 3}
+        - a: {b: 3, c: 2}
+        """,
+    )
+
+
+def test_where_with_each():
+    assert_config_equal(
+        source="""
+        a:
+            b: 2
+            $each:
+                - c: 1
+                - c: 3
+            $where: c > b
+        """,
+        expected="""
+        - a: {c: 3, b: 2}
+        """,
+    )
+
+
+def test_where_nested_values():
+    assert_config_equal(
+        source="""
+        a:
+            b:
+                $each:
+                    - {x: 1}
+                    - {x: 2}
+            c: 1
+            $where: b["x"] > c
+        d:
+            $each: [1, 2]
+        """,
+        expected="""
+        - a: {b: {x: 2}, c: 1}
+          d: 1
+        - a: {b: {x: 2}, c: 1}
+          d: 2
+        """,
+    )
+
+
+def test_where_prunes_everything():
+    assert_config_equal(
+        source="""
+        a:
+            b:
+                $each: [1, 2]
+            $where: b > 2
+        d:
+            $each: [1, 2]
+        """,
+        expected="[]",
+    )
+
+
+def test_zip():
+    assert_config_equal(
+        source="""
+        hyperparameters:
+            prediction_length:
+                $each: [24, 48]
+                $zip: frequency
+            context_length:
+                $each: [96, 192]
+                $zip: frequency
+            epochs:
+                $each: [10, 20]
+        """,
+        expected="""
+        - hyperparameters:
+            prediction_length: 24
+            context_length: 96
+            epochs: 10
+        - hyperparameters:
+            prediction_length: 24
+            context_length: 96
+            epochs: 20
+        - hyperparameters:
+            prediction_length: 48
+            context_length: 192
+            epochs: 10
+        - hyperparameters:
+            prediction_length: 48
+            context_length: 192
+            epochs: 20
+        """,
+    )
+
+
+def test_zip_across_nodes():
+    assert_config_equal(
+        source="""
+        algorithm:
+            prediction_length:
+                $each: [24, 48]
+                $zip: frequency
+        dataset:
+            - name:
+                $each: [hourly, daily]
+                $zip: frequency
+        """,
+        expected="""
+        - algorithm: {prediction_length: 24}
+          dataset: [{name: hourly}]
+        - algorithm: {prediction_length: 48}
+          dataset: [{name: daily}]
+        """,
+    )
+
+
+def test_zip_several_groups():
+    assert_config_equal(
+        source="""
+        a: {$each: [1, 2], $zip: x}
+        b: {$each: [3, 4], $zip: y}
+        c: {$each: [5, 6], $zip: x}
+        d: {$each: [7, 8], $zip: y}
+        """,
+        expected="""
+        - {a: 1, b: 3, c: 5, d: 7}
+        - {a: 1, b: 4, c: 5, d: 8}
+        - {a: 2, b: 3, c: 6, d: 7}
+        - {a: 2, b: 4, c: 6, d: 8}
+        """,
+    )
+
+
+def test_zip_dicts():
+    assert_config_equal(
+        source="""
+        a:
+            $each:
+                - {b: 1}
+                - {b: 2}
+                - {b: 3}
+            $zip: g
+        c:
+            $each: [1, 2]
+            $zip: g
+        """,
+        expected="""
+        - {a: {b: 1}, c: 1}
+        - {a: {b: 2}, c: 2}
+        """,
+    )
+
+
+def test_zip_with_where():
+    assert_config_equal(
+        source="""
+        a:
+            b: {$each: [1, 2, 3], $zip: g}
+            c: {$each: [3, 2, 1], $zip: g}
+            $where: b < c
+        """,
+        expected="""
+        - a: {b: 1, c: 3}
+        """,
+    )
+
+
+def test_zip_without_each():
+    with pytest.raises(TypeError):
+        apply_transformations({"a": {"$zip": "g", "b": 1}})
+
+
 def test_eval():
     assert_config_equal(
         source="""
@@ -630,3 +844,22 @@ def test_large_example():
 
 def test_complex_example():
     assert_config_equal(**load("complex_example"))
+
+
+@pytest.mark.parametrize(
+    "testname", ["simple_example", "large_example", "complex_example"]
+)
+def test_shared_config(testname):
+    # the parsed config is not changed by the transformations, thus it can
+    # be transformed several times and from several threads at once
+    config = yaml.safe_load(load(testname)["source"])
+    original = copy.deepcopy(config)
+    expected = apply_transformations(config)
+    assert apply_transformations(config) == expected
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda _: apply_transformations(config), range(32))
+        )
+    assert all(result == expected for result in results)
+    assert config == original
@@ -0,0 +1,114 @@
+import copy
+from pathlib import Path
+
+import pytest
+import yaml
+
+from runtool.budget import Budget, BudgetExceededError
+from runtool.runtool import load_config
+from runtool.transformer import (
+    apply_transformations,
+    closure,
+    dependency_graph,
+)
+
+TEST_DATA = Path(__file__).parent / "test_data"
+
+
+def assert_same_as_serial(config):
+    serial = apply_transformations(copy.deepcopy(config))
+    parallel = apply_transformations(copy.deepcopy(config), processes=2)
+    assert parallel == serial
+
+
+@pytest.mark.parametrize(
+    "name", ["simple_example", "large_example", "complex_example"]
+)
+def test_examples(name):
+    with open(TEST_DATA / name / "source.yml") as source:
+        assert_same_as_serial(yaml.safe_load(source))
+
+
+def test_load_config():
+    path = TEST_DATA / "large_example" / "source.yml"
+    assert load_config(path, processes=2) == load_config(path)
+
+
+def test_dependencies():
+    config = {
+        "base": {"image": "gluonts", "epochs": {"$each": [1, 2]}},
+        "algorithm": {
+            "$from": "base",
+            "hyperparameters": {"name": {"$eval": "$.names[0] + '!'"}},
+        },
+        "names": ["a", "b"],
+        "dataset": {"name": {"$ref": "algorithm.hyperparameters.name"}},
+        "independent": {"$each": [1, 2, 3]},
+    }
+    graph = dependency_graph(config)
+    assert graph == {
+        "base": set(),
+        "algorithm": {"base", "names"},
+        "names": set(),
+        "dataset": {"algorithm"},
+        "independent": set(),
+    }
+    assert closure(graph, "dataset") == {
+        "dataset",
+        "algorithm",
+        "base",
+        "names",
+    }
+    assert closure(graph, "independent") == {"independent"}
+    assert_same_as_serial(config)
+
+
+def test_dependencies_with_quoted_keys():
+    config = {
+        "names": ["a", "b"],
+        "my-key": 2,
+        "a.b": 3,
+        "algorithm": {
+            "name": {"$eval": "$['names'][1] + '!'"},
+            "epochs": {"$eval": '$["my-key"] * $["a.b"]'},
+        },
+        "other": 1,
+    }
+    assert dependency_graph(config)["algorithm"] == {"names", "my-key", "a.b"}
+
+
+def test_dependencies_by_name():
+    config = {
+        "base": {"e": 3},
+        "a": {"x": {"$eval": "base.e * 2"}},
+        "n": 2,
+        "b": {"y": {"$eval": "sum(range(n)) * base.e"}},
+        "other": 1,
+    }
+    graph = dependency_graph(config)
+    assert graph["a"] == {"base"}
+    assert graph["b"] == {"base", "n"}
+    assert_same_as_serial(config)
+
+
+def test_unparsed_references_depend_on_all_keys():
+    config = {"a": 1, "b": {"$eval": "$[key]"}, "c": {"$eval": "1 +"}}
+    assert dependency_graph(config)["b"] == {"a", "b", "c"}
+    assert dependency_graph(config)["c"] == {"a", "b", "c"}
+
+
+def test_zip_and_where_between_keys():
+    assert_same_as_serial(
+        {
+            "a": {"$each": [1, 2, 3], "$zip": "g"},
+            "b": {"$each": [4, 5, 6], "$zip": "g"},
+            "c": {"$each": [1, 2]},
+            "$where": "c < a",
+        }
+    )
+
+
+def test_budget():
+    config = {str(index): {"$each": list(range(10))} for index in range(8)}
+    with pytest.raises(BudgetExceededError):
+        apply_transformations(config, Budget(max_versions=1000), processes=2)
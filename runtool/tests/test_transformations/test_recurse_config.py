@@ -1,4 +1,7 @@
+import pytest
 from runtool.recurse_config import (
+    Constraint,
+    versions_product,
     recursive_apply,
     recursive_apply_dict,
     recursive_apply_list,
@@ -184,3 +187,59 @@ def test_recursive_apply_merging_versions_with_function():
             ]
         ),
     )
+
+
+def test_recursive_apply_where():
+    compare_recursive_apply(
+        node={
+            "a": {"version": [1, 2, 3]},
+            "b": {"version": [1, 2]},
+            "$where": "a > b",
+        },
+        expected=Versions(
+            [{"a": 2, "b": 1}, {"a": 3, "b": 1}, {"a": 3, "b": 2}]
+        ),
+    )
+
+
+def test_versions_product_prunes_early():
+    evaluated = []
+
+    class CountingConstraint(Constraint):
+        def __call__(self, values):
+            evaluated.append(self.expression)
+            return super().__call__(values)
+
+    result = [
+        combination
+        for combination, _ in versions_product(
+            versioned=[
+                ("a", Versions(list(range(10)))),
+                ("b", Versions(list(range(100)))),
+            ],
+            fixed={},
+            constraints=[CountingConstraint("a == 0")],
+        )
+    ]
+    assert result == [{"a": 0, "b": b} for b in range(100)]
+    # the constraint only depends on "a" and is thus checked once per
+    # value of "a" instead of once per combination
+    assert len(evaluated) == 10
+
+
+def test_versions_product_fixed_constraint():
+    assert (
+        list(
+            versions_product(
+                versioned=[("a", Versions([1, 2]))],
+                fixed={"b": 1},
+                constraints=[Constraint("b > 1")],
+            )
+        )
+        == []
+    )
+
+
+def test_constraint_invalid():
+    with pytest.raises(TypeError):
+        Constraint(["a > 1"])
@@ -1,3 +1,5 @@
+import copy
+
 from runtool.recurse_config import Versions
 from runtool.transformations import (
     apply_each,
@@ -8,6 +10,7 @@ from runtool.transformations import (
     evaluate,
     recurse_eval,
 )
+from runtool.utils import without_keys
 
 
 def compare_apply_from(node, data, expected):
@@ -197,3 +200,29 @@ def test_apply_each_with_none():
             ]
         ),
     )
+
+
+def test_transformations_do_not_change_node():
+    node = {
+        "$from": "base",
+        "a": {"b": 1},
+        "$each": ["$None", {"c": 2}],
+        "$zip": "g",
+    }
+    context = {"base": {"a": {"d": 2}}}
+    original = copy.deepcopy((node, context))
+
+    assert apply_from(node, context) == {
+        "a": {"b": 1, "d": 2},
+        "$each": ["$None", {"c": 2}],
+        "$zip": "g",
+    }
+    each = apply_each(without_keys(node, "$from"))
+    assert list(each) == [{"a": {"b": 1}}, {"c": 2, "a": {"b": 1}}]
+    assert (node, context) == original
+
+
+def test_apply_eval_with_trial_does_not_change_node():
+    node = {"$eval": "$trial.algorithm.epochs * 2"}
+    assert apply_eval(node, {}) == {"$eval": "__trial__.algorithm.epochs * 2"}
+    assert node == {"$eval": "$trial.algorithm.epochs * 2"}
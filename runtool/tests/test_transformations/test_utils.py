@@ -79,3 +79,15 @@ def test_get_item_from_path_medium():
         path="hello.3.there",
         expected="world",
     )
+
+
+def test_updated_nested_dict_does_not_change_arguments():
+    data = {"a": {"b": 1, "c": {"d": 2}}, "e": {"f": 3}}
+    to_update = {"a": {"b": {"g": 4}}}
+    result = update_nested_dict(data, to_update)
+    assert result == {"a": {"b": {"g": 4}, "c": {"d": 2}}, "e": {"f": 3}}
+    assert data == {"a": {"b": 1, "c": {"d": 2}}, "e": {"f": 3}}
+    assert to_update == {"a": {"b": {"g": 4}}}
+    # values which were not updated are shared
+    assert result["e"] is data["e"]
+    assert result["a"]["c"] is data["a"]["c"]